@@ -1,7 +1,7 @@
 from fastapi import APIRouter
 
 from app.api.api_v1.gui import login, users, utils, contexts, accesses
-from app.api.api_v1.gp import acl, privilege, resource, role, owner
+from app.api.api_v1.gp import acl, privilege, resource, role, owner, job
 
 api_router = APIRouter()
 
@@ -18,3 +18,4 @@ api_router.include_router(role.router, prefix="/roles", tags=["roles"])
 api_router.include_router(privilege.router, prefix="/privileges", tags=["privileges"])
 api_router.include_router(resource.router, prefix="/resource-groups", tags=["resource-groups"])
 api_router.include_router(owner.router, prefix="/owners", tags=["owners"])
+api_router.include_router(job.router, prefix="/jobs", tags=["jobs"])
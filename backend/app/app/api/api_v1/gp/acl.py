@@ -1,9 +1,12 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends
+from typing import Any, Iterator, List, Optional
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 
+from app.db.access_index import AccessIndex
+from app.db.greenplum import session_database
 from app.db.orm_types import GreenPlumSession
 import app.use_case.acl as acl
-from app.api.deps import get_current_active_user, get_greenplum_session
+from app.api.deps import get_current_access_index, get_current_active_user, get_greenplum_session
 import app.schemas as schemas
 import app.models as models
 
@@ -12,36 +15,100 @@ router = APIRouter()
 
 @router.get("/databases", response_model=List[schemas.Database])
 def read_acl_databases(
+    scoped: bool = False,
     current_user: models.User = Depends(get_current_active_user),
+    access_index: AccessIndex = Depends(get_current_access_index),
     db: GreenPlumSession = Depends(get_greenplum_session),
 ) -> Any:
     """
     Return all ACL permissions about all databases.
+    With scoped=true only databases from the user's access rules are returned.
     """
 
+    databases = access_index.databases() if scoped else None
+    if databases is not None:
+        return acl.get_database_acls_by_names(db, databases)
+
     return acl.get_all_database_acls(db)
 
 
 @router.get("/schemas", response_model=List[schemas.Schema])
 def read_acl_schemas(
+    scoped: bool = False,
     current_user: models.User = Depends(get_current_active_user),
+    access_index: AccessIndex = Depends(get_current_access_index),
     db: GreenPlumSession = Depends(get_greenplum_session),
 ) -> Any:
     """
     Return all ACL permissions about all schemas in a specific database.
+    With scoped=true only schemas from the user's access rules are returned.
     """
 
+    names = access_index.schemas_of(session_database(db)) if scoped else None
+    if names is not None:
+        return acl.get_schema_acls_by_names(db, names)
+
     return acl.get_all_schema_acls(db)
 
 
 @router.get("/schemas/{schema}/tables", response_model=List[schemas.Table])
 def read_acl_tables(
     schema: str,
+    scoped: bool = False,
     current_user: models.User = Depends(get_current_active_user),
+    access_index: AccessIndex = Depends(get_current_access_index),
     db: GreenPlumSession = Depends(get_greenplum_session),
 ) -> Any:
     """
     Return all ACL permissions about all tables in a specific database and shema.
     """
 
+    if scoped and not access_index.may_edit_schema(session_database(db), schema):
+        return []
+
     return acl.get_all_table_acls(db, schema)
+
+
+@router.get("/schemas/{schema}/tables/page", response_model=schemas.TablePage)
+def read_acl_tables_page(
+    schema: str,
+    after: Optional[str] = None,
+    limit: int = Query(1000, ge=1, le=10000),
+    scoped: bool = False,
+    current_user: models.User = Depends(get_current_active_user),
+    access_index: AccessIndex = Depends(get_current_access_index),
+    db: GreenPlumSession = Depends(get_greenplum_session),
+) -> Any:
+    """
+    Return one page of ACL permissions about tables in a specific schema.
+    Pass next_cursor of the previous page as after to get the next one.
+    """
+
+    if scoped and not access_index.may_edit_schema(session_database(db), schema):
+        return acl.TableAclPageDTO(items=[], next_cursor=None)
+
+    return acl.get_page_of_table_acls(db, schema, after, limit)
+
+
+def _ndjson_tables(tables: Iterator[acl.TableAclDTO]) -> Iterator[str]:
+    for table in tables:
+        yield schemas.Table.from_orm(table).json(by_alias=True) + "\n"
+
+
+@router.get("/schemas/{schema}/tables/stream", response_class=StreamingResponse)
+def stream_acl_tables(
+    schema: str,
+    scoped: bool = False,
+    current_user: models.User = Depends(get_current_active_user),
+    access_index: AccessIndex = Depends(get_current_access_index),
+    db: GreenPlumSession = Depends(get_greenplum_session),
+) -> Any:
+    """
+    Stream ACL permissions about all tables in a specific schema as NDJSON.
+    """
+
+    if scoped and not access_index.may_edit_schema(session_database(db), schema):
+        tables: Iterator[acl.TableAclDTO] = iter([])
+    else:
+        tables = acl.iter_all_table_acls(db, schema)
+    return StreamingResponse(_ndjson_tables(tables), media_type="application/x-ndjson")
@@ -0,0 +1,107 @@
+from typing import Any, List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+import app.crud as crud
+from app.db.access_index import AccessIndex
+from app.api.deps import (
+    get_current_access_index,
+    get_current_active_context,
+    get_current_active_superuser,
+    get_current_active_user,
+    get_db,
+)
+from app.jobs import job_runner
+import app.schemas as schemas
+import app.models as models
+
+router = APIRouter()
+
+
+@router.get("", response_model=List[schemas.Job])
+def read_jobs(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: models.User = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Retrieve background jobs, the newest first.
+    """
+
+    user_id = None if current_user.is_superuser else current_user.id
+    return crud.job.get_multi_by_user(db, user_id=user_id, skip=skip, limit=limit)
+
+
+@router.get("/{job_id}/one", response_model=schemas.Job)
+def read_job_by_id(
+    job_id: int,
+    current_user: models.User = Depends(get_current_active_user),
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Get a specific background job by id to poll its progress.
+    """
+
+    job = crud.job.get(db, id=job_id)
+    if not job or (job.user_id != current_user.id and not current_user.is_superuser):
+        raise HTTPException(
+            status_code=404,
+            detail="The job with this id does not exist in the system",
+        )
+    return job
+
+
+@router.post("/grant-on/table/in-database", response_model=schemas.Job)
+def submit_grant_on_tables_in_database(
+    *,
+    db_name: str = Query(None, alias="db"),
+    grant_options: schemas.GrantTablesInDatabase,
+    current_user: models.User = Depends(get_current_active_user),
+    current_context: models.Context = Depends(get_current_active_context),
+    access_index: AccessIndex = Depends(get_current_access_index),
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Grant and revoke permissions of all tables in all schemas in database as a background job.
+    """
+
+    accessed = access_index.may_edit_database(grant_options.database)
+
+    if not accessed:
+        raise HTTPException(
+            status_code=400,
+            detail="The user doesn't have enough privileges"
+        )
+
+    return job_runner.submit(
+        db,
+        kind="grant_all_tables_in_database",
+        user=current_user,
+        context=current_context,
+        database=db_name,
+        payload=grant_options.dict(),
+    )
+
+
+@router.post("/drop-role/{rolname}", response_model=schemas.Job)
+def submit_drop_role(
+    *,
+    rolname: str,
+    db_name: str = Query(None, alias="db"),
+    current_user: models.User = Depends(get_current_active_superuser),
+    current_context: models.Context = Depends(get_current_active_context),
+    db: Session = Depends(get_db),
+) -> Any:
+    """
+    Delete a specific role by name as a background job.
+    """
+
+    return job_runner.submit(
+        db,
+        kind="drop_role",
+        user=current_user,
+        context=current_context,
+        database=db_name,
+        payload={"rolname": rolname},
+    )
@@ -1,10 +1,11 @@
-from typing import Any, List
+from typing import Any
 from fastapi import APIRouter, Depends, HTTPException
 
 from app.db.orm_types import GreenPlumSession
 import app.use_case.owner as owner
+from app.db.access_index import AccessIndex
 from app.api.deps import (
-    get_current_active_access,
+    get_current_access_index,
     get_current_active_user,
     get_greenplum_session,
 )
@@ -19,19 +20,14 @@ def change_entity_owner(
     *,
     owner_options: schemas.OwnerEntityUpdate,
     current_user: models.User = Depends(get_current_active_user),
-    current_access: List[models.Access] = Depends(get_current_active_access),
+    access_index: AccessIndex = Depends(get_current_access_index),
     db: GreenPlumSession = Depends(get_greenplum_session),
 ) -> Any:
     """
     Change the owner of the selected entity.
     """
 
-    accessed = bool(list(filter(
-        lambda x: x.database == owner_options.database and (
-            x.db_schema is None or x.db_schema == owner_options.db_schema
-        ),
-        current_access
-    ))) if not current_user.is_superuser else True
+    accessed = access_index.may_edit_schema(owner_options.database, owner_options.db_schema)
 
     if not accessed:
         raise HTTPException(
@@ -1,11 +1,12 @@
 from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 
 from app.db.orm_types import GreenPlumSession
 import app.use_case.privilege as privilege
 import app.use_case.privilege_graph as privilege_graph
+from app.db.access_index import AccessIndex
 from app.api.deps import (
-    get_current_active_access,
+    get_current_access_index,
     get_current_active_user,
     get_greenplum_session,
 )
@@ -38,22 +39,19 @@ def decode_acl_rules(
     return privilege.parce_acl_rules(acl_rules.acls)
 
 
-@router.put("/grant-on/database", response_model=schemas.Msg)
+@router.put("/grant-on/database", response_model=schemas.MsgGrantResult)
 def grant_on_database(
     *,
     grant_options: schemas.GrantDatabase,
     current_user: models.User = Depends(get_current_active_user),
-    current_access: List[models.Access] = Depends(get_current_active_access),
+    access_index: AccessIndex = Depends(get_current_access_index),
     db: GreenPlumSession = Depends(get_greenplum_session),
 ) -> Any:
     """
     Grant and revoke permissions of a database.
     """
 
-    accessed = bool(list(filter(
-        lambda x: x.database == grant_options.name and x.db_schema is None,
-        current_access
-    ))) if not current_user.is_superuser else True
+    accessed = access_index.may_edit_database(grant_options.name)
 
     if not accessed:
         raise HTTPException(
@@ -61,28 +59,23 @@ def grant_on_database(
             detail="The user doesn't have enough privileges"
         )
 
-    privilege.grant_on_database(db, grant_options)
-    return {"msg": "Permissions have been granted successfully."}
+    touched = privilege.grant_on_database(db, grant_options)
+    return {"msg": "Permissions have been granted successfully.", "touched": touched}
 
 
-@router.put("/grant-on/schema", response_model=schemas.Msg)
+@router.put("/grant-on/schema", response_model=schemas.MsgGrantResult)
 def grant_on_schema(
     *,
     grant_options: schemas.GrantSchema,
     current_user: models.User = Depends(get_current_active_user),
-    current_access: List[models.Access] = Depends(get_current_active_access),
+    access_index: AccessIndex = Depends(get_current_access_index),
     db: GreenPlumSession = Depends(get_greenplum_session),
 ) -> Any:
     """
     Grant and revoke permissions of a schema.
     """
 
-    accessed = bool(list(filter(
-        lambda x: x.database == grant_options.database and (
-            x.db_schema is None or x.db_schema == grant_options.name
-        ),
-        current_access
-    ))) if not current_user.is_superuser else True
+    accessed = access_index.may_edit_schema(grant_options.database, grant_options.name)
 
     if not accessed:
         raise HTTPException(
@@ -90,26 +83,23 @@ def grant_on_schema(
             detail="The user doesn't have enough privileges"
         )
 
-    privilege.grant_on_schema(db, grant_options)
-    return {"msg": "Permissions have been granted successfully."}
+    touched = privilege.grant_on_schema(db, grant_options)
+    return {"msg": "Permissions have been granted successfully.", "touched": touched}
 
 
-@router.put("/grant-on/schema/in-database", response_model=schemas.Msg)
+@router.put("/grant-on/schema/in-database", response_model=schemas.MsgGrantResult)
 def grant_on_schemas_in_database(
     *,
     grant_options: schemas.GrantSchemasInDatabase,
     current_user: models.User = Depends(get_current_active_user),
-    current_access: List[models.Access] = Depends(get_current_active_access),
+    access_index: AccessIndex = Depends(get_current_access_index),
     db: GreenPlumSession = Depends(get_greenplum_session),
 ) -> Any:
     """
     Grant and revoke permissions of all schemas in database.
     """
 
-    accessed = bool(list(filter(
-        lambda x: x.database == grant_options.database and x.db_schema is None,
-        current_access
-    ))) if not current_user.is_superuser else True
+    accessed = access_index.may_edit_database(grant_options.database)
 
     if not accessed:
         raise HTTPException(
@@ -117,28 +107,23 @@ def grant_on_schemas_in_database(
             detail="The user doesn't have enough privileges"
         )
 
-    privilege.grant_all_schemas_in_database(db, grant_options)
-    return {"msg": "Permissions have been granted successfully."}
+    touched = privilege.grant_all_schemas_in_database(db, grant_options)
+    return {"msg": "Permissions have been granted successfully.", "touched": touched}
 
 
-@router.put("/grant-on/table", response_model=schemas.Msg)
+@router.put("/grant-on/table", response_model=schemas.MsgGrantResult)
 def grant_on_table(
     *,
     grant_options: schemas.GrantTable,
     current_user: models.User = Depends(get_current_active_user),
-    current_access: List[models.Access] = Depends(get_current_active_access),
+    access_index: AccessIndex = Depends(get_current_access_index),
     db: GreenPlumSession = Depends(get_greenplum_session),
 ) -> Any:
     """
     Grant and revoke permissions of a table.
     """
 
-    accessed = bool(list(filter(
-        lambda x: x.database == grant_options.database and (
-            x.db_schema is None or x.db_schema == grant_options.db_schema
-        ),
-        current_access
-    ))) if not current_user.is_superuser else True
+    accessed = access_index.may_edit_schema(grant_options.database, grant_options.db_schema)
 
     if not accessed:
         raise HTTPException(
@@ -146,28 +131,23 @@ def grant_on_table(
             detail="The user doesn't have enough privileges"
         )
 
-    privilege.grant_on_table(db, grant_options)
-    return {"msg": "Permissions have been granted successfully."}
+    touched = privilege.grant_on_table(db, grant_options)
+    return {"msg": "Permissions have been granted successfully.", "touched": touched}
 
 
-@router.put("/grant-on/table/in-schema", response_model=schemas.Msg)
+@router.put("/grant-on/table/in-schema", response_model=schemas.MsgGrantResult)
 def grant_on_tables_in_schema(
     *,
     grant_options: schemas.GrantTablesInSchema,
     current_user: models.User = Depends(get_current_active_user),
-    current_access: List[models.Access] = Depends(get_current_active_access),
+    access_index: AccessIndex = Depends(get_current_access_index),
     db: GreenPlumSession = Depends(get_greenplum_session),
 ) -> Any:
     """
     Grant and revoke permissions of all tables in schema.
     """
 
-    accessed = bool(list(filter(
-        lambda x: x.database == grant_options.database and (
-            x.db_schema is None or x.db_schema == grant_options.db_schema
-        ),
-        current_access
-    ))) if not current_user.is_superuser else True
+    accessed = access_index.may_edit_schema(grant_options.database, grant_options.db_schema)
 
     if not accessed:
         raise HTTPException(
@@ -175,26 +155,24 @@ def grant_on_tables_in_schema(
             detail="The user doesn't have enough privileges"
         )
 
-    privilege.grant_all_tables_in_schema(db, grant_options)
-    return {"msg": "Permissions have been granted successfully."}
+    touched = privilege.grant_all_tables_in_schema(db, grant_options)
+    return {"msg": "Permissions have been granted successfully.", "touched": touched}
 
 
-@router.put("/grant-on/table/in-database", response_model=schemas.Msg)
+@router.put("/grant-on/table/in-database", response_model=schemas.MsgGrantResult, deprecated=True)
 def grant_on_tables_in_database(
     *,
     grant_options: schemas.GrantTablesInDatabase,
     current_user: models.User = Depends(get_current_active_user),
-    current_access: List[models.Access] = Depends(get_current_active_access),
+    access_index: AccessIndex = Depends(get_current_access_index),
     db: GreenPlumSession = Depends(get_greenplum_session),
 ) -> Any:
     """
     Grant and revoke permissions of all tables in all schemas in database.
+    Deprecated: holds the request for the whole run, use POST /jobs/grant-on/table/in-database.
     """
 
-    accessed = bool(list(filter(
-        lambda x: x.database == grant_options.database and x.db_schema is None,
-        current_access
-    ))) if not current_user.is_superuser else True
+    accessed = access_index.may_edit_database(grant_options.database)
 
     if not accessed:
         raise HTTPException(
@@ -202,8 +180,38 @@ def grant_on_tables_in_database(
             detail="The user doesn't have enough privileges"
         )
 
-    privilege.grant_all_tables_in_database(db, grant_options)
-    return {"msg": "Permissions have been granted successfully."}
+    touched = privilege.grant_all_tables_in_database(db, grant_options)
+    return {"msg": "Permissions have been granted successfully.", "touched": touched}
+
+
+@router.post("/grant-batch", response_model=List[schemas.GrantBatchResult])
+def grant_batch(
+    *,
+    entries: List[schemas.GrantBatchEntry],
+    current_user: models.User = Depends(get_current_active_user),
+    access_index: AccessIndex = Depends(get_current_access_index),
+    db: GreenPlumSession = Depends(get_greenplum_session),
+) -> Any:
+    """
+    Grant and revoke permissions of many objects for many roles at once.
+    """
+
+    def accessed(entry: schemas.GrantBatchEntry) -> bool:
+        return access_index.may_edit_schema(entry.database, entry.db_schema)
+
+    allowed = [entry for entry in entries if accessed(entry)]
+    results = iter(privilege.grant_batch(db, allowed))
+
+    return [
+        next(results) if accessed(entry) else schemas.GrantBatchResult(
+            database=entry.database,
+            schema=entry.db_schema,
+            table=entry.table,
+            role_specification=entry.role_specification,
+            touched=0,
+            error="The user doesn't have enough privileges",
+        ) for entry in entries
+    ]
 
 
 @router.post("/graph-permissions", response_model=List[schemas.Privilege])
@@ -220,6 +228,35 @@ def read_graph_acl_permissions(
     return privilege_graph.get_all_graph_permissions(db, graph_info)
 
 
+@router.post("/graph-permissions/batch", response_model=List[schemas.GraphObjectPermissions])
+def read_batch_graph_acl_permissions(
+    *,
+    objects: List[schemas.GraphPermissions],
+    current_user: models.User = Depends(get_current_active_user),
+    db: GreenPlumSession = Depends(get_greenplum_session),
+) -> Any:
+    """
+    Return all graph ACL permissions for several objects on a server at once.
+    """
+
+    return privilege_graph.get_batch_graph_permissions(db, objects)
+
+
+@router.get("/role-access/{rolname}", response_model=schemas.RoleAccessPage)
+def read_role_access(
+    rolname: str,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=10000),
+    current_user: models.User = Depends(get_current_active_user),
+    db: GreenPlumSession = Depends(get_greenplum_session),
+) -> Any:
+    """
+    Return databases, schemas and tables a role can access, directly or through its groups.
+    """
+
+    return privilege_graph.get_role_access(db, rolname, skip, limit)
+
+
 @router.get("/default-permissions", response_model=List[schemas.DefaultPermissions])
 def read_default_acl_permissions(
     current_user: models.User = Depends(get_current_active_user),
@@ -237,19 +274,14 @@ def revoke_defaults_on_all(
     *,
     revoke_options: schemas.RevokeAllDefaults,
     current_user: models.User = Depends(get_current_active_user),
-    current_access: List[models.Access] = Depends(get_current_active_access),
+    access_index: AccessIndex = Depends(get_current_access_index),
     db: GreenPlumSession = Depends(get_greenplum_session),
 ) -> Any:
     """
     Revoke default permissions of all type of objects on a server.
     """
 
-    accessed = bool(list(filter(
-        lambda x: x.database == revoke_options.database and (
-            x.db_schema is None or x.db_schema == revoke_options.db_schema
-        ),
-        current_access
-    ))) if not current_user.is_superuser else True
+    accessed = access_index.may_edit_schema(revoke_options.database, revoke_options.db_schema)
 
     if not accessed:
         raise HTTPException(
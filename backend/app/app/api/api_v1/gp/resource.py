@@ -1,9 +1,11 @@
-from typing import Any, List
+from datetime import datetime
+from typing import Any, List, Optional
 from fastapi import APIRouter, Depends
 
 from app.db.orm_types import GreenPlumConnection, GreenPlumSession
 import app.use_case.resource as resource
 from app.api.deps import (
+    get_current_active_context,
     get_current_active_user,
     get_current_active_superuser,
     get_greenplum_connection,
@@ -11,6 +13,7 @@ from app.api.deps import (
 )
 import app.schemas as schemas
 import app.models as models
+from app.jobs import resource_group_sampler
 
 router = APIRouter()
 
@@ -39,6 +42,22 @@ def read_available_limits_for_resource_groups(
     return resource.get_resourse_groups_limits(db)
 
 
+@router.get("/usage", response_model=schemas.ResourceGroupUsage)
+def read_resource_groups_usage(
+    since: Optional[datetime] = None,
+    resource_group: Optional[str] = None,
+    current_user: models.User = Depends(get_current_active_user),
+    current_context: models.Context = Depends(get_current_active_context),
+    db: GreenPlumSession = Depends(get_greenplum_session),
+) -> Any:
+    """
+    Get history of resource groups utilisation collected by the background sampler.
+    """
+
+    history = resource_group_sampler.history(current_context.id, db)
+    return history.usage(since, resource_group)
+
+
 @router.post("", response_model=schemas.Msg)
 def create_resource_group(
     *,
@@ -70,6 +89,21 @@ def update_resource_group(
     return {"msg": "The resource group with this name was successfully updated."}
 
 
+@router.post("/{resource_group}/members", response_model=List[schemas.ResourceGroupMemberResult])
+def assign_resource_group_members(
+    *,
+    resource_group: str,
+    rolnames: List[str],
+    current_user: models.User = Depends(get_current_active_superuser),
+    db: GreenPlumConnection = Depends(get_greenplum_connection),
+) -> Any:
+    """
+    Assign a list of roles to a specific resource group.
+    """
+
+    return resource.assign_resource_group_members(db, resource_group, rolnames)
+
+
 @router.delete("/{resource_group}/one", response_model=schemas.Msg)
 def delete_resource_group(
     *,
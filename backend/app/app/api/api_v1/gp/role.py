@@ -3,8 +3,9 @@ from fastapi import APIRouter, Depends, HTTPException
 
 from app.db.orm_types import GreenPlumSession
 import app.use_case.role as role
+from app.db.access_index import AccessIndex
 from app.api.deps import (
-    get_current_active_access,
+    get_current_access_index,
     get_current_active_user,
     get_current_active_superuser,
     get_greenplum_session,
@@ -17,13 +18,20 @@ router = APIRouter()
 
 @router.get("", response_model=List[schemas.Role])
 def read_roles(
+    scoped: bool = False,
     current_user: models.User = Depends(get_current_active_user),
+    access_index: AccessIndex = Depends(get_current_access_index),
     db: GreenPlumSession = Depends(get_greenplum_session),
 ) -> Any:
     """
     Get all roles in a server.
+    With scoped=true only roles from the user's access rules are returned.
     """
 
+    rolnames = access_index.roles() if scoped else None
+    if rolnames is not None:
+        return role.get_roles_by_names(db, rolnames)
+
     return role.get_all_roles(db)
 
 
@@ -58,17 +66,14 @@ def remove_member_from_role(
     rolname: str,
     member: str,
     current_user: models.User = Depends(get_current_active_user),
-    current_access: List[models.Access] = Depends(get_current_active_access),
+    access_index: AccessIndex = Depends(get_current_access_index),
     db: GreenPlumSession = Depends(get_greenplum_session),
 ) -> Any:
     """
     Remove one member from a specific role.
     """
 
-    accessed = bool(list(filter(
-        lambda x: x.role == rolname,
-        current_access
-    ))) if not current_user.is_superuser else True
+    accessed = access_index.may_edit_role(rolname)
 
     if not accessed:
         raise HTTPException(
@@ -86,17 +91,14 @@ def append_member_to_role(
     rolname: str,
     member: str,
     current_user: models.User = Depends(get_current_active_user),
-    current_access: List[models.Access] = Depends(get_current_active_access),
+    access_index: AccessIndex = Depends(get_current_access_index),
     db: GreenPlumSession = Depends(get_greenplum_session),
 ) -> Any:
     """
     Append one member into a specific role.
     """
 
-    accessed = bool(list(filter(
-        lambda x: x.role == rolname,
-        current_access
-    ))) if not current_user.is_superuser else True
+    accessed = access_index.may_edit_role(rolname)
 
     if not accessed:
         raise HTTPException(
@@ -139,7 +141,21 @@ def update_role(
     return {"msg": "The role with this rolname was successfully updated."}
 
 
-@router.delete("/{rolname}/one", response_model=schemas.Msg)
+@router.get("/{rolname}/dependencies", response_model=schemas.RoleDependencies)
+def read_role_dependencies(
+    *,
+    rolname: str,
+    current_user: models.User = Depends(get_current_active_superuser),
+    db: GreenPlumSession = Depends(get_greenplum_session),
+) -> Any:
+    """
+    Show objects that depend on a role in every database and how the role will be deleted.
+    """
+
+    return role.get_role_dependencies(db, rolname)
+
+
+@router.delete("/{rolname}/one", response_model=schemas.RoleDropResult, deprecated=True)
 def delete_role(
     *,
     rolname: str,
@@ -148,7 +164,8 @@ def delete_role(
 ) -> Any:
     """
     Delete a specific role by name.
+    Deprecated: holds the request while objects are reassigned in every database, use POST /jobs/drop-role/{rolname}.
     """
 
-    role.drop_role(db, rolname)
-    return {"msg": "The role with this rolname was successfully deleted."}
+    databases = role.drop_role(db, rolname)
+    return {"msg": "The role with this rolname was successfully deleted.", "databases": databases}
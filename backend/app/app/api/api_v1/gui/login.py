@@ -4,7 +4,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
-from app.core.auth import BaseAuth
+from app.core.auth import AuthUnavailable, BaseAuth
 import app.crud as crud
 import app.schemas as schemas
 import app.models as models
@@ -25,7 +25,11 @@ def login_access_token(
     OAuth2 compatible token login, get an access token for future requests.
     """
 
-    user = auth.auth(form_data.username, form_data.password, db=db)
+    try:
+        user = auth.auth(form_data.username, form_data.password, db=db)
+    except AuthUnavailable:
+        # Пароль не проверен, а не неверен: клиент может повторить вход
+        raise HTTPException(status_code=503, detail="Authentication server is unavailable, try again later")
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     elif not crud.user.is_active(user):
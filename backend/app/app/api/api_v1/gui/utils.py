@@ -1,8 +1,11 @@
 from typing import Any
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import PlainTextResponse
 
+import app.models as models
 import app.schemas as schemas
 from app.api import deps
+from app.core.profiler import load_profile
 
 router = APIRouter()
 
@@ -16,3 +19,19 @@ def get_public_app_info(
     """
 
     return public_app_info
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+def read_profile(
+    profile_id: str,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Get a request profile in collapsed stacks format.
+    """
+
+    profile = load_profile(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail="Profile not found")
+    return profile
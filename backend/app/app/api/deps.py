@@ -1,6 +1,7 @@
 from typing import Iterator, List, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from fastapi.security.utils import get_authorization_scheme_param
 from jose import jwt
 from pydantic import ValidationError
 from sqlalchemy.orm import Session
@@ -11,6 +12,8 @@ import app.schemas as schemas
 from app.core import security
 from app.core.config import settings
 from app.db.session import SessionLocal
+from app.db.access_index import AccessIndex
+from app.db.principal_cache import principal_cache
 from app.db.greenplum import GreenPlumConnectionsMaker
 from app.db.orm_types import GreenPlumConnection, GreenPlumSession
 from app.core.auth import BaseAuth, get_auth_class
@@ -50,13 +53,31 @@ def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
         )
-    user = crud.user.get(db, id=token_data.sub)
+    user = principal_cache.user(db, token_data.sub)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,
                             detail="User not found")
     return user
 
 
+def is_superuser_token(authorization: Optional[str]) -> bool:
+    # Проверка вне зависимостей FastAPI, для middleware
+    scheme, token = get_authorization_scheme_param(authorization)
+    if scheme.lower() != "bearer":
+        return False
+    try:
+        payload = jwt.decode(
+            token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
+        )
+        token_data = schemas.TokenPayload(**payload)
+    except (jwt.JWTError, ValidationError):
+        return False
+
+    with SessionLocal() as db:
+        user = principal_cache.user(db, token_data.sub)
+        return bool(user) and crud.user.is_active(user) and crud.user.is_superuser(user)
+
+
 def get_current_active_user(
     current_user: models.User = Depends(get_current_user),
 ) -> models.User:
@@ -80,7 +101,7 @@ def get_current_active_context(
     ctx: int,
     db: Session = Depends(get_db)
 ) -> models.Context:
-    context = crud.context.get(db, id=ctx)
+    context = principal_cache.context(db, ctx)
     if not context:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="Context not found")
@@ -92,15 +113,19 @@ def get_current_active_context(
 
 def get_current_active_access(
     current_user: models.User = Depends(get_current_active_user),
-    current_context: models.Context = Depends(get_current_active_context)
+    current_context: models.Context = Depends(get_current_active_context),
+    db: Session = Depends(get_db),
 ) -> List[models.Access]:
-    accesses: List[models.Access] = current_user.accesses
-    current_access = list(filter(
-        lambda x:
-        x.is_active and x.context_id == current_context.id,
-        accesses
-    ))
-    return current_access
+    # Активные доступы пользователя уже разложены по контекстам в кэше
+    return principal_cache.accesses(db, current_user.id, current_context.id)
+
+
+def get_current_access_index(
+    current_user: models.User = Depends(get_current_active_user),
+    current_context: models.Context = Depends(get_current_active_context),
+    db: Session = Depends(get_db),
+) -> AccessIndex:
+    return principal_cache.access_index(db, current_user.id, current_context.id)
 
 
 def get_greenplum(
@@ -1,4 +1,4 @@
-from .auth_base import BaseAuth
+from .auth_base import AuthUnavailable, BaseAuth
 from .auth_ldap import LdapAuth
 from .auth_database import DatabaseAuth
 from app.core.config import settings
@@ -5,9 +5,15 @@ from abc import ABC, abstractmethod
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 from app.core.config import settings
+from app.core.security import is_password_hash_current
 import app.crud as crud
 
 
+class AuthUnavailable(Exception):
+    """Сервер аутентификации недоступен или занят, вход можно повторить позже."""
+    pass
+
+
 class BaseAuth(ABC):
     @abstractmethod
     def auth(self, email: str, password: str, *, db: Session) -> Optional[User]:
@@ -21,8 +27,25 @@ class BaseAuth(ABC):
             if not user and settings.AUTH_OPEN_REGISTRATION:
                 newUser = UserCreate(**payload)
                 user = crud.user.create(db, obj_in=newUser)
-            if user and settings.AUTH_REFRESH_PASSWORD:
+            elif user and settings.AUTH_REFRESH_PASSWORD:
                 updatedUser = UserUpdate(**payload)
-                user = crud.user.update(db, db_obj=user, obj_in=updatedUser)
+                changes = self.__changed_fields(user, updatedUser.dict(exclude_unset=True))
+                if changes:
+                    user = crud.user.update(db, db_obj=user, obj_in=changes)
         finally:
             return user
+
+    @staticmethod
+    def __changed_fields(user: User, update_data: Dict) -> Dict:
+        # Запись в базу и новый хэш bcrypt нужны только для действительно изменившихся полей
+        changes = {}
+        for field, value in update_data.items():
+            if field == "password":
+                if value is not None and not is_password_hash_current(value, user.hashed_password):
+                    changes[field] = value
+            elif field == "email":
+                if value is not None and value.lower() != user.email:
+                    changes[field] = value
+            elif getattr(user, field) != value:
+                changes[field] = value
+        return changes
@@ -1,32 +1,42 @@
 from typing import Dict, List, Optional
 from sqlalchemy.orm import Session
 import ldap
+from ldap.ldapobject import LDAPObject
 
+from app.core.cache import TTLCache
+from app.core.config import settings
 from app.models.user import User
-from .auth_base import BaseAuth
+from .auth_base import AuthUnavailable, BaseAuth
+from .auth_ldap_pool import get_ldap_pool
+
+# Атрибуты пользователя из каталога: email -> данные для обновления пользователя
+ldap_info_cache: TTLCache[Dict] = TTLCache(settings.LDAP_CACHE_TTL, settings.LDAP_CACHE_SIZE, "ldap_info")
 
 
 class LdapAuth(BaseAuth):
     def __init__(self, url: str, base_dn: str, search_filter: str, retrieve_attrs: List[str]) -> None:
         super().__init__()
-        self.conn = ldap.initialize(url)
+        self.pool = get_ldap_pool(url)
         self.base_dn = base_dn
         self.search_filter = search_filter
         self.retrieve_attrs = retrieve_attrs
 
-    def __auth_in_ldap(self, email: str, password: str, *, db: Session) -> bool:
+    def __auth_in_ldap(self, conn: LDAPObject, email: str, password: str, *, db: Session) -> bool:
         auth = False
         try:
-            self.conn.simple_bind_s(email, password)
+            conn.simple_bind_s(email, password)
             auth = True
-        finally:
-            return auth
+        except ldap.INVALID_CREDENTIALS:
+            pass
+        return auth
 
-    def __search_attributes(self, search_filter: str, retrieve_attributes: List[str]) -> List[List]:
+    def __search_attributes(
+        self, conn: LDAPObject, search_filter: str, retrieve_attributes: List[str]
+    ) -> Optional[List[List]]:
         search_scope = ldap.SCOPE_SUBTREE
-        result_set = []
+        result_set = None
         try:
-            ldap_result = self.conn.search_s(
+            ldap_result = conn.search_s(
                 self.base_dn, search_scope, search_filter, retrieve_attributes
             )
             result_set = list(
@@ -34,33 +44,62 @@ class LdapAuth(BaseAuth):
                     *[set_of_attrs[key] for key in retrieve_attributes]
                 )) for _, set_of_attrs in ldap_result
             )
-        finally:
-            return result_set
+        except (ldap.SERVER_DOWN, ldap.CONNECT_ERROR, ldap.TIMEOUT):
+            # Соединение нужно вернуть в пул как сломанное
+            raise
+        except Exception:
+            pass
+        return result_set
+
+    def __get_info_from_ldap(self, conn: LDAPObject, email: str) -> Dict:
+        cached = ldap_info_cache.get(email)
+        if cached is not None:
+            return cached
 
-    def __get_info_from_ldap(self, email: str) -> Dict:
         search_filter = self.search_filter.format(email=email)
-        ldap_attrs = self.__search_attributes(search_filter, self.retrieve_attrs)
+        ldap_attrs = self.__search_attributes(conn, search_filter, self.retrieve_attrs)
 
-        if not len(ldap_attrs) == 1:
+        if ldap_attrs is None:
+            # Ошибку поиска не кэшируем, следующий вход попробует снова
             return {}
 
-        ldap_data = ldap_attrs[0]
-        return {
-            "full_name": " ".join([line.decode() for line in ldap_data])
-        }
+        info = {}
+        if len(ldap_attrs) == 1:
+            info = {
+                "full_name": " ".join([line.decode() for line in ldap_attrs[0]])
+            }
+
+        ldap_info_cache.put(email, info)
+        return info
+
+    def __auth_with_info(self, email: str, password: str, *, db: Session) -> Optional[Dict]:
+        with self.pool.connection() as conn:
+            if not self.__auth_in_ldap(conn, email, password, db=db):
+                return None
+            return self.__get_info_from_ldap(conn, email)
 
     def auth(self, email: str, password: str, *, db: Session) -> Optional[User]:
-        is_auth = self.__auth_in_ldap(email, password, db=db)
+        ldap_info = None
+        # Соединение из пула могло оборваться без проверки: повторяем один раз на новом
+        for attempt in range(2):
+            try:
+                ldap_info = self.__auth_with_info(email, password, db=db)
+                break
+            except (ldap.SERVER_DOWN, ldap.CONNECT_ERROR) as error:
+                if attempt:
+                    raise AuthUnavailable("LDAP server is unavailable") from error
+            except ldap.TIMEOUT as error:
+                raise AuthUnavailable("LDAP server did not respond in time") from error
+            except ldap.LDAPError:
+                return None
 
-        if not is_auth:
+        if ldap_info is None:
             return None
 
         payload = {
             "email": email,
             "password": password,
         }
-
-        ldap_info = self.__get_info_from_ldap(email)
         payload.update(ldap_info)
 
         return self.update_db(payload, db=db)
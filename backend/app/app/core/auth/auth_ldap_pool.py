@@ -0,0 +1,109 @@
+from contextlib import contextmanager
+from threading import BoundedSemaphore, Lock
+from time import monotonic
+from typing import Dict, Iterator, List, Tuple
+import ldap
+from ldap.ldapobject import LDAPObject
+
+from app.core.config import settings
+from .auth_base import AuthUnavailable
+
+
+class LdapConnectionPool():
+    """Пул соединений с LDAP сервером: соединение выдается одному потоку и после проверки переиспользуется."""
+    url: str
+    _idle: List[Tuple[LDAPObject, float]]
+    _slots: BoundedSemaphore
+    _lock: Lock
+
+    def __init__(self, url: str, size: int) -> None:
+        self.url = url
+        # Соединение и время его последнего использования
+        self._idle = []
+        self._slots = BoundedSemaphore(max(size, 1))
+        self._lock = Lock()
+
+    def _connect(self) -> LDAPObject:
+        conn = ldap.initialize(self.url)
+        conn.set_option(ldap.OPT_NETWORK_TIMEOUT, settings.LDAP_POOL_TIMEOUT)
+        conn.set_option(ldap.OPT_TIMEOUT, settings.LDAP_POOL_TIMEOUT)
+        conn.set_option(ldap.OPT_REFERRALS, 0)
+        return conn
+
+    @staticmethod
+    def _close(conn: LDAPObject) -> None:
+        try:
+            conn.unbind_s()
+        except ldap.LDAPError:
+            pass
+
+    @staticmethod
+    def _is_alive(conn: LDAPObject) -> bool:
+        try:
+            conn.whoami_s()
+            return True
+        except ldap.LDAPError:
+            return False
+
+    def _acquire(self) -> LDAPObject:
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                conn, used_at = self._idle.pop()
+
+            # Долго простаивавшее соединение могли закрыть сервер или балансировщик
+            if monotonic() - used_at < settings.LDAP_POOL_CHECK_INTERVAL or self._is_alive(conn):
+                return conn
+            self._close(conn)
+
+        return self._connect()
+
+    @contextmanager
+    def connection(self) -> Iterator[LDAPObject]:
+        if not self._slots.acquire(timeout=settings.LDAP_POOL_TIMEOUT):
+            raise AuthUnavailable("LDAP connection pool is exhausted")
+
+        try:
+            conn = self._acquire()
+        except BaseException:
+            self._slots.release()
+            raise
+
+        healthy = False
+        try:
+            yield conn
+            healthy = True
+        except (ldap.SERVER_DOWN, ldap.CONNECT_ERROR, ldap.TIMEOUT):
+            raise
+        except ldap.LDAPError:
+            # Ошибки уровня протокола (например, неверный пароль) соединение не портят
+            healthy = True
+            raise
+        finally:
+            if healthy:
+                with self._lock:
+                    self._idle.append((conn, monotonic()))
+            else:
+                self._close(conn)
+            self._slots.release()
+
+    def clear(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+
+        for conn, _ in idle:
+            self._close(conn)
+
+
+_pools: Dict[str, LdapConnectionPool] = {}
+_pools_lock = Lock()
+
+
+def get_ldap_pool(url: str) -> LdapConnectionPool:
+    with _pools_lock:
+        pool = _pools.get(url)
+        if pool is None:
+            pool = LdapConnectionPool(url, settings.LDAP_POOL_SIZE)
+            _pools[url] = pool
+        return pool
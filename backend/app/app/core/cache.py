@@ -0,0 +1,62 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from typing import Generic, Hashable, Optional, Tuple, TypeVar
+
+from app.core.metrics import count_cache_lookup
+
+T = TypeVar("T")
+
+
+class TTLCache(Generic[T]):
+    """Потокобезопасный LRU кэш, записи которого устаревают через ttl секунд."""
+    ttl: float
+    maxsize: int
+    name: str
+    _items: "OrderedDict[Hashable, Tuple[float, T]]"
+    _lock: Lock
+
+    def __init__(self, ttl: float, maxsize: int, name: str = "ttl") -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.name = name
+        self._items = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable) -> Optional[T]:
+        value = self._get(key)
+        count_cache_lookup(self.name, value is not None)
+        return value
+
+    def _get(self, key: Hashable) -> Optional[T]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+
+            expires, value = item
+            if expires <= monotonic():
+                del self._items[key]
+                return None
+
+            self._items.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: T) -> None:
+        # ttl=0 отключает кэш
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._items[key] = (monotonic() + self.ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
@@ -1,3 +1,4 @@
+import os
 import secrets
 from urllib.parse import unquote
 from typing import Any, Dict, List, Optional, Union
@@ -60,10 +61,55 @@ class Settings(BaseSettings):
     FIRST_SUPERUSER: EmailStr
     FIRST_SUPERUSER_PASSWORD: str
 
-    INSTALL_DBLINK: bool = True
     GRANT_WITH_ADMIN_OPTION: bool = False
     DEEP_REVOKE: bool = True
 
+    GREENPLUM_POOL_SIZE: int = 5
+    GREENPLUM_POOL_MAX_OVERFLOW: int = 5
+    GREENPLUM_POOL_TIMEOUT: int = 30
+    GREENPLUM_POOL_RECYCLE: int = 1800
+    GREENPLUM_ENGINES_LIMIT: int = 32
+    GRANT_PARALLELISM: int = 4
+    DATABASE_PARALLELISM: int = 4
+    RESOURCE_GROUP_BATCH_SIZE: int = 500
+    RESOURCE_GROUP_SAMPLE_INTERVAL: int = 10  # seconds
+    RESOURCE_GROUP_HISTORY_SIZE: int = 360
+    RESOURCE_GROUP_SAMPLER_DIR: str = os.path.expanduser("~/.cache/gppm/resource-groups")
+
+    CATALOG_CACHE_ENABLED: bool = True
+    CATALOG_CACHE_MEMORY_LIMIT: int = 256  # MB
+    CATALOG_CACHE_TTL: int = 10  # seconds
+    ACL_PARSER_CACHE_SIZE: int = 65536
+    ACL_READ_MODE: str = "text"  # explode
+
+    @validator("ACL_READ_MODE", pre=True)
+    def validate_acl_read_mode(cls, v: str) -> str:
+        mode = v.lower()
+        if mode in ('text', 'explode'):
+            return mode
+        raise ValueError(v)
+
+    JOB_WORKERS: int = 2
+    JOB_HEARTBEAT_INTERVAL: int = 30  # seconds
+    JOB_HEARTBEAT_TIMEOUT: int = 120  # seconds
+    JOB_SHUTDOWN_TIMEOUT: int = 60  # seconds
+
+    METRICS_ENABLED: bool = True
+    SLOW_QUERY_THRESHOLD_MS: int = 1000
+    QUERY_TRACE_ENABLED: bool = False
+    QUERY_TRACE_LIMIT: int = 100
+
+    PROFILER_ENABLED: bool = False
+    PROFILER_INTERVAL_MS: int = 10
+    PROFILER_MAX_DURATION: int = 60  # seconds
+    PROFILER_MAX_ACTIVE: int = 2
+    PROFILER_MAX_DEPTH: int = 200
+    PROFILER_DIR: str = "/tmp/gppm-profiles"
+    PROFILER_KEEP: int = 50
+
+    PRINCIPAL_CACHE_TTL: int = 30  # seconds
+    PRINCIPAL_CACHE_SIZE: int = 10000
+
     AUTH_PROVIDER: str = "local"  # ldap
 
     @validator("AUTH_PROVIDER", pre=True)
@@ -75,11 +121,18 @@ class Settings(BaseSettings):
 
     AUTH_OPEN_REGISTRATION: bool = False
     AUTH_REFRESH_PASSWORD: bool = False
+    PASSWORD_VERIFY_CACHE_TTL: int = 600  # seconds
+    PASSWORD_VERIFY_CACHE_SIZE: int = 10000
 
     LDAP_HOST: Optional[str] = None
     LDAP_USER_SEARCH_BASE: Optional[str] = None
     LDAP_USER_SEARCH_FILTER: Optional[str] = None
     LDAP_USER_ATTRS: Union[str, List[str], None] = None
+    LDAP_POOL_SIZE: int = 10
+    LDAP_POOL_TIMEOUT: int = 5  # seconds
+    LDAP_POOL_CHECK_INTERVAL: int = 30  # seconds
+    LDAP_CACHE_TTL: int = 300  # seconds
+    LDAP_CACHE_SIZE: int = 10000
 
     @validator("LDAP_HOST", "LDAP_USER_SEARCH_BASE", "LDAP_USER_SEARCH_FILTER", pre=True)
     def ldap_params_may_missing(
@@ -0,0 +1,198 @@
+import asyncio
+import os
+import sys
+from time import perf_counter
+from typing import Any, Dict, Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    REGISTRY,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+# При нескольких воркерах gunicorn метрики пишутся в файлы каталога PROMETHEUS_MULTIPROC_DIR
+_multiprocess = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+_latency_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+http_request_duration = Histogram(
+    "gppm_http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"],
+    buckets=_latency_buckets,
+)
+
+http_requests_in_progress = Gauge(
+    "gppm_http_requests_in_progress",
+    "HTTP requests being processed",
+    multiprocess_mode="livesum",
+)
+
+threadpool_workers = Gauge(
+    "gppm_threadpool_workers",
+    "Threads started by the default executor that runs sync endpoints",
+    multiprocess_mode="livesum",
+)
+
+threadpool_queue = Gauge(
+    "gppm_threadpool_queue",
+    "Calls waiting for a free thread of the default executor",
+    multiprocess_mode="livesum",
+)
+
+greenplum_query_duration = Histogram(
+    "gppm_greenplum_query_duration_seconds",
+    "Greenplum query latency by use case function and context",
+    ["use_case", "context"],
+    buckets=_latency_buckets,
+)
+
+metadata_query_duration = Histogram(
+    "gppm_metadata_query_duration_seconds",
+    "Metadata database query latency",
+    buckets=_latency_buckets,
+)
+
+db_connections = Counter(
+    "gppm_db_connections",
+    "New DBAPI connections",
+    ["pool", "context"],
+)
+
+db_connections_checked_out = Gauge(
+    "gppm_db_connections_checked_out",
+    "Connections currently taken from the pool",
+    ["pool", "context"],
+    multiprocess_mode="livesum",
+)
+
+cache_requests = Counter(
+    "gppm_cache_requests",
+    "Cache lookups by result",
+    ["cache", "result"],
+)
+
+
+def _use_case_of_caller() -> str:
+    # Самая внешняя функция use case в стеке вызова: публичная операция, а не ее помощник
+    found = "other"
+    frame: Optional[Any] = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("app.use_case."):
+            found = f"{module[len('app.use_case.'):]}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return found
+
+
+def _push_timer(conn: Any, labels: Optional[Tuple[str, ...]]) -> None:
+    conn.info.setdefault("metrics_timers", []).append((perf_counter(), labels))
+
+
+def _pop_timer(conn: Any) -> Optional[Tuple[float, Optional[Tuple[str, ...]]]]:
+    timers = conn.info.get("metrics_timers")
+    return timers.pop() if timers else None
+
+
+def instrument_greenplum_engine(engine: Engine, context: Any) -> None:
+    if not settings.METRICS_ENABLED:
+        return
+
+    context = str(context)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, execution_context, executemany) -> None:
+        _push_timer(conn, (_use_case_of_caller(), context))
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, execution_context, executemany) -> None:
+        timer = _pop_timer(conn)
+        if timer is not None:
+            started, labels = timer
+            greenplum_query_duration.labels(*labels).observe(perf_counter() - started)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context) -> None:
+        if exception_context.connection is not None:
+            _pop_timer(exception_context.connection)
+
+    _instrument_pool(engine, "greenplum", context)
+
+
+def instrument_metadata_engine(engine: Engine) -> None:
+    if not settings.METRICS_ENABLED:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, execution_context, executemany) -> None:
+        _push_timer(conn, None)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, execution_context, executemany) -> None:
+        timer = _pop_timer(conn)
+        if timer is not None:
+            metadata_query_duration.observe(perf_counter() - timer[0])
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context) -> None:
+        if exception_context.connection is not None:
+            _pop_timer(exception_context.connection)
+
+    _instrument_pool(engine, "metadata", "")
+
+
+def _instrument_pool(engine: Engine, pool: str, context: str) -> None:
+    connections = db_connections.labels(pool, context)
+    checked_out = db_connections_checked_out.labels(pool, context)
+
+    @event.listens_for(engine, "connect")
+    def connect(dbapi_connection, connection_record) -> None:
+        connections.inc()
+
+    @event.listens_for(engine, "checkout")
+    def checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+        checked_out.inc()
+
+    @event.listens_for(engine, "checkin")
+    def checkin(dbapi_connection, connection_record) -> None:
+        checked_out.dec()
+
+
+def count_cache_lookup(cache: str, hit: bool) -> None:
+    if settings.METRICS_ENABLED:
+        cache_requests.labels(cache, "hit" if hit else "miss").inc()
+
+
+def sample_threadpool() -> None:
+    # Sync эндпоинты выполняются в executor цикла событий по умолчанию
+    try:
+        executor = getattr(asyncio.get_event_loop(), "_default_executor", None)
+    except RuntimeError:
+        return
+
+    if executor is None:
+        return
+
+    threadpool_workers.set(len(getattr(executor, "_threads", ())))
+    work_queue = getattr(executor, "_work_queue", None)
+    if work_queue is not None:
+        threadpool_queue.set(work_queue.qsize())
+
+
+def render_metrics() -> Tuple[bytes, Dict[str, str]]:
+    if _multiprocess:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return generate_latest(registry), {"Content-Type": CONTENT_TYPE_LATEST}
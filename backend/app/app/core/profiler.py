@@ -0,0 +1,224 @@
+import logging
+import os
+import re
+import sys
+from asyncio import AbstractEventLoop
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import ContextVar
+from threading import Event, Lock, Thread, get_ident
+from time import monotonic, perf_counter
+from typing import Any, Callable, Dict, List, Optional
+from uuid import uuid4
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_PROFILE_SUFFIX = ".folded"
+_profile_id = re.compile(r"^[0-9a-f]{32}$")
+
+
+class RequestProfile():
+    """Стеки одного HTTP запроса в формате collapsed stacks (flamegraph.pl, speedscope)."""
+    id: str
+    route: str
+    started: float
+    samples: int
+    overhead: float
+    truncated: bool
+    stacks: Counter
+
+    def __init__(self, route: str) -> None:
+        self.id = uuid4().hex
+        self.route = route.replace(";", ":")
+        self.started = monotonic()
+        self.samples = 0
+        self.overhead = 0
+        self.truncated = False
+        self.stacks = Counter()
+
+    def collapsed(self) -> str:
+        return "".join(
+            f"{self.route};{stack} {count}\n" for stack, count in self.stacks.most_common()
+        )
+
+
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({frame.f_globals.get('__name__', '?')})".replace(";", ":")
+
+
+def _collapse(frame) -> Optional[str]:
+    names: List[str] = []
+    while frame is not None and frame.f_code is not _run_profiled.__code__:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+
+    # Поток еще не вызвал эндпоинт или уже вернул результат
+    if not names:
+        return None
+    if len(names) > settings.PROFILER_MAX_DEPTH:
+        names = names[-settings.PROFILER_MAX_DEPTH:]
+    return ";".join(reversed(names))
+
+
+class StackSampler():
+    """Фоновый поток, который снимает стеки потоков executor, пока профилируется хотя бы один запрос."""
+    _active: Dict[str, RequestProfile]
+    _threads: Dict[int, RequestProfile]
+    _thread: Optional[Thread]
+    _stop: Event
+    _lock: Lock
+
+    def __init__(self) -> None:
+        self._active = {}
+        self._threads = {}
+        self._thread = None
+        self._stop = Event()
+        self._lock = Lock()
+
+    def start(self, route: str) -> Optional[RequestProfile]:
+        with self._lock:
+            if len(self._active) >= settings.PROFILER_MAX_ACTIVE:
+                return None
+
+            profile = RequestProfile(route)
+            self._active[profile.id] = profile
+
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = Thread(target=self._run, name="gppm-profiler", daemon=True)
+                self._thread.start()
+
+        return profile
+
+    def stop(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._active.pop(profile.id, None)
+        save_profile(profile)
+
+    def register(self, ident: int, profile: RequestProfile) -> None:
+        self._threads[ident] = profile
+
+    def unregister(self, ident: int) -> None:
+        self._threads.pop(ident, None)
+
+    def _sample(self, profiles: Dict[str, RequestProfile]) -> None:
+        started = perf_counter()
+        sampled = set()
+
+        frames = sys._current_frames()
+        for ident, profile in list(self._threads.items()):
+            frame = frames.get(ident)
+            if frame is None or profile.id not in profiles:
+                continue
+            stack = _collapse(frame)
+            if stack is None:
+                continue
+            profile.stacks[stack] += 1
+            sampled.add(profile.id)
+
+        elapsed = perf_counter() - started
+        for profile in profiles.values():
+            profile.overhead += elapsed
+            if profile.id in sampled:
+                profile.samples += 1
+
+    def _run(self) -> None:
+        interval = max(settings.PROFILER_INTERVAL_MS, 1) / 1000
+        while not self._stop.wait(interval):
+            with self._lock:
+                now = monotonic()
+                for profile in list(self._active.values()):
+                    if now - profile.started > settings.PROFILER_MAX_DURATION:
+                        # Долгий запрос дальше не профилируется, собранное сохранится в stop
+                        profile.truncated = True
+                        del self._active[profile.id]
+
+                if not self._active:
+                    self._thread = None
+                    return
+
+                # Под блокировкой: после stop профиль больше не меняется и его можно сохранять
+                try:
+                    self._sample(self._active)
+                except Exception:
+                    logger.exception("Stack sampling failed")
+
+    def shutdown(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        self._stop.set()
+        if thread is not None:
+            thread.join(timeout=5)
+
+
+def save_profile(profile: RequestProfile) -> None:
+    # Профили пишутся в файлы: с несколькими воркерами gunicorn запрос за профилем
+    # может попасть не в тот воркер, который его снял
+    try:
+        os.makedirs(settings.PROFILER_DIR, exist_ok=True)
+        path = os.path.join(settings.PROFILER_DIR, profile.id + _PROFILE_SUFFIX)
+        with open(path, "w") as file:
+            file.write(profile.collapsed())
+        _remove_old_profiles()
+    except OSError:
+        logger.exception("Failed to save profile %s", profile.id)
+
+
+def _remove_old_profiles() -> None:
+    entries = [
+        entry for entry in os.scandir(settings.PROFILER_DIR)
+        if entry.is_file() and entry.name.endswith(_PROFILE_SUFFIX)
+    ]
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in entries[settings.PROFILER_KEEP:]:
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+
+
+def load_profile(profile_id: str) -> Optional[str]:
+    if not _profile_id.match(profile_id):
+        return None
+    try:
+        with open(os.path.join(settings.PROFILER_DIR, profile_id + _PROFILE_SUFFIX)) as file:
+            return file.read()
+    except FileNotFoundError:
+        return None
+
+
+stack_sampler = StackSampler()
+
+
+def _run_profiled(profile: RequestProfile, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+    # Сэмплер снимает только зарегистрированные потоки, стек обрезается по этому кадру
+    ident = get_ident()
+    stack_sampler.register(ident, profile)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        stack_sampler.unregister(ident)
+
+
+class ProfilingExecutor(ThreadPoolExecutor):
+    """
+    Executor цикла событий по умолчанию: в нем starlette выполняет sync эндпоинты
+    и зависимости. submit вызывается в задаче запроса, поэтому профиль запроса
+    берется из контекста, а поток, который выполнит функцию, регистрируется в сэмплере.
+    """
+
+    def submit(self, fn: Callable, *args: Any, **kwargs: Any) -> Future:
+        profile = current_profile.get()
+        if profile is None:
+            return super().submit(fn, *args, **kwargs)
+        return super().submit(_run_profiled, profile, fn, *args, **kwargs)
+
+
+def install_executor(loop: AbstractEventLoop) -> None:
+    loop.set_default_executor(ProfilingExecutor(thread_name_prefix="asyncio"))
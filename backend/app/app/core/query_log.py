@@ -0,0 +1,115 @@
+import json
+import logging
+import re
+from contextvars import ContextVar
+from threading import Lock
+from time import perf_counter
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.slow_query")
+
+# Пароли попадают в запросы параметрами (CREATE/ALTER ROLE) или литералом после PASSWORD
+_secret_param = re.compile(r"pass", re.IGNORECASE)
+_secret_literal = re.compile(r"(PASSWORD\s+)'(?!')(?:[^']|'')*'", re.IGNORECASE)
+_whitespace = re.compile(r"\s+")
+
+_TRACE_STATEMENT_LENGTH = 200
+
+
+class QueryTrace():
+    """Запросы, выполненные во время одного HTTP запроса."""
+    route: str
+    statements: List[Dict[str, Any]]
+    _lock: Lock
+
+    def __init__(self, route: str) -> None:
+        self.route = route
+        self.statements = []
+        # Запрос может выполнять SQL из нескольких потоков
+        self._lock = Lock()
+
+    def add(self, source: str, database: str, statement: str, duration: float) -> None:
+        with self._lock:
+            if len(self.statements) >= settings.QUERY_TRACE_LIMIT:
+                return
+            self.statements.append({
+                "source": source,
+                "database": database,
+                "ms": round(duration * 1000, 3),
+                "sql": _compact(statement)[:_TRACE_STATEMENT_LENGTH],
+            })
+
+    def header(self) -> str:
+        with self._lock:
+            return json.dumps(self.statements, ensure_ascii=True)
+
+
+current_trace: ContextVar[Optional[QueryTrace]] = ContextVar("current_trace", default=None)
+current_route: ContextVar[Optional[str]] = ContextVar("current_route", default=None)
+
+
+def _compact(statement: str) -> str:
+    return _secret_literal.sub(r"\1'***'", _whitespace.sub(" ", statement).strip())
+
+
+def _redact(parameters: Any) -> Any:
+    if isinstance(parameters, dict):
+        return {
+            key: "***" if _secret_param.search(str(key)) else value
+            for key, value in parameters.items()
+        }
+    if isinstance(parameters, (list, tuple)):
+        return [_redact(item) for item in parameters]
+    return parameters
+
+
+def _finish(source: str, database: str, statement: str, parameters: Any, duration: float) -> None:
+    trace = current_trace.get()
+    if trace is not None:
+        trace.add(source, database, statement, duration)
+
+    threshold = settings.SLOW_QUERY_THRESHOLD_MS
+    if threshold > 0 and duration * 1000 >= threshold:
+        logger.warning(
+            "Slow query %.1f ms context=%s database=%s route=%s statement=%s parameters=%s",
+            duration * 1000,
+            source,
+            database,
+            current_route.get() or "-",
+            _compact(statement),
+            _redact(parameters),
+        )
+
+
+def instrument_engine(engine: Engine, source: str, database: str) -> None:
+    if settings.SLOW_QUERY_THRESHOLD_MS <= 0 and not settings.QUERY_TRACE_ENABLED:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, execution_context, executemany) -> None:
+        conn.info.setdefault("query_log_timers", []).append(perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, execution_context, executemany) -> None:
+        timers = conn.info.get("query_log_timers")
+        if timers:
+            _finish(source, database, statement, parameters, perf_counter() - timers.pop())
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context) -> None:
+        conn = exception_context.connection
+        timers = conn.info.get("query_log_timers") if conn is not None else None
+        if timers:
+            # Упавший запрос тоже может быть медленным, например из-за statement_timeout
+            _finish(
+                source,
+                database,
+                exception_context.statement or "",
+                exception_context.parameters,
+                perf_counter() - timers.pop(),
+            )
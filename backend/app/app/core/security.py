@@ -1,14 +1,23 @@
+import hmac
 from datetime import datetime, timedelta
+from hashlib import sha256
 from typing import Any, Optional, Union
 
 from jose import jwt
 from passlib.context import CryptContext
 from cryptography.fernet import Fernet
 
+from app.core.cache import TTLCache
 from app.core.config import settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Хэш пароля -> HMAC пароля, который ему недавно соответствовал. Позволяет при входе
+# не проверять bcrypt повторно только для того, чтобы решить, нужно ли обновить хэш
+_verified_passwords: TTLCache[str] = TTLCache(
+    settings.PASSWORD_VERIFY_CACHE_TTL, settings.PASSWORD_VERIFY_CACHE_SIZE, "verified_password"
+)
+
 
 ALGORITHM = "HS256"
 
@@ -35,6 +44,30 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def _password_digest(plain_password: str) -> str:
+    return hmac.new(settings.SECRET_KEY.encode(), plain_password.encode(), sha256).hexdigest()
+
+
+def remember_verified_password(plain_password: str, hashed_password: str) -> None:
+    _verified_passwords.put(hashed_password, _password_digest(plain_password))
+
+
+def is_password_hash_current(plain_password: str, hashed_password: str) -> bool:
+    # Хэш не требует обновления, если пароль ему соответствует и схема хэширования актуальна
+    if pwd_context.needs_update(hashed_password):
+        return False
+
+    digest = _verified_passwords.get(hashed_password)
+    if digest is not None and hmac.compare_digest(digest, _password_digest(plain_password)):
+        return True
+
+    if not verify_password(plain_password, hashed_password):
+        return False
+
+    remember_verified_password(plain_password, hashed_password)
+    return True
+
+
 def encrypt_message(message: str) -> str:
     f = Fernet(settings.ENCODING_KEY)
     encrypted_message = f.encrypt(message.encode())
@@ -2,3 +2,4 @@
 from .crud_user import user
 from .crud_context import context
 from .crud_access import access
+from .crud_job import job
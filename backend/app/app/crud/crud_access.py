@@ -3,6 +3,7 @@ from typing import Any, Dict, Union
 from sqlalchemy.orm import Session
 
 from app.crud.crud_base import CRUDBase
+from app.db.principal_cache import principal_cache
 from app.models.access import Access
 from app.schemas.access import AccessCreate, AccessUpdate
 
@@ -17,7 +18,9 @@ class CRUDAccess(CRUDBase[Access, AccessCreate, AccessUpdate]):
             db_schema=obj_in.db_schema,
             is_active=obj_in.is_active,
         )
-        return super().create(db, obj_in=db_obj)
+        access = super().create(db, obj_in=db_obj)
+        principal_cache.invalidate_user(access.user_id)
+        return access
 
     def update(
         self, db: Session, *, db_obj: Access, obj_in: Union[AccessUpdate, Dict[str, Any]]
@@ -26,12 +29,19 @@ class CRUDAccess(CRUDBase[Access, AccessCreate, AccessUpdate]):
             update_data = obj_in
         else:
             update_data = obj_in.dict(exclude_unset=True)
-        return super().update(db, db_obj=db_obj, obj_in=update_data)
+        # Доступ мог перейти к другому пользователю: сбрасываем обоих
+        previous_user_id = db_obj.user_id
+        access = super().update(db, db_obj=db_obj, obj_in=update_data)
+        principal_cache.invalidate_user(previous_user_id)
+        principal_cache.invalidate_user(access.user_id)
+        return access
 
     def remove(
         self, db: Session, *, db_obj: Access
     ) -> Access:
-        return super().remove(db, id=db_obj.id)
+        access = super().remove(db, id=db_obj.id)
+        principal_cache.invalidate_user(access.user_id)
+        return access
 
     def is_active(self, access: Access) -> bool:
         return access.is_active
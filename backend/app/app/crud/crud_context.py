@@ -8,6 +8,9 @@ from sqlalchemy import create_engine
 
 from app.core.security import encrypt_message, decrypt_message
 from app.crud.crud_base import CRUDBase
+from app.db.catalog_cache import catalog_cache
+from app.db.greenplum import greenplum_engines
+from app.db.principal_cache import principal_cache
 from app.models.context import Context
 from app.schemas.context import ContextCreate, ContextUpdate, ContextMini
 
@@ -39,12 +42,20 @@ class CRUDUContext(CRUDBase[Context, ContextCreate, ContextUpdate]):
             encoded_password = encrypt_message(update_data["password"])
             del update_data["password"]
             update_data["encoded_password"] = encoded_password
-        return super().update(db, db_obj=db_obj, obj_in=update_data)
+        context = super().update(db, db_obj=db_obj, obj_in=update_data)
+        greenplum_engines.invalidate(context.id)
+        catalog_cache.invalidate(context.id)
+        principal_cache.invalidate_context(context.id)
+        return context
 
     def remove(
         self, db: Session, *, db_obj: Context
     ) -> Context:
-        return super().remove(db, id=db_obj.id)
+        context = super().remove(db, id=db_obj.id)
+        greenplum_engines.invalidate(context.id)
+        catalog_cache.invalidate(context.id)
+        principal_cache.invalidate_context(context.id)
+        return context
 
     def is_active(self, context: Context) -> bool:
         return context.is_active
@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from app.crud.crud_base import CRUDBase
+from app.models.job import Job
+from app.schemas.job import JobCreate, JobUpdate
+
+
+class CRUDJob(CRUDBase[Job, JobCreate, JobUpdate]):
+    def create(self, db: Session, *, obj_in: JobCreate, worker: Optional[str] = None) -> Job:
+        db_obj = Job(
+            kind=obj_in.kind,
+            status="pending",
+            database=obj_in.database,
+            payload=obj_in.payload,
+            progress_done=0,
+            progress_total=0,
+            user_id=obj_in.user_id,
+            context_id=obj_in.context_id,
+            worker=worker,
+            heartbeat_at=datetime.now(timezone.utc),
+        )
+        db.add(db_obj)
+        db.commit()
+        db.refresh(db_obj)
+        return db_obj
+
+    def get_multi_by_user(
+        self, db: Session, *, user_id: Optional[int], skip: int = 0, limit: int = 100
+    ) -> List[Job]:
+        query = db.query(Job)
+        if user_id is not None:
+            query = query.filter(Job.user_id == user_id)
+        return query.order_by(Job.id.desc()).offset(skip).limit(limit).all()
+
+    def _set(self, db: Session, *, db_obj: Job, values: Dict[str, Any]) -> Job:
+        # CRUDBase.update берет поля из загруженного объекта, а после rollback
+        # объект задачи выгружен из сессии, поэтому значения присваиваются напрямую
+        for field, value in values.items():
+            setattr(db_obj, field, value)
+        db.add(db_obj)
+        db.commit()
+        db.refresh(db_obj)
+        return db_obj
+
+    def start(self, db: Session, *, db_obj: Job) -> Job:
+        return self._set(db, db_obj=db_obj, values={
+            "status": "running",
+            "started_at": datetime.now(timezone.utc),
+        })
+
+    def progress(self, db: Session, *, db_obj: Job, done: int, total: int) -> Job:
+        return self._set(db, db_obj=db_obj, values={
+            "progress_done": done,
+            "progress_total": total,
+        })
+
+    def finish(self, db: Session, *, db_obj: Job, status: str, result: str) -> Job:
+        return self._set(db, db_obj=db_obj, values={
+            "status": status,
+            "result": result,
+            "finished_at": datetime.now(timezone.utc),
+        })
+
+    def heartbeat(self, db: Session, *, ids: List[int]) -> None:
+        if not ids:
+            return
+        db.query(Job).filter(
+            Job.id.in_(ids), Job.status.in_(("pending", "running"))
+        ).update({"heartbeat_at": datetime.now(timezone.utc)}, synchronize_session=False)
+        db.commit()
+
+    def fail_abandoned(self, db: Session, *, timeout: float) -> int:
+        # Воркер, который выполнял задачу, завершился аварийно и больше не обновляет heartbeat
+        deadline = datetime.now(timezone.utc) - timedelta(seconds=timeout)
+        count = db.query(Job).filter(
+            Job.status.in_(("pending", "running")),
+            or_(Job.heartbeat_at.is_(None), Job.heartbeat_at < deadline),
+        ).update({
+            "status": "failed",
+            "result": "The worker running the job has stopped",
+            "finished_at": datetime.now(timezone.utc),
+        }, synchronize_session=False)
+        db.commit()
+        return count
+
+
+job = CRUDJob(Job)
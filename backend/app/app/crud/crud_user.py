@@ -2,8 +2,9 @@ from typing import Any, Dict, Optional, Union
 
 from sqlalchemy.orm import Session
 
-from app.core.security import get_password_hash, verify_password
+from app.core.security import get_password_hash, remember_verified_password, verify_password
 from app.crud.crud_base import CRUDBase
+from app.db.principal_cache import principal_cache
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 
@@ -35,12 +36,16 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             update_data["hashed_password"] = hashed_password
         if "email" in update_data:
             update_data["email"] = update_data["email"].lower()
-        return super().update(db, db_obj=db_obj, obj_in=update_data)
+        user = super().update(db, db_obj=db_obj, obj_in=update_data)
+        principal_cache.invalidate_user(user.id)
+        return user
 
     def remove(
         self, db: Session, *, db_obj: User
     ) -> User:
-        return super().remove(db, id=db_obj.id)
+        user = super().remove(db, id=db_obj.id)
+        principal_cache.invalidate_user(user.id)
+        return user
 
     def authenticate(self, db: Session, *, email: str, password: str) -> Optional[User]:
         user = self.get_by_email(db, email=email)
@@ -48,6 +53,7 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             return None
         if not verify_password(password, user.hashed_password):
             return None
+        remember_verified_password(password, user.hashed_password)
         return user
 
     def is_active(self, user: User) -> bool:
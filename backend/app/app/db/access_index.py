@@ -0,0 +1,88 @@
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple, TypeVar
+
+from app.models.access import Access
+
+T = TypeVar("T")
+
+# Маркер правила на всю базу: разрешены все ее схемы
+_ALL_SCHEMAS = None
+
+
+class AccessIndex():
+    """Скомпилированные правила доступа пользователя в одном контексте: база -> схемы и набор ролей."""
+    unrestricted: bool
+    _databases: Dict[str, Optional[FrozenSet[str]]]
+    _roles: FrozenSet[str]
+
+    def __init__(self, accesses: Iterable[Access], unrestricted: bool = False) -> None:
+        self.unrestricted = unrestricted
+        databases: Dict[str, Optional[Set[str]]] = {}
+        roles: Set[str] = set()
+
+        for access in accesses:
+            if access.role is not None:
+                roles.add(access.role)
+            if access.database is None:
+                continue
+
+            schemas = databases.get(access.database, set())
+            if access.db_schema is None or schemas is _ALL_SCHEMAS:
+                databases[access.database] = _ALL_SCHEMAS
+            else:
+                schemas.add(access.db_schema)
+                databases[access.database] = schemas
+
+        self._databases = {
+            database: frozenset(schemas) if schemas is not _ALL_SCHEMAS else _ALL_SCHEMAS
+            for database, schemas in databases.items()
+        }
+        self._roles = frozenset(roles)
+
+    def may_edit_database(self, database: Optional[str]) -> bool:
+        if self.unrestricted:
+            return True
+        return database in self._databases and self._databases[database] is _ALL_SCHEMAS
+
+    def may_edit_schema(self, database: Optional[str], schema: Optional[str]) -> bool:
+        # Без схемы объект относится ко всей базе
+        if schema is None:
+            return self.may_edit_database(database)
+        if self.unrestricted:
+            return True
+        if database not in self._databases:
+            return False
+
+        schemas = self._databases[database]
+        return schemas is _ALL_SCHEMAS or schema in schemas
+
+    def may_edit_role(self, rolname: str) -> bool:
+        return self.unrestricted or rolname in self._roles
+
+    def databases(self) -> Optional[List[str]]:
+        # None — ограничений нет
+        if self.unrestricted:
+            return None
+        return sorted(self._databases)
+
+    def schemas_of(self, database: str) -> Optional[List[str]]:
+        # None — доступны все схемы базы
+        if self.unrestricted or database not in self._databases:
+            return None if self.unrestricted else []
+
+        schemas = self._databases[database]
+        return None if schemas is _ALL_SCHEMAS else sorted(schemas)
+
+    def roles(self) -> Optional[List[str]]:
+        if self.unrestricted:
+            return None
+        return sorted(self._roles)
+
+    def filter_schemas(self, items: List[T], key: Callable[[T], Tuple[Optional[str], Optional[str]]]) -> List[T]:
+        if self.unrestricted:
+            return list(items)
+        return [item for item in items if self.may_edit_schema(*key(item))]
+
+    def filter_roles(self, items: List[T], key: Callable[[T], str]) -> List[T]:
+        if self.unrestricted:
+            return list(items)
+        return [item for item in items if key(item) in self._roles]
@@ -4,3 +4,4 @@ from app.db.base_class import Base
 from app.models.user import User
 from app.models.access import Access
 from app.models.context import Context
+from app.models.job import Job
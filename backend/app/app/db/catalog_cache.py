@@ -0,0 +1,221 @@
+import sys
+from collections import OrderedDict
+from functools import wraps
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.core.metrics import count_cache_lookup
+from app.db.orm_types import GreenPlumSession
+
+T = TypeVar("T")
+
+# Запросы, которые не меняют каталог. Все остальное (DDL, GRANT, DO блоки) сбрасывает кэш контекста
+_read_only_statements = ("SELECT", "WITH", "SHOW", "EXPLAIN", "SET", "RESET")
+
+
+def _estimate_size(value: Any) -> int:
+    size = sys.getsizeof(value)
+
+    if isinstance(value, (list, tuple, set, frozenset)):
+        if not value:
+            return size
+        # Для больших коллекций считаем среднее по выборке
+        sample = list(value)[:64] if len(value) > 64 else value
+        sample_size = sum(_estimate_size(item) for item in sample)
+        return size + sample_size * len(value) // len(sample)
+
+    if isinstance(value, dict):
+        return size + sum(_estimate_size(k) + _estimate_size(v) for k, v in value.items())
+
+    # Объект сам считает размер вместе с содержимым (см. RoleAccessIndex)
+    if type(value).__sizeof__ is not object.__sizeof__:
+        return size
+
+    fields = getattr(value, "__attrs_attrs__", None)
+    if fields is not None:
+        return size + sum(_estimate_size(getattr(value, field.name)) for field in fields)
+
+    if hasattr(value, "__dict__"):
+        return size + _estimate_size(vars(value))
+
+    return size
+
+
+def context_key(conn: GreenPlumSession) -> Optional[Hashable]:
+    return conn.info.get('context_key')
+
+
+class _Snapshot():
+    loaded: float
+    value: Any
+    size: int
+    generation: int
+    reusable: bool
+
+    def __init__(self, loaded: float, value: Any, size: int, generation: int, reusable: bool) -> None:
+        self.loaded = loaded
+        self.value = value
+        self.size = size
+        self.generation = generation
+        # Устаревший снимок не удаляется: из него собирается новый, см. refresh
+        self.reusable = reusable
+
+
+class CatalogSnapshotCache():
+    """
+    Снимки каталога живут CATALOG_CACHE_TTL секунд. Изменения через приложение
+    сбрасывают снимки контекста сразу после COMMIT, изменения в обход приложения
+    и из других воркеров становятся видны не позже чем через CATALOG_CACHE_TTL.
+    Большие снимки (refresh) после этого не читаются заново целиком, а обновляются
+    по частям: загрузчик получает прежнее значение и перечитывает только изменившееся.
+    """
+    _snapshots: "OrderedDict[Tuple[Hashable, Hashable], _Snapshot]"
+    _generations: Dict[int, int]
+    _lock: Lock
+    _size: int
+
+    def __init__(self) -> None:
+        self._snapshots = OrderedDict()
+        self._generations = {}
+        self._lock = Lock()
+        self._size = 0
+
+    def _pop(self, key: Tuple[Hashable, Hashable]) -> None:
+        snapshot = self._snapshots.pop(key, None)
+        if snapshot is not None:
+            self._size -= snapshot.size
+
+    def _is_fresh(self, key: Tuple[Hashable, Hashable], snapshot: _Snapshot) -> bool:
+        return (
+            monotonic() - snapshot.loaded < settings.CATALOG_CACHE_TTL
+            and snapshot.generation == self._generations.get(key[0][0], 0)
+        )
+
+    def get(self, key: Tuple[Hashable, Hashable]) -> Optional[_Snapshot]:
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+            if snapshot is None:
+                return None
+            if not self._is_fresh(key, snapshot):
+                if not snapshot.reusable:
+                    self._pop(key)
+                return None
+            self._snapshots.move_to_end(key)
+            return snapshot
+
+    def previous(self, key: Tuple[Hashable, Hashable]) -> Optional[Any]:
+        # Последнее значение, даже устаревшее: основа для обновления по частям
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+            return snapshot.value if snapshot is not None else None
+
+    def generation(self, context_id: int) -> int:
+        with self._lock:
+            return self._generations.get(context_id, 0)
+
+    def put(self, key: Tuple[Hashable, Hashable], value: Any, generation: int, reusable: bool = False) -> None:
+        limit = settings.CATALOG_CACHE_MEMORY_LIMIT * 1024 * 1024
+        size = _estimate_size(value)
+
+        with self._lock:
+            self._pop(key)
+            # Пока данные читались, приложение изменило каталог: снимок мог устареть.
+            # Обновляемый по частям снимок сохраняется устаревшим, следующий запрос его проверит
+            if size > limit or (not reusable and self._generations.get(key[0][0], 0) != generation):
+                return
+
+            self._snapshots[key] = _Snapshot(monotonic(), value, size, generation, reusable)
+            self._size += size
+
+            while self._size > limit:
+                oldest = next(iter(self._snapshots))
+                self._pop(oldest)
+
+    def fetch(
+        self,
+        conn: GreenPlumSession,
+        name: Hashable,
+        loader: Callable[[], T],
+    ) -> T:
+        ctx = context_key(conn)
+        if ctx is None or not settings.CATALOG_CACHE_ENABLED or settings.CATALOG_CACHE_TTL <= 0:
+            return loader()
+
+        key = (ctx, name)
+        snapshot = self.get(key)
+        count_cache_lookup("catalog", snapshot is not None)
+        if snapshot is not None:
+            return snapshot.value
+
+        generation = self.generation(ctx[0])
+        value = loader()
+        self.put(key, value, generation)
+        return value
+
+    def refresh(
+        self,
+        conn: GreenPlumSession,
+        name: Hashable,
+        loader: Callable[[Optional[T]], T],
+    ) -> T:
+        ctx = context_key(conn)
+        if ctx is None or not settings.CATALOG_CACHE_ENABLED or settings.CATALOG_CACHE_TTL <= 0:
+            return loader(None)
+
+        key = (ctx, name)
+        snapshot = self.get(key)
+        count_cache_lookup("catalog", snapshot is not None)
+        if snapshot is not None:
+            return snapshot.value
+
+        generation = self.generation(ctx[0])
+        value = loader(self.previous(key))
+        self.put(key, value, generation, reusable=True)
+        return value
+
+    def invalidate(self, context_id: int) -> None:
+        with self._lock:
+            self._generations[context_id] = self._generations.get(context_id, 0) + 1
+            keys = [
+                key for key, snapshot in self._snapshots.items()
+                if key[0][0] == context_id and not snapshot.reusable
+            ]
+            for key in keys:
+                self._pop(key)
+
+    def instrument_engine(self, engine: Engine, context_id: int) -> None:
+        # Запрос на изменение помечает соединение, кэш сбрасывается после COMMIT,
+        # когда изменения уже видны другим соединениям
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, execution_context, executemany) -> None:
+            words = statement.lstrip().split(None, 1)
+            if not words or words[0].upper() not in _read_only_statements:
+                conn.info["catalog_changed"] = True
+
+        @event.listens_for(engine, "commit")
+        def commit(conn) -> None:
+            if conn.info.pop("catalog_changed", False):
+                self.invalidate(context_id)
+
+
+catalog_cache = CatalogSnapshotCache()
+
+
+def catalog_snapshot(func: Callable[..., T]) -> Callable[..., T]:
+    @wraps(func)
+    def wrapper(conn: GreenPlumSession, *args: Hashable) -> T:
+        value = catalog_cache.fetch(
+            conn,
+            (func.__module__, func.__qualname__, *args),
+            lambda: func(conn, *args),
+        )
+
+        # Список из кэша общий для всех запросов, отдаем копию
+        return list(value) if isinstance(value, list) else value
+
+    return wrapper
@@ -1,18 +1,65 @@
+from collections import OrderedDict
+from threading import Lock
 from urllib.parse import unquote
-from typing import Optional
+from typing import Hashable, List, Optional, Tuple, Union
 from pydantic import PostgresDsn
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import NullPool, QueuePool
+from app.core.config import settings
+from app.core.metrics import instrument_greenplum_engine
+from app.core import query_log
 from app.core.security import decrypt_message
 from app.models.context import Context
+from app.db.catalog_cache import catalog_cache
 from app.db.orm_types import GreenPlumConnection, GreenPlumEngine, GreenPlumSession
 
+EngineKey = Tuple[int, str]
 
-class GreenPlumConnectionsMaker():
-    _engine: GreenPlumEngine
 
-    def __init__(self, context: Context, database: Optional[str] = None):
+def _reset_session_state(dbapi_connection, connection_record) -> None:
+    # Use case'ы выполняют SET ROLE внутри DO блоков, а SET без LOCAL
+    # переживает транзакцию. Соединение не должно вернуться в пул с чужой ролью
+    try:
+        cursor = dbapi_connection.cursor()
+        cursor.execute("RESET ROLE")
+        cursor.close()
+        dbapi_connection.commit()
+    except Exception:
+        connection_record.invalidate()
+
+
+class _EngineEntry():
+    engine: GreenPlumEngine
+    fingerprint: Hashable
+    alias: str
+
+    def __init__(self, engine: GreenPlumEngine, fingerprint: Hashable, alias: str) -> None:
+        self.engine = engine
+        self.fingerprint = fingerprint
+        self.alias = alias
+
+    def is_idle(self) -> bool:
+        checkedout = getattr(self.engine.pool, "checkedout", None)
+        return checkedout is None or checkedout() == 0
+
+
+class GreenPlumEngineRegistry():
+    _engines: "OrderedDict[EngineKey, _EngineEntry]"
+    _lock: Lock
+
+    def __init__(self) -> None:
+        self._engines = OrderedDict()
+        self._lock = Lock()
+
+    @staticmethod
+    def _fingerprint(context: Context) -> Hashable:
+        # Контекст могли изменить в другом воркере, поэтому сверяем параметры подключения
+        return (context.server, context.port, context.role, context.encoded_password)
+
+    @staticmethod
+    def _create_engine(context: Context, database: str) -> GreenPlumEngine:
         # Кодирование пробелов не требуется
         url = unquote(
             PostgresDsn.build(
@@ -21,26 +68,174 @@ class GreenPlumConnectionsMaker():
                 password=decrypt_message(context.encoded_password),
                 host=context.server,
                 port=f'{context.port}',
-                path=f'/{database or context.database}',
+                path=f'/{database}',
             )
         )
+        return GreenPlumEngineRegistry._create_engine_for_url(url)
 
-        self._engine = create_engine(
+    @staticmethod
+    def _create_engine_for_url(url: Union[str, URL]) -> GreenPlumEngine:
+        # GREENPLUM_POOL_SIZE=0 возвращает прежнее поведение: соединение на каждый запрос
+        pooled = settings.GREENPLUM_POOL_SIZE > 0
+        pool_options = {
+            "pool_size": settings.GREENPLUM_POOL_SIZE,
+            "max_overflow": settings.GREENPLUM_POOL_MAX_OVERFLOW,
+            "pool_timeout": settings.GREENPLUM_POOL_TIMEOUT,
+            "pool_recycle": settings.GREENPLUM_POOL_RECYCLE,
+        } if pooled else {
+            "poolclass": NullPool,
+        }
+
+        engine = create_engine(
             url,
-            pool_pre_ping=False,
-            poolclass=NullPool,
+            pool_pre_ping=pooled,
             connect_args={
                 'connect_timeout': 5,
-            }
+            },
+            **pool_options,
         )
 
+        if pooled:
+            event.listen(engine, "checkin", _reset_session_state)
+
+        return engine
+
+    def _evict_idle(self) -> List[_EngineEntry]:
+        evicted = []
+        for key in list(self._engines.keys()):
+            if len(self._engines) <= settings.GREENPLUM_ENGINES_LIMIT:
+                break
+            if self._engines[key].is_idle():
+                evicted.append(self._engines.pop(key))
+        return evicted
+
+    def get(self, context: Context, database: str) -> GreenPlumEngine:
+        key = (context.id, database)
+        fingerprint = self._fingerprint(context)
+        stale: List[_EngineEntry] = []
+
+        with self._lock:
+            entry = self._engines.get(key)
+            if entry is not None and entry.fingerprint != fingerprint:
+                stale.append(self._engines.pop(key))
+                entry = None
+
+            if entry is None:
+                entry = _EngineEntry(self._create_engine(context, database), fingerprint, context.alias)
+                instrument_greenplum_engine(entry.engine, context.id)
+                catalog_cache.instrument_engine(entry.engine, context.id)
+                query_log.instrument_engine(entry.engine, context.alias, database)
+                self._engines[key] = entry
+                stale.extend(self._evict_idle())
+            else:
+                self._engines.move_to_end(key)
+
+        for old in stale:
+            old.engine.dispose()
+
+        return entry.engine
+
+    def get_for_database(self, key: EngineKey, database: str, url: URL, fingerprint: Hashable, alias: str) -> GreenPlumEngine:
+        # Пул к другой базе того же контекста. Параметры подключения берутся из сессии:
+        # исходный пул к этому моменту мог быть вытеснен или сброшен
+        sibling_key = (key[0], database)
+        stale: List[_EngineEntry] = []
+
+        with self._lock:
+            entry = self._engines.get(sibling_key)
+            if entry is not None and entry.fingerprint != fingerprint:
+                stale.append(self._engines.pop(sibling_key))
+                entry = None
+
+            if entry is None:
+                engine = self._create_engine_for_url(url.set(database=database))
+                entry = _EngineEntry(engine, fingerprint, alias)
+                instrument_greenplum_engine(entry.engine, key[0])
+                catalog_cache.instrument_engine(entry.engine, key[0])
+                query_log.instrument_engine(entry.engine, alias, database)
+                self._engines[sibling_key] = entry
+                stale.extend(self._evict_idle())
+            else:
+                self._engines.move_to_end(sibling_key)
+
+        for old in stale:
+            old.engine.dispose()
+
+        return entry.engine
+
+    def invalidate(self, context_id: int) -> None:
+        with self._lock:
+            keys = [key for key in self._engines if key[0] == context_id]
+            stale = [self._engines.pop(key) for key in keys]
+
+        for old in stale:
+            old.engine.dispose()
+
+    def dispose_all(self) -> None:
+        with self._lock:
+            stale = list(self._engines.values())
+            self._engines.clear()
+
+        for old in stale:
+            old.engine.dispose()
+
+
+greenplum_engines = GreenPlumEngineRegistry()
+
+
+class GreenPlumConnectionsMaker():
+    _engine: GreenPlumEngine
+    _key: EngineKey
+    _fingerprint: Hashable
+    _alias: str
+
+    def __init__(self, context: Context, database: Optional[str] = None):
+        self._key = (context.id, database or context.database)
+        self._fingerprint = greenplum_engines._fingerprint(context)
+        self._alias = context.alias
+        self._engine = greenplum_engines.get(context, self._key[1])
+
     def connection(self) -> GreenPlumConnection:
         return self._engine.connect()
 
     def session(self) -> GreenPlumSession:
-        gp_session = sessionmaker(autocommit=True, autoflush=False, bind=self._engine)
-        return gp_session()
+        return _make_session(self._engine, self._key, self._fingerprint, self._alias)
+
+
+def _make_session(engine: GreenPlumEngine, key: EngineKey, fingerprint: Hashable, alias: str) -> GreenPlumSession:
+    gp_session = sessionmaker(
+        autocommit=True,
+        autoflush=False,
+        bind=engine,
+        info={
+            'context_key': key,
+            # Для пулов к другим базам контекста, см. sibling_session
+            'url': engine.url,
+            'fingerprint': fingerprint,
+            'alias': alias,
+        },
+    )
+    return gp_session()
+
+
+def session_database(conn: GreenPlumSession) -> str:
+    return conn.info['context_key'][1]
+
+
+def free_connections(conn: GreenPlumSession) -> Optional[int]:
+    # Сколько еще соединений можно взять из пула сессии, None — без ограничения
+    pool = conn.get_bind().pool
+    if not isinstance(pool, QueuePool) or pool._max_overflow < 0:
+        return None
+    return max(pool.size() + pool._max_overflow - pool.checkedout(), 0)
+
+
+def sibling_session(conn: GreenPlumSession, database: Optional[str] = None) -> GreenPlumSession:
+    # Еще одна сессия к той же или другой базе контекста, например для работы в другом потоке
+    info = conn.info
+    key = info['context_key']
+    if database is None or database == key[1]:
+        return _make_session(conn.get_bind(), key, info['fingerprint'], info['alias'])
 
-    def __del__(self):
-        if hasattr(self, '_engine'):
-            self._engine.dispose()
+    engine = greenplum_engines.get_for_database(key, database, info['url'], info['fingerprint'], info['alias'])
+    return _make_session(engine, (key[0], database), info['fingerprint'], info['alias'])
@@ -0,0 +1,106 @@
+from typing import Dict, List, Optional, TypeVar
+
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.access_index import AccessIndex
+from app.db.base_class import Base
+from app.models.access import Access
+from app.models.context import Context
+from app.models.user import User
+
+ModelType = TypeVar("ModelType", bound=Base)
+
+
+class Principal():
+    """Пользователь и его активные доступы по контекстам, отсоединенные от сессии."""
+    user: User
+    accesses: Dict[int, List[Access]]
+    indexes: Dict[int, AccessIndex]
+
+    def __init__(self, user: User, accesses: List[Access]) -> None:
+        self.user = user
+        self.accesses = {}
+        for access in accesses:
+            if access.is_active:
+                self.accesses.setdefault(access.context_id, []).append(access)
+
+        # Индексы неизменяемы и строятся заранее, поэтому их безопасно читать из разных потоков
+        self.indexes = {
+            context_id: AccessIndex(accesses) for context_id, accesses in self.accesses.items()
+        }
+
+
+def _detach(db: Session, obj: ModelType) -> ModelType:
+    db.expunge(obj)
+    return obj
+
+
+def _attach(db: Session, obj: ModelType) -> ModelType:
+    # Каждый запрос получает собственную копию объекта без запроса к базе
+    return db.merge(obj, load=False)
+
+
+class PrincipalCache():
+    """Кэш пользователей и контекстов на время PRINCIPAL_CACHE_TTL, сбрасывается при изменении через crud."""
+    _principals: TTLCache[Principal]
+    _contexts: TTLCache[Context]
+
+    def __init__(self) -> None:
+        self._principals = TTLCache(settings.PRINCIPAL_CACHE_TTL, settings.PRINCIPAL_CACHE_SIZE, "principal")
+        self._contexts = TTLCache(settings.PRINCIPAL_CACHE_TTL, settings.PRINCIPAL_CACHE_SIZE, "context")
+
+    def principal(self, db: Session, user_id: int) -> Optional[Principal]:
+        principal = self._principals.get(user_id)
+        if principal is None:
+            user = db.query(User).filter(User.id == user_id).first()
+            if user is None:
+                return None
+
+            accesses = db.query(Access).filter(Access.user_id == user_id).all()
+            principal = Principal(_detach(db, user), [_detach(db, access) for access in accesses])
+            self._principals.put(user_id, principal)
+
+        return principal
+
+    def user(self, db: Session, user_id: int) -> Optional[User]:
+        principal = self.principal(db, user_id)
+        return _attach(db, principal.user) if principal is not None else None
+
+    def accesses(self, db: Session, user_id: int, context_id: int) -> List[Access]:
+        principal = self.principal(db, user_id)
+        if principal is None:
+            return []
+        return list(principal.accesses.get(context_id, []))
+
+    def access_index(self, db: Session, user_id: int, context_id: int) -> AccessIndex:
+        principal = self.principal(db, user_id)
+        if principal is None:
+            return AccessIndex([])
+        if principal.user.is_superuser:
+            return AccessIndex([], unrestricted=True)
+        return principal.indexes.get(context_id) or AccessIndex([])
+
+    def context(self, db: Session, context_id: int) -> Optional[Context]:
+        context = self._contexts.get(context_id)
+        if context is None:
+            context = db.query(Context).filter(Context.id == context_id).first()
+            if context is None:
+                return None
+            context = _detach(db, context)
+            self._contexts.put(context_id, context)
+
+        return _attach(db, context)
+
+    def invalidate_user(self, user_id: Optional[int]) -> None:
+        if user_id is not None:
+            self._principals.invalidate(user_id)
+
+    def invalidate_context(self, context_id: int) -> None:
+        self._contexts.invalidate(context_id)
+        # Удаление контекста каскадно удаляет доступы всех пользователей
+        self._principals.clear()
+
+
+principal_cache = PrincipalCache()
@@ -3,12 +3,16 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import NullPool
 
 from app.core.config import settings
+from app.core.metrics import instrument_metadata_engine
+from app.core import query_log
 
 engine = create_engine(
     settings.SQLALCHEMY_DATABASE_URI,
     pool_pre_ping=False,
     poolclass=NullPool,
 )
+instrument_metadata_engine(engine)
+query_log.instrument_engine(engine, "metadata", settings.POSTGRES_DB)
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -0,0 +1,4 @@
+# flake8: noqa
+from .jobs_handlers import *
+from .jobs_runner import *
+from .jobs_sampler import *
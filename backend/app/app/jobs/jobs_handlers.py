@@ -0,0 +1,28 @@
+from typing import Any, Callable, Dict
+
+import app.use_case.privilege as privilege
+import app.use_case.role as role
+from app.db.orm_types import GreenPlumSession
+from app.schemas.privilege_grant import GrantTablesInDatabase
+from app.use_case.progress import Progress
+
+# Обработчик задачи получает сессию к базе задачи, параметры и функцию прогресса,
+# возвращает сообщение о результате
+JobHandler = Callable[[GreenPlumSession, Dict[str, Any], Progress], str]
+
+
+def _grant_all_tables_in_database(conn: GreenPlumSession, payload: Dict[str, Any], progress: Progress) -> str:
+    touched = privilege.grant_all_tables_in_database(conn, GrantTablesInDatabase(**payload), progress)
+    return f"Permissions have been granted successfully, touched: {touched}."
+
+
+def _drop_role(conn: GreenPlumSession, payload: Dict[str, Any], progress: Progress) -> str:
+    # Прогресс считается по базам, в которых передается владение объектами роли
+    role.drop_role(conn, payload["rolname"], progress)
+    return "The role with this rolname was successfully deleted."
+
+
+job_handlers: Dict[str, JobHandler] = {
+    "grant_all_tables_in_database": _grant_all_tables_in_database,
+    "drop_role": _drop_role,
+}
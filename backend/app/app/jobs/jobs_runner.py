@@ -0,0 +1,179 @@
+import logging
+import os
+import socket
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from threading import Event, Lock, Thread
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+import app.crud as crud
+import app.models as models
+import app.schemas as schemas
+import app.use_case.exceptions as exce
+from app.core.config import settings
+from app.db.greenplum import GreenPlumConnectionsMaker
+from app.db.session import SessionLocal
+from .jobs_handlers import job_handlers
+
+logger = logging.getLogger(__name__)
+
+
+def _error_message(exc: Exception) -> str:
+    if isinstance(exc, exce.BaseUseCaseException):
+        return exce.error_message(exc)
+    if isinstance(exc, SQLAlchemyError):
+        return "An unhandled exception occurred during a database query"
+    return "An unhandled exception occurred during the job"
+
+
+class JobRunner():
+    """Пул потоков для длительных операций: запрос только создает задачу и сразу возвращает ее id."""
+    worker: str
+    _executor: Optional[ThreadPoolExecutor]
+    _futures: Dict[int, Future]
+    _thread: Optional[Thread]
+    _stop: Event
+    _lock: Lock
+
+    def __init__(self) -> None:
+        # pid в контейнерах повторяется, поэтому добавляется случайная часть
+        self.worker = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self._executor = None
+        self._futures = {}
+        self._thread = None
+        self._stop = Event()
+        self._lock = Lock()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.JOB_WORKERS,
+                    thread_name_prefix="gppm-job",
+                )
+            return self._executor
+
+    def submit(
+        self,
+        db: Session,
+        *,
+        kind: str,
+        user: models.User,
+        context: models.Context,
+        database: Optional[str],
+        payload: Dict[str, Any],
+    ) -> models.Job:
+        job = crud.job.create(db, obj_in=schemas.JobCreate(
+            kind=kind,
+            database=database,
+            payload=payload,
+            user_id=user.id,
+            context_id=context.id,
+        ), worker=self.worker)
+
+        future = self._pool().submit(self._run, job.id)
+        with self._lock:
+            self._futures[job.id] = future
+        future.add_done_callback(lambda _: self._forget(job.id))
+
+        return job
+
+    def _forget(self, job_id: int) -> None:
+        with self._lock:
+            self._futures.pop(job_id, None)
+
+    def _run(self, job_id: int) -> None:
+        # Задача работает вне запроса, поэтому открывает собственные сессии
+        with SessionLocal() as db:
+            job = crud.job.get(db, id=job_id)
+            if job is None:
+                return
+
+            crud.job.start(db, db_obj=job)
+
+            def progress(done: int, total: int) -> None:
+                crud.job.progress(db, db_obj=job, done=done, total=total)
+
+            try:
+                handler = job_handlers[job.kind]
+                conn = GreenPlumConnectionsMaker(job.context, job.database).session()
+                try:
+                    result = handler(conn, job.payload, progress)
+                finally:
+                    conn.close()
+            except Exception as exc:
+                db.rollback()
+                crud.job.finish(db, db_obj=job, status="failed", result=_error_message(exc))
+            else:
+                crud.job.finish(db, db_obj=job, status="done", result=result)
+
+    def _active(self) -> List[int]:
+        with self._lock:
+            return list(self._futures)
+
+    def _watch(self) -> None:
+        # Каждый воркер продлевает heartbeat своих задач и завершает задачи остановившихся воркеров
+        while not self._stop.wait(settings.JOB_HEARTBEAT_INTERVAL):
+            try:
+                with SessionLocal() as db:
+                    crud.job.heartbeat(db, ids=self._active())
+                    crud.job.fail_abandoned(db, timeout=settings.JOB_HEARTBEAT_TIMEOUT)
+            except SQLAlchemyError:
+                logger.warning("Job heartbeat failed", exc_info=True)
+
+    def start(self) -> None:
+        # Задачи, оставшиеся после аварийной остановки всех воркеров, не должны висеть в running
+        try:
+            with SessionLocal() as db:
+                failed = crud.job.fail_abandoned(db, timeout=settings.JOB_HEARTBEAT_TIMEOUT)
+            if failed:
+                logger.warning("Marked %s abandoned jobs as failed", failed)
+        except SQLAlchemyError:
+            logger.warning("Abandoned jobs recovery failed", exc_info=True)
+
+        with self._lock:
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = Thread(target=self._watch, name="gppm-job-heartbeat", daemon=True)
+                self._thread.start()
+
+    def _cancel(self, job_ids: List[int], result: str) -> None:
+        if not job_ids:
+            return
+        with SessionLocal() as db:
+            for job_id in job_ids:
+                job = crud.job.get(db, id=job_id)
+                if job is not None and job.status in ("pending", "running"):
+                    crud.job.finish(db, db_obj=job, status="cancelled", result=result)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+            thread, self._thread = self._thread, None
+            futures = dict(self._futures)
+
+        # cancel вызывает _forget, который берет блокировку, поэтому отмена вне ее
+        pending = [job_id for job_id, future in futures.items() if future.cancel()]
+        running = {job_id: future for job_id, future in futures.items() if job_id not in pending}
+
+        self._stop.set()
+        if thread is not None:
+            thread.join(timeout=5)
+
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+        self._cancel(pending, "Cancelled on shutdown")
+
+        # Выполняющиеся задачи дорабатывают, пока воркер не убит по GRACEFUL_TIMEOUT gunicorn
+        _, unfinished = wait(running.values(), timeout=settings.JOB_SHUTDOWN_TIMEOUT)
+        self._cancel(
+            [job_id for job_id, future in running.items() if future in unfinished],
+            "Interrupted on shutdown",
+        )
+
+
+job_runner = JobRunner()
@@ -0,0 +1,216 @@
+import fcntl
+import json
+import logging
+import os
+import stat
+from threading import Event, Lock, Thread
+from time import time
+from typing import IO, Dict, Optional, Tuple
+
+from sqlalchemy.exc import SQLAlchemyError
+
+import app.crud as crud
+from app.core.config import settings
+from app.db.greenplum import GreenPlumConnectionsMaker
+from app.db.orm_types import GreenPlumSession
+from app.db.session import SessionLocal
+from app.use_case.resource import ResourceGroupUsageHistory, sample_resource_groups
+
+logger = logging.getLogger(__name__)
+
+_LEADER_LOCK = "sampler.lock"
+_HISTORY_SUFFIX = ".json"
+_REQUESTED_SUFFIX = ".requested"
+
+
+class ResourceGroupSampler():
+    """Фоновый опрос утилизации групп ресурсов для контекстов, историю которых недавно запрашивали.
+
+    Кластер опрашивает один воркер gunicorn на хосте — тот, кто держит блокировку файла
+    в RESOURCE_GROUP_SAMPLER_DIR. История и отметки запросов хранятся в файлах там же,
+    поэтому любой воркер отдает одну и ту же историю, а после смерти лидера опрос подхватывает другой.
+    """
+    _histories: Dict[int, ResourceGroupUsageHistory]
+    _loaded: Dict[int, Tuple[int, ResourceGroupUsageHistory]]
+    _leader: Optional[IO]
+    _dir_ready: bool
+    _thread: Optional[Thread]
+    _stop: Event
+    _lock: Lock
+
+    def __init__(self) -> None:
+        # Истории, которые ведет лидер
+        self._histories = {}
+        # Прочитанные из файлов истории: контекст -> (mtime файла, история)
+        self._loaded = {}
+        self._leader = None
+        self._dir_ready = False
+        self._thread = None
+        self._stop = Event()
+        self._lock = Lock()
+
+    def _idle_timeout(self) -> float:
+        # Контекст опрашивается, пока его историю смотрят чаще, чем она вытесняется из буфера
+        return settings.RESOURCE_GROUP_SAMPLE_INTERVAL * settings.RESOURCE_GROUP_HISTORY_SIZE
+
+    @staticmethod
+    def _path(name: str) -> str:
+        return os.path.join(settings.RESOURCE_GROUP_SAMPLER_DIR, name)
+
+    def _prepare_dir(self) -> None:
+        # Каталог только для пользователя процесса: чужие файлы истории и блокировки не принимаются
+        if self._dir_ready:
+            return
+
+        path = settings.RESOURCE_GROUP_SAMPLER_DIR
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        info = os.lstat(path)
+        if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+            raise PermissionError(f"{path} must be a directory owned by the current user")
+        if stat.S_IMODE(info.st_mode) != 0o700:
+            os.chmod(path, 0o700)
+        self._dir_ready = True
+
+    def history(self, context_id: int, conn: GreenPlumSession) -> ResourceGroupUsageHistory:
+        self._prepare_dir()
+        # Отметка запроса для лидера, который может быть в другом воркере
+        with open(self._path(f"{context_id}{_REQUESTED_SUFFIX}"), "a"):
+            pass
+        os.utime(self._path(f"{context_id}{_REQUESTED_SUFFIX}"))
+
+        with self._lock:
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = Thread(target=self._run, name="gppm-resource-sampler", daemon=True)
+                self._thread.start()
+
+        history = self._load(context_id)
+        if history is None:
+            # Первый запрос не ждет фонового опроса, в общую историю замер попадет от лидера
+            history = ResourceGroupUsageHistory(
+                settings.RESOURCE_GROUP_SAMPLE_INTERVAL,
+                settings.RESOURCE_GROUP_HISTORY_SIZE,
+            )
+            history.add(sample_resource_groups(conn))
+
+        return history
+
+    def _load(self, context_id: int) -> Optional[ResourceGroupUsageHistory]:
+        try:
+            with open(self._path(f"{context_id}{_HISTORY_SUFFIX}")) as file:
+                mtime = os.fstat(file.fileno()).st_mtime_ns
+                with self._lock:
+                    loaded = self._loaded.get(context_id)
+                if loaded is not None and loaded[0] == mtime:
+                    return loaded[1]
+                history = ResourceGroupUsageHistory.load(json.load(file), settings.RESOURCE_GROUP_HISTORY_SIZE)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError):
+            logger.warning("Failed to read resource group history of context %s", context_id, exc_info=True)
+            return None
+
+        with self._lock:
+            self._loaded[context_id] = (mtime, history)
+        return history
+
+    def _save(self, context_id: int, history: ResourceGroupUsageHistory) -> None:
+        # Файл заменяется целиком, читатели не видят недописанную историю
+        path = self._path(f"{context_id}{_HISTORY_SUFFIX}")
+        temporary = f"{path}.{os.getpid()}"
+        with open(os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as file:
+            json.dump(history.dump(), file)
+        os.replace(temporary, path)
+
+    def _requested(self) -> Dict[int, float]:
+        requested = {}
+        for entry in os.scandir(settings.RESOURCE_GROUP_SAMPLER_DIR):
+            name, suffix = os.path.splitext(entry.name)
+            if suffix == _REQUESTED_SUFFIX and name.isdigit():
+                requested[int(name)] = entry.stat().st_mtime
+        return requested
+
+    def _try_lead(self) -> bool:
+        if self._leader is not None:
+            return True
+
+        # Блокировку снимает ядро, когда процесс лидера завершается
+        file = open(self._path(_LEADER_LOCK), "a")
+        try:
+            fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            file.close()
+            return False
+
+        self._leader = file
+        return True
+
+    def _sample(self, context_id: int) -> bool:
+        with SessionLocal() as db:
+            context = crud.context.get(db, id=context_id)
+            if context is None or not crud.context.is_active(context):
+                return False
+            conn = GreenPlumConnectionsMaker(context).session()
+
+        history = self._histories.get(context_id)
+        if history is None:
+            # Лидер сменился: продолжаем историю, которую вел предыдущий
+            history = self._load(context_id) or ResourceGroupUsageHistory(
+                settings.RESOURCE_GROUP_SAMPLE_INTERVAL,
+                settings.RESOURCE_GROUP_HISTORY_SIZE,
+            )
+            self._histories[context_id] = history
+
+        try:
+            history.add(sample_resource_groups(conn))
+        except SQLAlchemyError:
+            logger.warning("Resource group sampling failed for context %s", context_id, exc_info=True)
+            return True
+        finally:
+            conn.close()
+
+        self._save(context_id, history)
+        return True
+
+    def _forget(self, context_id: int) -> None:
+        self._histories.pop(context_id, None)
+        with self._lock:
+            self._loaded.pop(context_id, None)
+        for suffix in (_REQUESTED_SUFFIX, _HISTORY_SUFFIX):
+            try:
+                os.remove(self._path(f"{context_id}{suffix}"))
+            except FileNotFoundError:
+                pass
+
+    def _run(self) -> None:
+        while not self._stop.wait(settings.RESOURCE_GROUP_SAMPLE_INTERVAL):
+            try:
+                self._prepare_dir()
+                if not self._try_lead():
+                    continue
+                requested = self._requested()
+            except OSError:
+                logger.exception("Resource group sampler directory is not available")
+                continue
+
+            now = time()
+            for context_id, last in requested.items():
+                try:
+                    if now - last > self._idle_timeout() or not self._sample(context_id):
+                        self._forget(context_id)
+                except Exception:
+                    logger.exception("Resource group sampler failed for context %s", context_id)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        self._stop.set()
+        if thread is not None:
+            thread.join(timeout=5)
+
+        if self._leader is not None:
+            self._leader.close()
+            self._leader = None
+
+
+resource_group_sampler = ResourceGroupSampler()
@@ -1,15 +1,22 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from sqlalchemy.exc import SQLAlchemyError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from cryptography.fernet import InvalidToken
-from typing import Awaitable, Callable, Any, Dict, Tuple
+from typing import Awaitable, Callable, Any, Dict, Optional, Tuple
 from functools import wraps
+import asyncio
+from time import perf_counter
 
 import app.use_case.exceptions as exce
 from app.api.api_v1.api import api_router
 from app.core.config import settings
+from app.api.deps import is_superuser_token
+from app.core import metrics, profiler, query_log
+from app.db.greenplum import greenplum_engines
+from app.jobs import job_runner, resource_group_sampler
 
 
 app = FastAPI(
@@ -73,15 +80,107 @@ async def usecase_exception_handler(
     request: Request,
     exc: exce.BaseUseCaseException,
 ) -> Tuple[Dict, int]:
-    errors_dict = {
-        exce.NoSuchObject: f"Object not found: '{exc}'",
-        exce.ObjectAlreadyExists: f"Object already exists: '{exc}'",
-        exce.DoneWithErrors: f"Executed with errors: '{exc}'",
-    }
+    return {"detail": exce.error_message(exc)}, 400
 
-    detail = errors_dict.get(type(exc), "Your request is invalid, please change it and try again")
 
-    return {"detail": detail}, 400
+@app.on_event("startup")
+def start_job_runner() -> None:
+    job_runner.start()
+
+
+@app.on_event("shutdown")
+def dispose_greenplum_engines() -> None:
+    job_runner.shutdown()
+    resource_group_sampler.shutdown()
+    profiler.stack_sampler.shutdown()
+    greenplum_engines.dispose_all()
 
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
+
+
+@app.middleware("http")
+async def trace_queries(request: Request, call_next: Callable) -> Response:
+    route_token = query_log.current_route.set(f"{request.method} {request.url.path}")
+    trace = None
+    # Трасса содержит SQL и параметры запросов, поэтому доступна только суперпользователю
+    if (
+        settings.QUERY_TRACE_ENABLED
+        and request.headers.get("X-Query-Trace")
+        and await run_in_threadpool(is_superuser_token, request.headers.get("Authorization"))
+    ):
+        trace = query_log.QueryTrace(request.url.path)
+    trace_token = query_log.current_trace.set(trace)
+
+    try:
+        response = await call_next(request)
+    finally:
+        query_log.current_trace.reset(trace_token)
+        query_log.current_route.reset(route_token)
+
+    if trace is not None:
+        response.headers["X-Query-Trace"] = trace.header()
+    return response
+
+
+if settings.PROFILER_ENABLED:
+    @app.on_event("startup")
+    async def install_profiling_executor() -> None:
+        profiler.install_executor(asyncio.get_running_loop())
+
+    @app.middleware("http")
+    async def profile_request(request: Request, call_next: Callable) -> Response:
+        requested = request.headers.get("X-Profile") or request.query_params.get("profile")
+        if not requested or not await run_in_threadpool(is_superuser_token, request.headers.get("Authorization")):
+            return await call_next(request)
+
+        profile = profiler.stack_sampler.start(f"{request.method} {request.url.path}")
+        if profile is None:
+            response = await call_next(request)
+            response.headers["X-Profile"] = "busy"
+            return response
+
+        # Контекст копируется в задачу обработчика, ProfilingExecutor по нему находит профиль
+        token = profiler.current_profile.set(profile)
+        try:
+            response = await call_next(request)
+        finally:
+            profiler.current_profile.reset(token)
+            await run_in_threadpool(profiler.stack_sampler.stop, profile)
+
+        response.headers["X-Profile-Id"] = profile.id
+        response.headers["X-Profile-Samples"] = str(profile.samples)
+        return response
+
+
+if settings.METRICS_ENABLED:
+    # Шаблон пути по обработчику: метка не должна зависеть от параметров запроса
+    route_paths: Dict[Callable, str] = {}
+
+    def route_path(endpoint: Optional[Callable]) -> str:
+        # Маршруты собираются при первом запросе, когда зарегистрированы все, включая /metrics
+        if not route_paths:
+            route_paths.update({
+                route.endpoint: route.path for route in app.routes if hasattr(route, "endpoint")
+            })
+        return route_paths.get(endpoint, "unmatched")
+
+    @app.middleware("http")
+    async def collect_request_metrics(request: Request, call_next: Callable) -> Response:
+        metrics.http_requests_in_progress.inc()
+        metrics.sample_threadpool()
+        started = perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            route = route_path(request.scope.get("endpoint"))
+            metrics.http_request_duration.labels(request.method, route, status).observe(perf_counter() - started)
+            metrics.http_requests_in_progress.dec()
+
+    @app.get("/metrics", include_in_schema=False)
+    def read_metrics() -> Response:
+        body, headers = metrics.render_metrics()
+        return Response(body, headers=headers)
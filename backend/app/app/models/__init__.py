@@ -2,3 +2,4 @@
 from .user import User
 from .context import Context
 from .access import Access
+from .job import Job
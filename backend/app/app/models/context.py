@@ -7,6 +7,7 @@ from app.db.base_class import Base
 
 if TYPE_CHECKING:
     from .access import Access  # noqa: F401
+    from .job import Job  # noqa: F401
 
 
 class Context(Base):
@@ -19,3 +20,4 @@ class Context(Base):
     encoded_password = Column(String, nullable=False)
     is_active = Column(Boolean, default=True)
     accesses = relationship("Access", back_populates="context", passive_deletes=True)
+    jobs = relationship("Job", back_populates="context", passive_deletes=True)
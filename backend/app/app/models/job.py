@@ -0,0 +1,30 @@
+from typing import TYPE_CHECKING
+
+from sqlalchemy import JSON, Column, DateTime, ForeignKey, Integer, String, func
+from sqlalchemy.orm import relationship
+
+from app.db.base_class import Base
+
+if TYPE_CHECKING:
+    from .user import User  # noqa: F401
+    from .context import Context  # noqa: F401
+
+
+class Job(Base):
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    status = Column(String, index=True, nullable=False, default="pending")
+    database = Column(String, nullable=True)
+    payload = Column(JSON, nullable=False, default=dict)
+    progress_done = Column(Integer, nullable=False, default=0)
+    progress_total = Column(Integer, nullable=False, default=0)
+    result = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    worker = Column(String, nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    user_id = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), nullable=True)
+    user = relationship("User", back_populates="jobs")
+    context_id = Column(Integer, ForeignKey("context.id", ondelete="CASCADE"), nullable=True)
+    context = relationship("Context", back_populates="jobs")
@@ -7,6 +7,7 @@ from app.db.base_class import Base
 
 if TYPE_CHECKING:
     from .access import Access  # noqa: F401
+    from .job import Job  # noqa: F401
 
 
 class User(Base):
@@ -17,3 +18,4 @@ class User(Base):
     is_active = Column(Boolean, default=True)
     is_superuser = Column(Boolean, default=False)
     accesses = relationship("Access", back_populates="user", passive_deletes=True)
+    jobs = relationship("Job", back_populates="user", passive_deletes=True)
@@ -1,22 +1,23 @@
 # flake8: noqa
 # For Web endpoints
-from .msg import Msg, MsgPublicAppInfo
+from .msg import Msg, MsgGrantResult, MsgPublicAppInfo
 from .token import Token, TokenPayload
 from .user import User, UserCreate, UserInDB, UserUpdate
 from .context import Context, ContextCreate, ContextInDB, ContextUpdate, ContextMini
 from .access import Access, AccessCreate, AccessInDB, AccessUpdate
+from .job import Job, JobCreate, JobUpdate
 
 # For GreenPlum endpoints
-from .role_role import Role, RoleCreate, RoleUpdate
+from .role_role import Role, RoleCreate, RoleUpdate, RoleDependencies, RoleDropResult
 from .acl_schema import Schema
 from .acl_database import Database
-from .acl_table import Table
+from .acl_table import Table, TablePage
 from .privilege_default import DefaultPermissions, RevokeAllDefaults
 from .role_member import RoleMember
 from .role_groups import RoleGraph
 from .privilege_privilege import Privilege
 from .privilege_acl import ACLRule
-from .privilege_graph import GraphPermissions
+from .privilege_graph import GraphObjectPermissions, GraphPermissions, RoleAccess, RoleAccessPage
 from .privilege_grant import (
     GrantDatabase,
     GrantSchema,
@@ -24,7 +25,10 @@ from .privilege_grant import (
     GrantTablesInSchema,
     GrantTablesInDatabase,
     GrantSchemasInDatabase,
+    GrantBatchEntry,
+    GrantBatchResult,
 )
-from .resource_resource import ResourceGroup, ResourceGroupCreate, ResourceGroupUpdate
+from .resource_resource import ResourceGroup, ResourceGroupCreate, ResourceGroupUpdate, ResourceGroupMemberResult
+from .resource_resource import ResourceGroupSample, ResourceGroupUsagePoint, ResourceGroupUsage
 from .resource_available_limits import ResourceGroupAvailableLimits
 from .owner_owner import OwnerEntityUpdate
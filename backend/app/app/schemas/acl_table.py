@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel
 
 
@@ -21,3 +21,8 @@ class Table(TableInDBBase):
     class Config:
         allow_population_by_alias = True
         fields = {'db_schema': {'alias': 'schema'}}
+
+
+class TablePage(TableInDBBase):
+    items: List[Table]
+    next_cursor: Optional[str]
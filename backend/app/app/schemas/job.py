@@ -0,0 +1,46 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+from pydantic import BaseModel
+
+
+# Shared properties
+class JobBase(BaseModel):
+    kind: Optional[str] = None
+    database: Optional[str] = None
+    user_id: Optional[int] = None
+    context_id: Optional[int] = None
+
+
+# Properties to receive on job creation
+class JobCreate(JobBase):
+    kind: str
+    payload: Dict[str, Any]
+
+
+# Properties to receive on job update
+class JobUpdate(BaseModel):
+    status: Optional[str] = None
+    progress_done: Optional[int] = None
+    progress_total: Optional[int] = None
+    result: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class JobInDBBase(JobBase):
+    id: Optional[int] = None
+    status: str
+    progress_done: int
+    progress_total: int
+    result: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+
+# Additional properties to return via API
+class Job(JobInDBBase):
+    pass
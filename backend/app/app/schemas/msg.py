@@ -5,6 +5,11 @@ class Msg(BaseModel):
     msg: str
 
 
+class MsgGrantResult(BaseModel):
+    msg: str
+    touched: int
+
+
 class MsgPublicAppInfo(BaseModel):
     project_name: str
     api_version: str
@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from typing import List, Optional
+from pydantic import BaseModel, validator
 
 
 class GrantBase(BaseModel):
@@ -72,3 +73,32 @@ class GrantTable(GrantInDBBase):
     class Config:
         allow_population_by_alias = True
         fields = {'db_schema': {'alias': 'schema'}}
+
+
+class GrantBatchEntry(GrantInDBBase):
+    database: str
+    db_schema: Optional[str]
+    table: Optional[str]
+    privileges: List[str]
+
+    class Config:
+        allow_population_by_alias = True
+        fields = {'db_schema': {'alias': 'schema'}}
+
+    @validator("privileges", each_item=True)
+    def upper_privileges(cls, v: str) -> str:
+        return v.upper()
+
+
+class GrantBatchResult(BaseModel):
+    database: str
+    db_schema: Optional[str]
+    table: Optional[str]
+    role_specification: str
+    touched: int
+    error: Optional[str]
+
+    class Config:
+        orm_mode = True
+        allow_population_by_alias = True
+        fields = {'db_schema': {'alias': 'schema'}}
@@ -1,6 +1,8 @@
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 
+from .privilege_privilege import Privilege
+
 
 class GraphPermissionsBase(BaseModel):
     pass
@@ -19,3 +21,24 @@ class GraphPermissions(GraphPermissionsInDBBase):
     class Config:
         allow_population_by_alias = True
         fields = {'db_schema': {'alias': 'schema'}}
+
+
+class GraphObjectPermissions(GraphPermissions):
+    permissions: List[Privilege]
+
+
+class RoleAccess(GraphPermissionsInDBBase):
+    kind: str
+    db_schema: Optional[str]
+    name: str
+    privs: List[str]
+    privswgo: List[str]
+
+    class Config:
+        allow_population_by_alias = True
+        fields = {'db_schema': {'alias': 'schema'}}
+
+
+class RoleAccessPage(GraphPermissionsInDBBase):
+    total: int
+    items: List[RoleAccess]
@@ -1,4 +1,5 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 from pydantic import BaseModel
 
 
@@ -25,3 +26,41 @@ class ResourceGroupCreate(ResourceGroupInDBBase):
 
 class ResourceGroupUpdate(ResourceGroupInDBBase):
     pass
+
+
+class ResourceGroupMemberResult(BaseModel):
+    rolname: str
+    error: Optional[str]
+
+    class Config:
+        orm_mode = True
+
+
+class ResourceGroupSample(BaseModel):
+    name: str
+    num_running: float
+    num_queueing: float
+    cpu: float
+    cpu_max: float
+    memory_used: float
+    memory_available: float
+
+    class Config:
+        orm_mode = True
+
+
+class ResourceGroupUsagePoint(BaseModel):
+    time: datetime
+    step: int
+    groups: List[ResourceGroupSample]
+
+    class Config:
+        orm_mode = True
+
+
+class ResourceGroupUsage(BaseModel):
+    interval: int
+    points: List[ResourceGroupUsagePoint]
+
+    class Config:
+        orm_mode = True
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 
 
@@ -26,3 +26,37 @@ class RoleInDBBase(RoleBase):
 
 class Role(RoleInDBBase):
     oid: int
+
+
+class DatabaseOutcome(BaseModel):
+    database: str
+    error: Optional[str]
+
+    class Config:
+        orm_mode = True
+
+
+class RoleDropResult(BaseModel):
+    msg: str
+    databases: List[DatabaseOutcome]
+
+
+class DatabaseDependencies(BaseModel):
+    database: Optional[str]
+    connectable: bool
+    owned: int
+    privileges: int
+    other: int
+
+    class Config:
+        orm_mode = True
+
+
+class RoleDependencies(BaseModel):
+    rolname: str
+    strategy: str
+    reassign_in: List[str]
+    databases: List[DatabaseDependencies]
+
+    class Config:
+        orm_mode = True
@@ -0,0 +1,10 @@
+import os
+
+# Настройки без значений по умолчанию: юнит-тестам не нужны база и LDAP
+os.environ.setdefault("BACKEND_CORS_ORIGINS", '["http://localhost"]')
+os.environ.setdefault("POSTGRES_SERVER", "localhost")
+os.environ.setdefault("POSTGRES_USER", "postgres")
+os.environ.setdefault("POSTGRES_PASSWORD", "postgres")
+os.environ.setdefault("POSTGRES_DB", "app")
+os.environ.setdefault("FIRST_SUPERUSER", "admin@gppm.com")
+os.environ.setdefault("FIRST_SUPERUSER_PASSWORD", "admin")
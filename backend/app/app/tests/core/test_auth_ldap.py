@@ -0,0 +1,177 @@
+from typing import Dict, List, Optional
+
+import pytest
+
+ldap = pytest.importorskip("ldap")
+
+from app.core.auth import AuthUnavailable, LdapAuth  # noqa: E402
+from app.core.auth import auth_ldap_pool  # noqa: E402
+from app.core.auth.auth_ldap import ldap_info_cache  # noqa: E402
+from app.core.auth.auth_ldap_pool import LdapConnectionPool  # noqa: E402
+from app.core.config import settings  # noqa: E402
+
+_USERS = {"user@gppm.com": ("secret", {"cn": [b"Test User"]})}
+
+
+class FakeConnection():
+    """Соединение python-ldap без сервера: запоминает вызовы, ошибки задаются тестом."""
+    calls: List[str]
+    error: Optional[Exception]
+
+    def __init__(self) -> None:
+        self.calls = []
+        self.error = None
+
+    def _call(self, name: str) -> None:
+        self.calls.append(name)
+        if self.error is not None:
+            raise self.error
+
+    def set_option(self, option: int, value: int) -> None:
+        pass
+
+    def simple_bind_s(self, who: str, cred: str) -> None:
+        self._call("bind")
+        if _USERS.get(who, (None,))[0] != cred:
+            raise ldap.INVALID_CREDENTIALS({"desc": "Invalid credentials"})
+
+    def whoami_s(self) -> str:
+        self._call("whoami")
+        return ""
+
+    def search_s(self, base: str, scope: int, search_filter: str, attrs: List[str]) -> List:
+        self._call("search")
+        email = search_filter.split("=", 1)[1].rstrip(")")
+        return [(f"cn={email},{base}", _USERS[email][1])] if email in _USERS else []
+
+    def unbind_s(self) -> None:
+        self.calls.append("unbind")
+
+
+@pytest.fixture
+def connections(monkeypatch: pytest.MonkeyPatch) -> List[FakeConnection]:
+    created: List[FakeConnection] = []
+
+    def initialize(url: str) -> FakeConnection:
+        conn = FakeConnection()
+        created.append(conn)
+        return conn
+
+    monkeypatch.setattr(auth_ldap_pool.ldap, "initialize", initialize)
+    monkeypatch.setattr(settings, "LDAP_POOL_TIMEOUT", 0)
+    monkeypatch.setattr(settings, "LDAP_POOL_CHECK_INTERVAL", 30)
+    ldap_info_cache.clear()
+    return created
+
+
+@pytest.fixture
+def ldap_auth(connections: List[FakeConnection], monkeypatch: pytest.MonkeyPatch) -> LdapAuth:
+    auth = LdapAuth("ldap://fake", "dc=gppm", "(mail={email})", ["cn"])
+    auth.pool = LdapConnectionPool("ldap://fake", 1)
+    # Пользователь приложения не нужен: проверяется только обращение к каталогу
+    monkeypatch.setattr(auth, "update_db", lambda payload, db: payload)
+    return auth
+
+
+def test_pool_reuses_connection(connections: List[FakeConnection]) -> None:
+    pool = LdapConnectionPool("ldap://fake", 2)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+
+    assert first is second
+    assert len(connections) == 1
+    assert "whoami" not in first.calls
+
+
+def test_pool_replaces_dead_idle_connection(
+    connections: List[FakeConnection], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    pool = LdapConnectionPool("ldap://fake", 1)
+    with pool.connection() as first:
+        pass
+
+    first.error = ldap.SERVER_DOWN({"desc": "Can't contact LDAP server"})
+    monkeypatch.setattr(settings, "LDAP_POOL_CHECK_INTERVAL", 0)
+    with pool.connection() as second:
+        pass
+
+    assert second is not first
+    assert first.calls[-2:] == ["whoami", "unbind"]
+
+
+def test_pool_drops_connection_broken_in_use(connections: List[FakeConnection]) -> None:
+    pool = LdapConnectionPool("ldap://fake", 1)
+    with pytest.raises(ldap.SERVER_DOWN):
+        with pool.connection():
+            raise ldap.SERVER_DOWN({"desc": "Can't contact LDAP server"})
+
+    with pool.connection() as conn:
+        pass
+
+    assert connections == [connections[0], conn]
+    assert connections[0].calls == ["unbind"]
+
+
+def test_pool_keeps_connection_after_protocol_error(connections: List[FakeConnection]) -> None:
+    pool = LdapConnectionPool("ldap://fake", 1)
+    with pytest.raises(ldap.INVALID_CREDENTIALS):
+        with pool.connection() as conn:
+            conn.simple_bind_s("user@gppm.com", "wrong")
+
+    with pool.connection() as again:
+        pass
+
+    assert again is conn
+
+
+def test_pool_exhausted(connections: List[FakeConnection]) -> None:
+    pool = LdapConnectionPool("ldap://fake", 1)
+    with pool.connection():
+        with pytest.raises(AuthUnavailable):
+            with pool.connection():
+                pass
+
+    # Слот освобожден, пул снова выдает соединение
+    with pool.connection():
+        pass
+
+
+def test_auth_caches_directory_info(ldap_auth: LdapAuth, connections: List[FakeConnection]) -> None:
+    first: Dict = ldap_auth.auth("user@gppm.com", "secret", db=None)
+    second: Dict = ldap_auth.auth("user@gppm.com", "secret", db=None)
+
+    assert first["full_name"] == second["full_name"] == "Test User"
+    assert connections[0].calls == ["bind", "search", "bind"]
+
+
+def test_auth_wrong_password(ldap_auth: LdapAuth, connections: List[FakeConnection]) -> None:
+    assert ldap_auth.auth("user@gppm.com", "wrong", db=None) is None
+    assert ldap_auth.auth("nobody@gppm.com", "secret", db=None) is None
+
+
+def test_auth_retries_on_new_connection(ldap_auth: LdapAuth, connections: List[FakeConnection]) -> None:
+    with ldap_auth.pool.connection() as stale:
+        pass
+    stale.error = ldap.SERVER_DOWN({"desc": "Can't contact LDAP server"})
+
+    assert ldap_auth.auth("user@gppm.com", "secret", db=None)["full_name"] == "Test User"
+    assert len(connections) == 2
+
+
+def test_auth_server_down(ldap_auth: LdapAuth, monkeypatch: pytest.MonkeyPatch) -> None:
+    def initialize(url: str) -> FakeConnection:
+        conn = FakeConnection()
+        conn.error = ldap.SERVER_DOWN({"desc": "Can't contact LDAP server"})
+        return conn
+
+    monkeypatch.setattr(auth_ldap_pool.ldap, "initialize", initialize)
+    with pytest.raises(AuthUnavailable):
+        ldap_auth.auth("user@gppm.com", "secret", db=None)
+
+
+def test_auth_pool_exhausted(ldap_auth: LdapAuth) -> None:
+    with ldap_auth.pool.connection():
+        with pytest.raises(AuthUnavailable):
+            ldap_auth.auth("user@gppm.com", "secret", db=None)
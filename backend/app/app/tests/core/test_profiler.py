@@ -0,0 +1,78 @@
+import asyncio
+from time import perf_counter
+from typing import Callable, Iterator
+
+import pytest
+from fastapi import Depends, FastAPI, Request, Response
+from fastapi.testclient import TestClient
+
+from app.core import profiler
+from app.core.config import settings
+
+
+def _spin(seconds: float) -> None:
+    started = perf_counter()
+    while perf_counter() - started < seconds:
+        pass
+
+
+def _slow_dependency() -> Iterator[None]:
+    _spin(0.1)
+    yield
+
+
+def _make_app() -> FastAPI:
+    # Тот же порядок, что в app.main: executor на старте, профиль в middleware
+    app = FastAPI()
+
+    @app.on_event("startup")
+    async def install_profiling_executor() -> None:
+        profiler.install_executor(asyncio.get_running_loop())
+
+    @app.middleware("http")
+    async def profile_request(request: Request, call_next: Callable) -> Response:
+        profile = profiler.stack_sampler.start(f"{request.method} {request.url.path}")
+        token = profiler.current_profile.set(profile)
+        try:
+            response = await call_next(request)
+        finally:
+            profiler.current_profile.reset(token)
+            profiler.stack_sampler.stop(profile)
+
+        response.headers["X-Profile-Id"] = profile.id
+        response.headers["X-Profile-Samples"] = str(profile.samples)
+        return response
+
+    @app.get("/slow")
+    def slow_endpoint(dependency: None = Depends(_slow_dependency)) -> str:
+        _spin(0.3)
+        return "done"
+
+    return app
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch: pytest.MonkeyPatch) -> Iterator[TestClient]:
+    monkeypatch.setattr(settings, "PROFILER_DIR", str(tmp_path))
+    with TestClient(_make_app()) as client:
+        yield client
+    profiler.stack_sampler.shutdown()
+
+
+def test_sync_endpoint_is_sampled(client: TestClient) -> None:
+    response = client.get("/slow")
+
+    assert response.status_code == 200
+    assert int(response.headers["X-Profile-Samples"]) > 0
+
+    profile = profiler.load_profile(response.headers["X-Profile-Id"])
+    stacks = {line.rsplit(" ", 1)[0] for line in profile.splitlines()}
+    assert any("slow_endpoint (" in stack and "_spin (" in stack for stack in stacks)
+    assert any("_slow_dependency (" in stack for stack in stacks)
+    assert all(stack.startswith("GET /slow;") for stack in stacks)
+
+
+def test_threads_unregistered_after_request(client: TestClient) -> None:
+    client.get("/slow")
+
+    assert profiler.stack_sampler._threads == {}
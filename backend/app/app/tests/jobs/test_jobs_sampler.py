@@ -0,0 +1,42 @@
+import os
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core.config import settings
+from app.jobs.jobs_sampler import ResourceGroupSampler
+from app.use_case.resource import ResourceGroupSampleDTO, ResourceGroupUsageHistory
+
+
+@pytest.fixture
+def sampler_dir(tmp_path, monkeypatch: pytest.MonkeyPatch) -> str:
+    path = str(tmp_path / "resource-groups")
+    monkeypatch.setattr(settings, "RESOURCE_GROUP_SAMPLER_DIR", path)
+    return path
+
+
+def test_dir_is_private(sampler_dir: str) -> None:
+    ResourceGroupSampler()._prepare_dir()
+    assert os.stat(sampler_dir).st_mode & 0o777 == 0o700
+
+
+def test_dir_of_other_user_is_refused(sampler_dir: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    os.makedirs(sampler_dir)
+    monkeypatch.setattr(os, "getuid", lambda: os.stat(sampler_dir).st_uid + 1)
+    with pytest.raises(PermissionError):
+        ResourceGroupSampler()._prepare_dir()
+
+
+def test_history_round_trip(sampler_dir: str) -> None:
+    history = ResourceGroupUsageHistory(10, 5)
+    sample = ResourceGroupSampleDTO("default_group", 1, 0, 12.5, 20, 100, 900)
+    for second in range(12):
+        history.add([sample], datetime(2026, 10, 18, 10, 0, second, tzinfo=timezone.utc))
+
+    sampler = ResourceGroupSampler()
+    sampler._prepare_dir()
+    sampler._save(1, history)
+
+    assert sampler._load(1).usage() == history.usage()
+    with open(os.path.join(sampler_dir, "1.json")) as file:
+        assert file.read().startswith("{")
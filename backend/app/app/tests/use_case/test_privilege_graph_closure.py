@@ -0,0 +1,77 @@
+import random
+import sys
+from typing import Dict, List, Set, Tuple
+
+import pytest
+
+from app.use_case.privilege_graph import RoleClosure, get_role_closure
+from app.use_case.privilege_graph import privilege_graph_closure
+from app.use_case.role import RoleGroupDTO, RoleGroupEdgeDTO
+
+
+class FakeSession():
+    """Сессия без контекста: кэш каталога не используется."""
+    info: Dict
+
+    def __init__(self) -> None:
+        self.info = {}
+
+
+def _naive_members(edges: List[Tuple[int, int]], oid: int) -> Set[int]:
+    adjacency: Dict[int, List[int]] = {}
+    for from_oid, to_oid in edges:
+        adjacency.setdefault(from_oid, []).append(to_oid)
+
+    seen: Set[int] = set()
+    queue = list(adjacency.get(oid, []))
+    while queue:
+        n = queue.pop(0)
+        if n not in seen:
+            seen.add(n)
+            queue.extend(adjacency.get(n, []))
+
+    seen.discard(oid)
+    return seen
+
+
+def test_cycle_members_share_closure() -> None:
+    closure = RoleClosure([(1, 2), (2, 3), (3, 1), (3, 4)])
+
+    assert set(closure.members_of(1)) == {2, 3, 4}
+    assert set(closure.members_of(2)) == {1, 3, 4}
+    assert set(closure.members_of(3)) == {1, 2, 4}
+    assert closure.members_of(4) == []
+    assert set(closure.groups_of(4)) == {1, 2, 3}
+
+
+def test_chain_deeper_than_recursion_limit() -> None:
+    depth = sys.getrecursionlimit() + 1000
+    closure = RoleClosure((n, n + 1) for n in range(depth))
+
+    assert len(closure.members_of(0)) == depth
+    assert closure.members_of(depth - 1) == [depth]
+    assert len(closure.groups_of(depth)) == depth
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_graph_matches_bfs(seed: int) -> None:
+    rnd = random.Random(seed)
+    roles = list(range(100, 160))
+    edges = [(rnd.choice(roles), rnd.choice(roles)) for _ in range(90)]
+    edges = [(a, b) for a, b in edges if a != b]
+    closure = RoleClosure(edges)
+
+    for oid in roles:
+        members = _naive_members(edges, oid)
+        assert set(closure.members_of(oid)) == members
+        assert len(closure.members_of(oid)) == len(members)
+        assert set(closure.groups_of(oid)) == {n for n in roles if oid in _naive_members(edges, n)}
+
+
+def test_get_role_closure(monkeypatch: pytest.MonkeyPatch) -> None:
+    graph = RoleGroupDTO(nodes=[], edges=[RoleGroupEdgeDTO(1, 2), RoleGroupEdgeDTO(2, 3)])
+    monkeypatch.setattr(privilege_graph_closure, "get_graph_of_members", lambda conn: graph)
+
+    closure = get_role_closure(FakeSession())
+
+    assert closure.all_reachable_nodes() == {1: [2, 3], 2: [3], 3: []}
@@ -0,0 +1,51 @@
+from itertools import combinations
+
+import pytest
+
+from app.use_case.privilege import (
+    diff_masks,
+    has_privilege,
+    make_acl_item,
+    mask_to_privileges,
+    privilege_bits,
+    privileges_to_mask,
+    symbol_bits,
+    symbols_to_mask,
+)
+
+
+def test_every_mask_round_trip() -> None:
+    # 12 битов: все возможные наборы прав
+    for mask in range(1 << len(privilege_bits)):
+        assert privileges_to_mask(mask_to_privileges(mask)) == mask
+
+
+@pytest.mark.parametrize("size", [0, 1, 2, 3, 12])
+def test_privileges_round_trip(size: int) -> None:
+    for privileges in combinations(privilege_bits, size):
+        assert mask_to_privileges(privileges_to_mask(privileges)) == privileges
+
+
+def test_privileges_keep_postgres_order() -> None:
+    mask = privileges_to_mask(["CONNECT", "SELECT", "INSERT"])
+    assert mask_to_privileges(mask) == ("INSERT", "SELECT", "CONNECT")
+
+
+def test_symbols_match_privileges() -> None:
+    assert symbols_to_mask("arwdDxt") == privileges_to_mask(
+        ["INSERT", "SELECT", "UPDATE", "DELETE", "TRUNCATE", "REFERENCES", "TRIGGER"]
+    )
+    assert set(symbol_bits.values()) == set(privilege_bits.values())
+
+
+def test_grant_option_implies_privilege() -> None:
+    item = make_acl_item("bob", "postgres", symbols_to_mask("r"), symbols_to_mask("w"))
+    assert has_privilege(item, "UPDATE")
+    assert has_privilege(item, "UPDATE", with_grant_option=True)
+    assert not has_privilege(item, "SELECT", with_grant_option=True)
+
+
+def test_diff_masks() -> None:
+    grant, revoke = diff_masks(symbols_to_mask("ra"), symbols_to_mask("rw"))
+    assert grant == symbols_to_mask("w")
+    assert revoke == symbols_to_mask("a")
@@ -0,0 +1,83 @@
+import pytest
+
+from app.use_case.exceptions import FailedToParseACLRule, FailedToParseACLSymbols
+from app.use_case.privilege import (
+    PrivilegeDTO,
+    compile_one_acl_rule,
+    parce_acl_item,
+    parce_acl_rules,
+    parce_one_acl_rule,
+    symbols_to_mask,
+)
+
+
+def test_plain_names() -> None:
+    item = parce_acl_item("bob=rw/postgres")
+    assert item.grantee == "bob"
+    assert item.grantor == "postgres"
+    assert item.privs == symbols_to_mask("rw")
+    assert item.goptions == 0
+
+
+def test_quoted_names() -> None:
+    item = parce_acl_item('"a=b""c"=r/"x/y"')
+    assert item.grantee == 'a=b"c'
+    assert item.grantor == "x/y"
+    assert item.privs == symbols_to_mask("r")
+
+
+def test_quoted_name_with_spaces() -> None:
+    item = parce_acl_item('"Data Team"=U/"Owner Role"')
+    assert (item.grantee, item.grantor) == ("Data Team", "Owner Role")
+
+
+def test_public_grantee() -> None:
+    item = parce_acl_item("=Tc/postgres")
+    assert item.grantee == ""
+    assert item.privs == symbols_to_mask("Tc")
+
+
+def test_grant_options() -> None:
+    item = parce_acl_item("bob=r*w*a/alice")
+    assert item.privs == symbols_to_mask("rwa")
+    assert item.goptions == symbols_to_mask("rw")
+
+    dto = parce_one_acl_rule("bob=r*w*a/alice")
+    assert dto.privs == ["INSERT"]
+    assert dto.privswgo == ["SELECT", "UPDATE"]
+
+
+def test_all_table_privileges() -> None:
+    dto = parce_one_acl_rule("bob=arwdDxt/postgres")
+    assert dto.privs == ["INSERT", "SELECT", "UPDATE", "DELETE", "TRUNCATE", "REFERENCES", "TRIGGER"]
+    assert dto.privswgo == []
+
+
+def test_compile_all() -> None:
+    # ALL раскрывается в GRANT ALL, в aclitem ему не соответствует отдельный символ
+    rule = compile_one_acl_rule(PrivilegeDTO(grantee="bob", grantor="postgres", privs=["ALL"], privswgo=[]))
+    assert rule == '"bob"=/"postgres"'
+
+
+def test_compile_round_trip() -> None:
+    dto = PrivilegeDTO(grantee="Data Team", grantor="postgres", privs=["SELECT"], privswgo=["UPDATE"])
+    assert parce_one_acl_rule(compile_one_acl_rule(dto)) == dto
+
+
+def test_merge_by_grantee() -> None:
+    merged = list(parce_acl_rules(["bob=r/postgres", "bob=w*/alice", "=U/postgres"]))
+    assert merged == [
+        PrivilegeDTO(grantee="bob", grantor=2, privs=["SELECT"], privswgo=["UPDATE"]),
+        PrivilegeDTO(grantee="", grantor=1, privs=["USAGE"], privswgo=[]),
+    ]
+
+
+@pytest.mark.parametrize("acl", ["bob", "bob=r", '"bob=r/postgres', 'bob=r/"postgres"x'])
+def test_malformed_rule(acl: str) -> None:
+    with pytest.raises(FailedToParseACLRule):
+        parce_acl_item(acl)
+
+
+def test_unknown_symbol() -> None:
+    with pytest.raises(FailedToParseACLSymbols):
+        parce_acl_item("bob=rZ/postgres")
@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta, timezone
+
+from app.use_case.resource import ResourceGroupSampleDTO, ResourceGroupUsageHistory
+
+_start = datetime(2026, 10, 18, 10, 0, 0, tzinfo=timezone.utc)
+
+
+def _sample(name: str, cpu: float) -> ResourceGroupSampleDTO:
+    return ResourceGroupSampleDTO(name, 1, 0, cpu, cpu, 100, 900)
+
+
+def _history(points: int, size: int = 5) -> ResourceGroupUsageHistory:
+    history = ResourceGroupUsageHistory(10, size)
+    for n in range(points):
+        history.add(
+            [_sample("default_group", n), _sample("admin_group", 100 + n)],
+            _start + timedelta(seconds=10 * n),
+        )
+    return history
+
+
+def test_recent_points_as_is() -> None:
+    usage = _history(3).usage()
+    assert usage.interval == 10
+    assert [point.time for point in usage.points] == [_start + timedelta(seconds=10 * n) for n in range(3)]
+    assert all(point.step == 10 for point in usage.points)
+
+
+def test_downsampled_points_precede_recent() -> None:
+    points = _history(30).usage().points
+
+    # Усредненные точки по 10 замеров (0, 10, 20) и последние 5 замеров (25..29)
+    assert [point.step for point in points] == [100] * 3 + [10] * 5
+    assert [point.groups[0].cpu for point in points[:3]] == [4.5, 14.5, 24.5]
+    assert [point.groups[0].cpu_max for point in points[:3]] == [9, 19, 29]
+    assert [point.groups[0].cpu for point in points[3:]] == [25, 26, 27, 28, 29]
+    assert points[2].time < points[3].time
+
+
+def test_group_missing_in_some_samples() -> None:
+    history = ResourceGroupUsageHistory(10, 5)
+    for n in range(10):
+        groups = [_sample("default_group", 10)] + ([_sample("new_group", 50)] if n >= 5 else [])
+        history.add(groups, _start + timedelta(seconds=10 * n))
+
+    averaged = history.usage().points[0]
+    assert {sample.name: sample.cpu for sample in averaged.groups} == {"default_group": 10, "new_group": 50}
+
+
+def test_since_aware() -> None:
+    points = _history(5).usage(since=_start + timedelta(seconds=20)).points
+    assert [point.groups[0].cpu for point in points] == [2, 3, 4]
+
+
+def test_since_without_timezone_is_utc() -> None:
+    naive = (_start + timedelta(seconds=20)).replace(tzinfo=None)
+    points = _history(5).usage(since=naive).points
+    assert [point.groups[0].cpu for point in points] == [2, 3, 4]
+
+
+def test_since_in_other_timezone() -> None:
+    since = (_start + timedelta(seconds=30)).astimezone(timezone(timedelta(hours=3)))
+    assert len(_history(5).usage(since=since).points) == 2
+
+
+def test_name_filter() -> None:
+    points = _history(3).usage(name="admin_group").points
+    assert len(points) == 3
+    assert all([sample.name for sample in point.groups] == ["admin_group"] for point in points)
+    assert all(point.groups == [] for point in _history(3).usage(name="missing").points)
@@ -3,3 +3,5 @@ from .acl_dto import *
 from .acl_table import *
 from .acl_schema import *
 from .acl_database import *
+from .acl_explode import *
+from .acl_batch import *
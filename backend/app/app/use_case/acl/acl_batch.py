@@ -0,0 +1,110 @@
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import cast, literal, null, tuple_, union_all, ARRAY, Text
+from sqlalchemy.engine import Row
+from sqlalchemy.sql.expression import CompoundSelect
+
+from app.db.orm_types import GreenPlumSession
+from app.use_case.privilege import AclItem, parce_acl_item
+from . import DatabaseAclDTO, SchemaAclDTO, TableAclDTO
+from .acl_database import _pg_db_stmt
+from .acl_schema import _pg_schema_stmt
+from .acl_table import _table_stmt
+from app.read_model import *
+
+# (база, схема, таблица): у базы заполнено только имя базы,
+# у схемы и таблицы база не указывается, они относятся к текущему подключению
+ObjectKey = Tuple[Optional[str], Optional[str], Optional[str]]
+
+
+def _objects_stmt(
+    databases: List[str], schemas: List[str], tables: List[Tuple[str, str]]
+) -> CompoundSelect:
+    stmts = []
+
+    if databases:
+        stmts.append(
+            _pg_db_stmt
+            .with_only_columns([
+                literal('d').label('kind'),
+                pg_database.c.oid,
+                pg_database.c.datname.label('database'),
+                cast(null(), Text).label('schema'),
+                cast(null(), Text).label('name'),
+                pg_roles.c.rolname.label('owner'),
+                cast(pg_database.c.datacl, ARRAY(Text)).label('acl'),
+            ])
+            .where(pg_database.c.datname.in_(databases))
+        )
+
+    if schemas:
+        stmts.append(
+            _pg_schema_stmt
+            .with_only_columns([
+                literal('n').label('kind'),
+                pg_namespace.c.oid,
+                cast(null(), Text).label('database'),
+                pg_namespace.c.nspname.label('schema'),
+                cast(null(), Text).label('name'),
+                pg_roles.c.rolname.label('owner'),
+                cast(pg_namespace.c.nspacl, ARRAY(Text)).label('acl'),
+            ])
+            .where(pg_namespace.c.nspname.in_(schemas))
+        )
+
+    if tables:
+        stmts.append(
+            _table_stmt()
+            .with_only_columns([
+                literal('r').label('kind'),
+                pg_class.c.oid,
+                cast(null(), Text).label('database'),
+                pg_namespace.c.nspname.label('schema'),
+                pg_class.c.relname.label('name'),
+                pg_roles.c.rolname.label('owner'),
+                cast(pg_class.c.relacl, ARRAY(Text)).label('acl'),
+            ])
+            .where(tuple_(pg_namespace.c.nspname, pg_class.c.relname).in_(tables))
+        )
+
+    return union_all(*stmts)
+
+
+def _acl_with_defaults(row: Row) -> List[str]:
+    # Права по умолчанию для пустого ACL задают DTO соответствующих объектов
+    if row.kind == 'd':
+        return DatabaseAclDTO(row.oid, row.database, row.owner, row.acl).acl
+    if row.kind == 'n':
+        return SchemaAclDTO(row.oid, row.schema, row.owner, row.acl).acl
+    return TableAclDTO(row.oid, row.name, row.owner, row.acl, row.schema).acl
+
+
+def get_acls_of_objects(
+    conn: GreenPlumSession,
+    databases: List[str],
+    schemas: List[str],
+    tables: List[Tuple[str, str]],
+) -> Dict[ObjectKey, Tuple[str, List[str]]]:
+    # Владелец и ACL (с правами по умолчанию) каждого найденного объекта
+    if not (databases or schemas or tables):
+        return {}
+
+    stmt = _objects_stmt(list(set(databases)), list(set(schemas)), list(set(tables)))
+    with conn.begin():
+        rows = conn.execute(stmt)
+        return {
+            (row.database, row.schema, row.name): (row.owner, _acl_with_defaults(row))
+            for row in rows
+        }
+
+
+def get_acl_items_of_objects(
+    conn: GreenPlumSession,
+    databases: List[str],
+    schemas: List[str],
+    tables: List[Tuple[str, str]],
+) -> Dict[ObjectKey, List[AclItem]]:
+    acls = get_acls_of_objects(conn, databases, schemas, tables)
+    return {
+        key: [parce_acl_item(rule) for rule in acl]
+        for key, (_, acl) in acls.items()
+    }
@@ -2,6 +2,7 @@ from typing import List
 from sqlalchemy import cast, select, ARRAY, Text
 
 from app.db.orm_types import GreenPlumSession
+from app.db.catalog_cache import catalog_snapshot
 from . import DatabaseAclDTO
 from app.use_case.exceptions import NoSuchObject
 from app.read_model import *
@@ -22,12 +23,23 @@ _pg_db_stmt = (
 )
 
 
+@catalog_snapshot
 def get_all_database_acls(conn: GreenPlumSession) -> List[DatabaseAclDTO]:
     with conn.begin():
         rows = conn.execute(_pg_db_stmt)
         return [DatabaseAclDTO(**row) for row in rows]
 
 
+def get_database_acls_by_names(conn: GreenPlumSession, databases: List[str]) -> List[DatabaseAclDTO]:
+    if not databases:
+        return []
+
+    stmt = _pg_db_stmt.where(pg_database.c.datname.in_(databases))
+    with conn.begin():
+        rows = conn.execute(stmt)
+        return [DatabaseAclDTO(**row) for row in rows]
+
+
 def get_database_acl(conn: GreenPlumSession, database: str) -> DatabaseAclDTO:
     stmt = _pg_db_stmt.where(pg_database.c.datname == database)
     with conn.begin():
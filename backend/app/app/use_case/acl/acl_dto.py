@@ -1,5 +1,5 @@
 from attrs import define
-from typing import List
+from typing import List, Optional
 
 
 @define
@@ -45,3 +45,9 @@ class TableAclDTO(DTO):
     def __attrs_post_init__(self) -> None:
         if self.acl is None:
             self.acl = [f'"{self.owner}"=arwdDxt/"{self.owner}"']
+
+
+@define
+class TableAclPageDTO(DTO):
+    items: List[TableAclDTO]
+    next_cursor: Optional[str]
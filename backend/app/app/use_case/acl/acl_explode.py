@@ -0,0 +1,146 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.db.orm_types import GreenPlumSession
+from app.use_case.privilege import AclItem, make_acl_item, parce_acl_item, privilege_bits
+from . import get_all_database_acls, get_all_schema_acls, get_all_table_acls
+from . import get_database_acl, get_schema_acl, get_table_acl
+
+AclItems = Dict[int, List[AclItem]]
+
+# Права, о которых приложение не знает (например, MAINTAIN), получают нулевой бит
+_privilege_bit_sql = "CASE (e.item).privilege_type {} ELSE 0 END".format(
+    " ".join(f"WHEN '{name}' THEN {bit}" for name, bit in privilege_bits.items())
+)
+
+# aclexplode разворачивает aclitem[] в строки (grantor, grantee, privilege_type, is_grantable),
+# acldefault подставляет права владельца, если ACL объекта еще не менялся (NULL).
+# Строки одного aclitem собираются обратно в маски на стороне СУБД, имена ролей
+# подставляются уже после группировки. Пустое имя получателя означает PUBLIC (oid 0)
+_acl_explode_sql = """
+    SELECT
+        a.oid,
+        coalesce(grantee.rolname, '') AS grantee,
+        grantor.rolname AS grantor,
+        a.privs,
+        a.goptions
+    FROM (
+        SELECT
+            e.oid,
+            (e.item).grantee AS grantee_oid,
+            (e.item).grantor AS grantor_oid,
+            bit_or({privilege_bit}) AS privs,
+            bit_or(CASE WHEN (e.item).is_grantable THEN {privilege_bit} ELSE 0 END) AS goptions
+        FROM (
+            -- (aclexplode(...)).* вызвал бы функцию для каждой колонки
+            SELECT
+                o.oid,
+                aclexplode(coalesce(o.{acl}, acldefault('{kind}', o.{owner}))) AS item
+            FROM {source}
+            WHERE {condition}
+        ) e
+        WHERE :grantee IS NULL OR (e.item).grantee = CASE
+            WHEN :grantee = '' THEN 0
+            ELSE (SELECT r.oid FROM pg_catalog.pg_roles r WHERE r.rolname = :grantee)
+        END
+        GROUP BY 1, 2, 3
+    ) a
+    LEFT JOIN pg_catalog.pg_roles grantee ON grantee.oid = a.grantee_oid
+    LEFT JOIN pg_catalog.pg_roles grantor ON grantor.oid = a.grantor_oid
+"""
+
+_database_explode_sql = _acl_explode_sql.format(
+    privilege_bit=_privilege_bit_sql,
+    acl='datacl',
+    kind='d',
+    owner='datdba',
+    source='pg_catalog.pg_database o',
+    condition="NOT o.datistemplate AND o.datname = coalesce(:name, o.datname)",
+)
+
+_schema_explode_sql = _acl_explode_sql.format(
+    privilege_bit=_privilege_bit_sql,
+    acl='nspacl',
+    kind='n',
+    owner='nspowner',
+    source='pg_catalog.pg_namespace o',
+    condition="""
+        o.nspname != 'information_schema'
+        AND o.nspname NOT LIKE 'pg\\_%'
+        AND o.nspname NOT LIKE 'gp\\_%'
+        AND o.nspname = coalesce(:name, o.nspname)
+    """,
+)
+
+_table_explode_sql = _acl_explode_sql.format(
+    privilege_bit=_privilege_bit_sql,
+    acl='relacl',
+    kind='r',
+    owner='relowner',
+    source='pg_catalog.pg_class o JOIN pg_catalog.pg_namespace n ON n.oid = o.relnamespace',
+    condition="""
+        o.relkind IN ('r', 'v', 'm', 'p', 'f')
+        AND n.nspname = :schema
+        AND o.relname = coalesce(:name, o.relname)
+    """,
+)
+
+
+def _explode(conn: GreenPlumSession, sql: str, params: Dict[str, Optional[str]]) -> AclItems:
+    items: AclItems = {}
+
+    with conn.begin():
+        rows = conn.execute(sql, params=params)
+        for oid, grantee, grantor, privs, goptions in rows:
+            items.setdefault(oid, []).append(make_acl_item(grantee, grantor, privs, goptions))
+
+    return items
+
+
+def _parse(acls: Iterable[Tuple[int, List[str]]], grantee: Optional[str]) -> AclItems:
+    # Объекты без подходящих правил не возвращаются, как и в запросе через aclexplode
+    items: AclItems = {}
+    for oid, acl in acls:
+        parsed = (parce_acl_item(rule) for rule in acl)
+        matched = [item for item in parsed if grantee is None or item.grantee == grantee]
+        if matched:
+            items[oid] = matched
+    return items
+
+
+def get_database_acl_items(
+    conn: GreenPlumSession, database: Optional[str] = None, grantee: Optional[str] = None
+) -> AclItems:
+    if settings.ACL_READ_MODE == 'explode':
+        items = _explode(conn, _database_explode_sql, {"name": database, "grantee": grantee})
+        # Пустой результат для одного объекта: объекта нет или у него пустой ACL,
+        # различить эти случаи поможет обычный запрос
+        if items or database is None:
+            return items
+
+    acls = [get_database_acl(conn, database)] if database else get_all_database_acls(conn)
+    return _parse(((acl.oid, acl.acl) for acl in acls), grantee)
+
+
+def get_schema_acl_items(
+    conn: GreenPlumSession, schema: Optional[str] = None, grantee: Optional[str] = None
+) -> AclItems:
+    if settings.ACL_READ_MODE == 'explode':
+        items = _explode(conn, _schema_explode_sql, {"name": schema, "grantee": grantee})
+        if items or schema is None:
+            return items
+
+    acls = [get_schema_acl(conn, schema)] if schema else get_all_schema_acls(conn)
+    return _parse(((acl.oid, acl.acl) for acl in acls), grantee)
+
+
+def get_table_acl_items(
+    conn: GreenPlumSession, schema: str, table: Optional[str] = None, grantee: Optional[str] = None
+) -> AclItems:
+    if settings.ACL_READ_MODE == 'explode':
+        items = _explode(conn, _table_explode_sql, {"schema": schema, "name": table, "grantee": grantee})
+        if items or table is None:
+            return items
+
+    acls = [get_table_acl(conn, schema, table)] if table else get_all_table_acls(conn, schema)
+    return _parse(((acl.oid, acl.acl) for acl in acls), grantee)
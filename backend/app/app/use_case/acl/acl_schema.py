@@ -2,6 +2,7 @@ from typing import List
 from sqlalchemy import cast, select, ARRAY, Text, and_, not_
 
 from app.db.orm_types import GreenPlumSession
+from app.db.catalog_cache import catalog_snapshot
 from . import SchemaAclDTO
 from app.use_case.exceptions import NoSuchObject
 from app.read_model import *
@@ -30,12 +31,28 @@ _pg_schema_stmt = (
 )
 
 
-def get_all_schema_acls(conn: GreenPlumSession) -> List[SchemaAclDTO]:
+def read_all_schema_acls(conn: GreenPlumSession) -> List[SchemaAclDTO]:
+    # Всегда из базы: по этим данным планируются GRANT/REVOKE
     with conn.begin():
         rows = conn.execute(_pg_schema_stmt)
         return [SchemaAclDTO(**row) for row in rows]
 
 
+@catalog_snapshot
+def get_all_schema_acls(conn: GreenPlumSession) -> List[SchemaAclDTO]:
+    return read_all_schema_acls(conn)
+
+
+def get_schema_acls_by_names(conn: GreenPlumSession, schemas: List[str]) -> List[SchemaAclDTO]:
+    if not schemas:
+        return []
+
+    stmt = _pg_schema_stmt.where(pg_namespace.c.nspname.in_(schemas))
+    with conn.begin():
+        rows = conn.execute(stmt)
+        return [SchemaAclDTO(**row) for row in rows]
+
+
 def get_schema_acl(conn: GreenPlumSession, schema: str) -> SchemaAclDTO:
     stmt = _pg_schema_stmt.where(pg_namespace.c.nspname == schema)
     with conn.begin():
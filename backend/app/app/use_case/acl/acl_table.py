@@ -1,9 +1,10 @@
-from typing import List, Optional
-from sqlalchemy import cast, select, ARRAY, Text, func
+from typing import Iterator, List, Optional
+from sqlalchemy import cast, select, tuple_, ARRAY, Text, and_, func, not_
 from sqlalchemy.sql import Select
 
 from app.db.orm_types import GreenPlumSession
-from . import TableAclDTO
+from app.db.catalog_cache import catalog_snapshot
+from . import TableAclDTO, TableAclPageDTO
 from app.use_case.exceptions import NoSuchObject
 from app.read_model import *
 
@@ -39,6 +40,10 @@ def _table_stmt(schema: Optional[str] = None, table_name: Optional[str] = None)
     ]))
 
 
+def _sorted_table_stmt(schema: Optional[str] = None) -> Select:
+    return _table_stmt(schema=schema).order_by(pg_namespace.c.nspname, pg_class.c.relname)
+
+
 def _filter_pg_class_stmt(stmt, schema: Optional[str] = None, rel_name: Optional[str] = None) -> Select:
     if schema is not None:
         stmt = stmt.where(pg_namespace.c.nspname == schema)
@@ -52,13 +57,64 @@ def _filter_pg_class_stmt(stmt, schema: Optional[str] = None, rel_name: Optional
     return stmt
 
 
-def get_all_table_acls(conn: GreenPlumSession, schema: str) -> List[TableAclDTO]:
+def read_all_table_acls(conn: GreenPlumSession, schema: str) -> List[TableAclDTO]:
+    # Всегда из базы: по этим данным планируются GRANT/REVOKE
     stmt = _table_stmt(schema=schema)
     with conn.begin():
         rows = conn.execute(stmt)
         return [TableAclDTO(**row) for row in rows]
 
 
+@catalog_snapshot
+def get_all_table_acls(conn: GreenPlumSession, schema: str) -> List[TableAclDTO]:
+    return read_all_table_acls(conn, schema)
+
+
+def get_all_table_acls_in_database(conn: GreenPlumSession) -> List[TableAclDTO]:
+    stmt = _table_stmt().where(
+        and_(
+            pg_namespace.c.nspname != 'information_schema',
+            not_(pg_namespace.c.nspname.startswith('pg\_')),
+            not_(pg_namespace.c.nspname.startswith('gp\_'))
+        )
+    )
+    with conn.begin():
+        rows = conn.execute(stmt)
+        return [TableAclDTO(**row) for row in rows]
+
+
+def get_page_of_table_acls(
+    conn: GreenPlumSession, schema: str, after: Optional[str] = None, limit: int = 1000
+) -> TableAclPageDTO:
+    # Keyset пагинация: страница начинается сразу после последней таблицы предыдущей
+    stmt = _sorted_table_stmt(schema=schema)
+    if after is not None:
+        stmt = stmt.where(
+            tuple_(pg_namespace.c.nspname, pg_class.c.relname) > tuple_(schema, after)
+        )
+
+    with conn.begin():
+        rows = conn.execute(stmt.limit(limit))
+        items = [TableAclDTO(**row) for row in rows]
+
+    next_cursor = items[-1].name if len(items) == limit else None
+    return TableAclPageDTO(items=items, next_cursor=next_cursor)
+
+
+def iter_all_table_acls(
+    conn: GreenPlumSession, schema: str, chunk_size: int = 1000
+) -> Iterator[TableAclDTO]:
+    # Серверный курсор: в памяти держится не больше chunk_size строк
+    stmt = _sorted_table_stmt(schema=schema).execution_options(
+        stream_results=True,
+        max_row_buffer=chunk_size,
+    )
+
+    with conn.begin():
+        for row in conn.execute(stmt):
+            yield TableAclDTO(**row)
+
+
 def get_table_acl(conn: GreenPlumSession, schema: str, table: str) -> TableAclDTO:
     stmt = _table_stmt(schema=schema, table_name=table)
     with conn.begin():
@@ -1,3 +1,6 @@
+from sqlalchemy import exc
+
+
 class BaseUseCaseException(Exception):
     pass
 
@@ -28,3 +31,19 @@ class FailedToParseTextPrivileges(FailedToParseACLRule):
 
 class TypeNotImplemented(FailedToParseACLRule):
     pass
+
+
+def error_message(exc: BaseUseCaseException) -> str:
+    errors_dict = {
+        NoSuchObject: f"Object not found: '{exc}'",
+        ObjectAlreadyExists: f"Object already exists: '{exc}'",
+        DoneWithErrors: f"Executed with errors: '{exc}'",
+    }
+
+    return errors_dict.get(type(exc), "Your request is invalid, please change it and try again")
+
+
+def database_error_message(error: exc.DBAPIError) -> str:
+    # Первая строка сообщения СУБД, без контекста и подсказок
+    lines = str(error.orig).strip().splitlines()
+    return lines[0] if lines else "An unhandled exception occurred during a database query"
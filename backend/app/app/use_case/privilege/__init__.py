@@ -1,6 +1,9 @@
 # flake8: noqa
 from .privilege_dto import *
+from .privilege_mask import *
 from .privilege_privilege import *
+from .privilege_plan import *
 from .privilege_grant_database import *
 from .privilege_grant_schema import *
 from .privilege_grant_table import *
+from .privilege_grant_batch import *
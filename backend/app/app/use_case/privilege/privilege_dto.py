@@ -1,5 +1,5 @@
 from attrs import define
-from typing import List
+from typing import List, Optional
 
 
 @define
@@ -83,3 +83,21 @@ class GrantTableDTO(GrantDTO):
     database: str
     db_schema: str
     privileges: GrantTablePrivelegesDTO
+
+
+@define
+class GrantBatchEntryDTO(GrantDTO):
+    database: str
+    db_schema: Optional[str]
+    table: Optional[str]
+    privileges: List[str]
+
+
+@define
+class GrantBatchResultDTO(DTO):
+    database: str
+    schema: Optional[str]
+    table: Optional[str]
+    role_specification: str
+    touched: int
+    error: Optional[str]
@@ -0,0 +1,161 @@
+from typing import Dict, List, Optional, Set, Tuple
+from sqlalchemy import exc
+
+from app.db.greenplum import session_database, sibling_session
+from app.db.orm_types import GreenPlumSession
+from app.use_case.exceptions import database_error_message
+from . import GrantBatchEntryDTO, GrantBatchResultDTO, GrantPlan, ObjectName, Target
+from . import grantor_resolver, privilege_bits, privileges_to_mask
+from .privilege_plan import _all_privileges
+from app.use_case.acl.acl_batch import ObjectKey, get_acls_of_objects
+
+
+def _object_of(entry: GrantBatchEntryDTO) -> Optional[Tuple[str, ObjectName, ObjectKey]]:
+    if entry.table is not None:
+        if entry.db_schema is None:
+            return None
+        return 'table', (entry.db_schema, entry.table), (None, entry.db_schema, entry.table)
+    if entry.db_schema is not None:
+        return 'schema', (entry.db_schema,), (None, entry.db_schema, None)
+    return 'database', (entry.database,), (entry.database, None, None)
+
+
+def _check_privileges(kind: str, privileges: List[str]) -> Optional[str]:
+    unknown = [p for p in privileges if p not in privilege_bits]
+    if unknown:
+        return f"Unknown privileges: {', '.join(unknown)}"
+
+    unsupported = privileges_to_mask(privileges) & ~_all_privileges[kind]
+    if unsupported:
+        return f"Privileges are not applicable to {kind}: {', '.join(p for p in privileges if privilege_bits[p] & unsupported)}"
+
+    return None
+
+
+def _result(entry: GrantBatchEntryDTO, touched: int, error: Optional[str]) -> GrantBatchResultDTO:
+    return GrantBatchResultDTO(
+        database=entry.database,
+        schema=entry.db_schema,
+        table=entry.table,
+        role_specification=entry.role_specification,
+        touched=touched,
+        error=error,
+    )
+
+
+def _grant_batch_in_database(
+    conn: GreenPlumSession, entries: Dict[int, GrantBatchEntryDTO]
+) -> Dict[int, GrantBatchResultDTO]:
+    errors: Dict[int, str] = {}
+    objects: Dict[int, Tuple[str, ObjectName, ObjectKey]] = {}
+
+    for number, entry in entries.items():
+        obj = _object_of(entry)
+        if obj is None:
+            errors[number] = "Table requires schema"
+            continue
+
+        error = _check_privileges(obj[0], entry.privileges)
+        if error is not None:
+            errors[number] = error
+            continue
+
+        objects[number] = obj
+
+    # ACL всех объектов читаются одним запросом
+    acls = get_acls_of_objects(
+        conn,
+        databases=[name[0] for kind, name, _ in objects.values() if kind == 'database'],
+        schemas=[name[0] for kind, name, _ in objects.values() if kind == 'schema'],
+        tables=[(name[0], name[1]) for kind, name, _ in objects.values() if kind == 'table'],
+    )
+
+    grantor_of = grantor_resolver(conn)
+    plans: Dict[int, GrantPlan] = {}
+    seen: Set[Target] = set()
+
+    for number, (kind, name, key) in objects.items():
+        entry = entries[number]
+        if key not in acls:
+            errors[number] = f"Object not found: '{'.'.join(name)}'"
+            continue
+
+        # Планы строятся от одного исходного ACL, поэтому объект и роль не должны повторяться
+        target = (kind, name, entry.role_specification)
+        if target in seen:
+            errors[number] = "Duplicate entry"
+            continue
+        seen.add(target)
+
+        owner, acl = acls[key]
+        plan = GrantPlan(grantor_of)
+        plan.add(
+            kind,
+            [(name, owner, acl)],
+            entry.role_specification,
+            privileges_to_mask(entry.privileges),
+            entry.with_grant_option,
+            exact=True,
+        )
+        plans[number] = plan
+
+    batch = GrantPlan(grantor_of)
+    for plan in plans.values():
+        batch.extend(plan)
+
+    try:
+        batch.execute_own(conn)
+    except exc.DatabaseError:
+        # Транзакция откатилась целиком: выполняем записи по одной, чтобы найти ошибочные
+        for number, plan in plans.items():
+            try:
+                plan.execute_own(conn)
+            except exc.DatabaseError as error:
+                errors[number] = database_error_message(error)
+
+    foreign = GrantPlan(grantor_of)
+    for number, plan in plans.items():
+        if number not in errors:
+            foreign.extend(plan)
+
+    failed = foreign.execute_foreign(conn)
+    for number, plan in plans.items():
+        if number not in errors and plan.touched & failed:
+            errors[number] = "Privileges given by other grantors were not revoked"
+
+    return {
+        number: _result(
+            entry,
+            len(plans[number].touched) if number in plans and number not in errors else 0,
+            errors.get(number),
+        ) for number, entry in entries.items()
+    }
+
+
+def grant_batch(conn: GreenPlumSession, entries: List[GrantBatchEntryDTO]) -> List[GrantBatchResultDTO]:
+    # Схемы и таблицы меняются в базе, указанной в записи, каждая база — своей сессией.
+    # Права на базу данных выдаются из любой базы кластера
+    current = session_database(conn)
+    groups: Dict[str, Dict[int, GrantBatchEntryDTO]] = {}
+    for number, entry in enumerate(entries):
+        database = current if entry.db_schema is None and entry.table is None else entry.database
+        groups.setdefault(database, {})[number] = entry
+
+    results: Dict[int, GrantBatchResultDTO] = {}
+    for database, group in groups.items():
+        if database == current:
+            results.update(_grant_batch_in_database(conn, group))
+            continue
+
+        try:
+            database_conn = sibling_session(conn, database)
+            try:
+                results.update(_grant_batch_in_database(database_conn, group))
+            finally:
+                database_conn.close()
+        except exc.SQLAlchemyError as error:
+            # Например, нет подключения к базе или пул занят: записи группы считаются невыполненными
+            message = database_error_message(error) if isinstance(error, exc.DBAPIError) else str(error)
+            results.update({number: _result(entry, 0, message) for number, entry in group.items()})
+
+    return [results[number] for number in range(len(entries))]
@@ -1,13 +1,16 @@
-from typing import Iterator, List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List
 from sqlalchemy import exc
 
 from app.core.config import settings
-from app.use_case.exceptions import DoneWithErrors
+from app.db.greenplum import free_connections, sibling_session
 from app.db.orm_types import GreenPlumSession
+from app.use_case.exceptions import DoneWithErrors
+from app.use_case.progress import Progress, no_progress
 from . import GrantTablePrivelegesDTO, GrantTablesInSchemaDTO, GrantTableDTO, GrantTablesInDatabaseDTO
+from . import GrantPlan, grantor_resolver, plan_grants, privileges_to_mask
 from app.read_model import *
-from app.use_case.acl import get_table_acl
-from app.use_case.privilege import parce_acl_rules
+from app.use_case.acl import TableAclDTO, get_all_table_acls_in_database, get_table_acl, read_all_table_acls
 
 
 def _calc_grant_options(privileges: GrantTablePrivelegesDTO) -> List[str]:
@@ -51,86 +54,6 @@ def _calc_revoke_options(privileges: GrantTablePrivelegesDTO, *, all: bool = Fal
     )
 
 
-def _grant_tables_in_database_permissions(conn: GreenPlumSession, payload: GrantTablesInDatabaseDTO) -> None:
-    '''
-    GRANT { { SELECT | INSERT | UPDATE | DELETE | TRUNCATE | REFERENCES | TRIGGER }
-        [, ...] | ALL [ PRIVILEGES ] }
-        ON { [ TABLE ] table_name [, ...]
-            | ALL TABLES IN SCHEMA schema_name [, ...] }
-        TO role_specification [, ...] [ WITH GRANT OPTION ]
-    '''
-
-    grant_options = _calc_grant_options(payload.privileges)
-
-    if not grant_options:
-        return
-
-    sql_command = """
-        DO $$
-        DECLARE
-            ns VARCHAR;
-            query VARCHAR;
-        BEGIN
-            FOR ns IN 
-                SELECT nspname
-                FROM pg_namespace
-                WHERE nspname <> 'information_schema'
-                    AND nspname NOT LIKE 'pg\_%'
-                    AND nspname NOT LIKE 'gp\_%'
-            LOOP
-                query := FORMAT(
-                    'GRANT %s ON ALL TABLES IN SCHEMA "%s" TO "%s" %s',
-                    :grant_options, ns, :role_specification, :with_grant_option
-                );
-                EXECUTE query;
-            END LOOP;
-        END $$
-    """
-
-    conn.execute(
-        sql_command,
-        params={
-            "grant_options": ', '.join(grant_options),
-            "role_specification": payload.role_specification,
-            "with_grant_option": 'WITH GRANT OPTION' if payload.with_grant_option else '',
-        },
-    )
-
-
-def _grant_tables_in_schema_permissions(conn: GreenPlumSession, payload: GrantTablesInSchemaDTO) -> None:
-    '''
-    GRANT { { SELECT | INSERT | UPDATE | DELETE | TRUNCATE | REFERENCES | TRIGGER }
-        [, ...] | ALL [ PRIVILEGES ] }
-        ON { [ TABLE ] table_name [, ...]
-            | ALL TABLES IN SCHEMA schema_name [, ...] }
-        TO role_specification [, ...] [ WITH GRANT OPTION ]
-    '''
-
-    grant_options = _calc_grant_options(payload.privileges)
-
-    if not grant_options:
-        return
-
-    sql_command = """
-        DO $$ BEGIN
-            EXECUTE FORMAT(
-                'GRANT %s ON ALL TABLES IN SCHEMA "%s" TO "%s" %s',
-                :grant_options, :schema_name, :role_specification, :with_grant_option
-            );
-        END $$
-    """
-
-    conn.execute(
-        sql_command,
-        params={
-            "grant_options": ', '.join(grant_options),
-            "schema_name": payload.db_schema,
-            "role_specification": payload.role_specification,
-            "with_grant_option": 'WITH GRANT OPTION' if payload.with_grant_option else '',
-        },
-    )
-
-
 def _grant_tables_in_schema_permissions_default(conn: GreenPlumSession, payload: GrantTablesInSchemaDTO) -> None:
     '''
     ALTER DEFAULT PRIVILEGES
@@ -171,123 +94,6 @@ def _grant_tables_in_schema_permissions_default(conn: GreenPlumSession, payload:
     )
 
 
-def _grant_table_permissions(conn: GreenPlumSession, payload: GrantTableDTO) -> None:
-    '''
-    GRANT { { SELECT | INSERT | UPDATE | REFERENCES } ( column_name [, ...] )
-        [, ...] | ALL [ PRIVILEGES ] ( column_name [, ...] ) }
-        ON [ TABLE ] table_name [, ...]
-        TO role_specification [, ...] [ WITH GRANT OPTION ]
-    '''
-
-    grant_options = _calc_grant_options(payload.privileges)
-
-    if not grant_options:
-        return
-
-    sql_command = """
-        DO $$ BEGIN
-            SET ROLE NONE;
-            EXECUTE FORMAT(
-                'GRANT %s ON TABLE "%s"."%s" TO "%s" %s',
-                :grant_options, :schema_name, :table_name, :role_specification, :with_grant_option
-            );
-        END $$
-    """
-
-    conn.execute(
-        sql_command,
-        params={
-            "grant_options": ', '.join(grant_options),
-            "schema_name": payload.db_schema,
-            "table_name": payload.name,
-            "role_specification": payload.role_specification,
-            "with_grant_option": 'WITH GRANT OPTION' if payload.with_grant_option else '',
-        },
-    )
-
-
-def _revoke_tables_in_database_permissions(conn: GreenPlumSession, payload: GrantTablesInDatabaseDTO) -> None:
-    '''
-    REVOKE [ GRANT OPTION FOR ]
-        { { SELECT | INSERT | UPDATE | DELETE | TRUNCATE | REFERENCES | TRIGGER }
-        [, ...] | ALL [ PRIVILEGES ] }
-        ON { [ TABLE ] table_name [, ...]
-            | ALL TABLES IN SCHEMA schema_name [, ...] }
-        FROM role_specification [, ...]
-        [ CASCADE | RESTRICT ]
-    '''
-
-    revoke_options = _calc_revoke_options(payload.privileges)
-
-    if not revoke_options:
-        return
-
-    sql_command = """
-        DO $$
-        DECLARE
-            ns VARCHAR;
-            query VARCHAR;
-        BEGIN
-            FOR ns IN 
-                SELECT nspname
-                FROM pg_namespace
-                WHERE nspname <> 'information_schema'
-                    AND nspname NOT LIKE 'pg\_%'
-                    AND nspname NOT LIKE 'gp\_%'
-            LOOP
-                query := FORMAT(
-                    'REVOKE %s ON ALL TABLES IN SCHEMA "%s" FROM "%s" CASCADE',
-                    :revoke_options, ns, :role_specification
-                );
-                EXECUTE query;
-            END LOOP;
-        END $$
-    """
-
-    conn.execute(
-        sql_command,
-        params={
-            "revoke_options": ', '.join(revoke_options),
-            "role_specification": payload.role_specification,
-        },
-    )
-
-
-def _revoke_tables_in_schema_permissions(conn: GreenPlumSession, payload: GrantTablesInSchemaDTO) -> None:
-    '''
-    REVOKE [ GRANT OPTION FOR ]
-        { { SELECT | INSERT | UPDATE | DELETE | TRUNCATE | REFERENCES | TRIGGER }
-        [, ...] | ALL [ PRIVILEGES ] }
-        ON { [ TABLE ] table_name [, ...]
-            | ALL TABLES IN SCHEMA schema_name [, ...] }
-        FROM role_specification [, ...]
-        [ CASCADE | RESTRICT ]
-    '''
-
-    revoke_options = _calc_revoke_options(payload.privileges)
-
-    if not revoke_options:
-        return
-
-    sql_command = """
-        DO $$ BEGIN
-            EXECUTE FORMAT(
-                'REVOKE %s ON ALL TABLES IN SCHEMA "%s" FROM "%s" CASCADE',
-                :revoke_options, :schema_name, :role_specification
-            );
-        END $$
-    """
-
-    conn.execute(
-        sql_command,
-        params={
-            "revoke_options": ', '.join(revoke_options),
-            "schema_name": payload.db_schema,
-            "role_specification": payload.role_specification,
-        }
-    )
-
-
 def _revoke_tables_in_schema_permissions_default(conn: GreenPlumSession, payload: GrantTablesInSchemaDTO) -> None:
     '''
     ALTER DEFAULT PRIVILEGES
@@ -329,85 +135,118 @@ def _revoke_tables_in_schema_permissions_default(conn: GreenPlumSession, payload
     )
 
 
-def _revoke_table_permissions(conn: GreenPlumSession, payload: GrantTableDTO, grantor: Optional[str] = None) -> None:
-    '''
-    REVOKE [ GRANT OPTION FOR ]
-        { { SELECT | INSERT | UPDATE | REFERENCES } ( column_name [, ...] )
-        [, ...] | ALL [ PRIVILEGES ] ( column_name [, ...] ) }
-        ON [ TABLE ] table_name [, ...]
-        FROM role_specification [, ...]
-        [ CASCADE | RESTRICT ]
-    '''
-
-    revoke_options = _calc_revoke_options(payload.privileges, all=True)
-
-    if not revoke_options:
-        return
-
-    sql_command = """
-        DO $$ BEGIN
-            EXECUTE FORMAT('SET ROLE %s', :grantor);
-            EXECUTE FORMAT(
-                'REVOKE %s ON TABLE "%s"."%s" FROM "%s" CASCADE',
-                :revoke_options, :schema_name, :table_name, :role_specification
-            );
-        END $$
-    """
-
-    conn.execute(
-        sql_command,
-        params={
-            "grantor": f'"{grantor}"' if grantor else 'NONE',
-            "revoke_options": ', '.join(revoke_options),
-            "schema_name": payload.db_schema,
-            "table_name": payload.name,
-            "role_specification": payload.role_specification,
-        }
+def _grant_tables_in_one_schema(
+    conn: GreenPlumSession,
+    grantor_of: Callable[[str], str],
+    tables: List[TableAclDTO],
+    payload: GrantTablesInDatabaseDTO,
+    privileges: int,
+) -> int:
+    plan = GrantPlan(grantor_of)
+    plan.add(
+        'table',
+        (((table.schema, table.name), table.owner, table.acl) for table in tables),
+        payload.role_specification,
+        privileges,
+        payload.with_grant_option,
+        exact=False,
     )
-
-
-def _grantors_of_table_acl(conn: GreenPlumSession, payload: GrantTableDTO) -> Iterator[str]:
-    relation = get_table_acl(conn, payload.db_schema, payload.name)
-    for privilege in parce_acl_rules(relation.acl, final=False):
-        if privilege.grantee == payload.role_specification:
-            yield privilege.grantor
-
-
-def grant_all_tables_in_database(conn: GreenPlumSession, payload: GrantTablesInDatabaseDTO) -> None:
-    with conn.begin():
-        _revoke_tables_in_database_permissions(conn, payload)
-        _grant_tables_in_database_permissions(conn, payload)
-
-
-def grant_all_tables_in_schema(conn: GreenPlumSession, payload: GrantTablesInSchemaDTO) -> None:
-    with conn.begin():
-        _revoke_tables_in_schema_permissions(conn, payload)
-        _grant_tables_in_schema_permissions(conn, payload)
+    return plan.execute(conn)
+
+
+def _grant_tables_in_one_schema_apart(
+    conn: GreenPlumSession,
+    grantor_of: Callable[[str], str],
+    tables: List[TableAclDTO],
+    payload: GrantTablesInDatabaseDTO,
+    privileges: int,
+) -> int:
+    # Сессии не потокобезопасны, поэтому каждый поток берет свое соединение из пула
+    schema_conn = sibling_session(conn)
+    try:
+        return _grant_tables_in_one_schema(schema_conn, grantor_of, tables, payload, privileges)
+    finally:
+        schema_conn.close()
+
+
+def grant_all_tables_in_database(
+    conn: GreenPlumSession, payload: GrantTablesInDatabaseDTO, progress: Progress = no_progress
+) -> int:
+    schemas: Dict[str, List[TableAclDTO]] = {}
+    for table in get_all_table_acls_in_database(conn):
+        schemas.setdefault(table.schema, []).append(table)
+
+    # Каждая схема выполняется отдельной транзакцией, блокировки не держатся до конца обхода.
+    # Прогресс считается по схемам
+    grantor_of = grantor_resolver(conn)
+    privileges = privileges_to_mask(_calc_grant_options(payload.privileges))
+    touched = 0
+    failed: List[str] = []
+
+    # Пул общий с запросами и другими задачами: потоков не больше, чем свободных соединений,
+    # одно остается запросам. Если пул все же исчерпан, TimeoutError попадает только в свою схему
+    parallelism = settings.GRANT_PARALLELISM
+    free = free_connections(conn)
+    if free is not None:
+        parallelism = min(parallelism, free - 1)
+
+    progress(0, len(schemas))
+    if parallelism <= 1 or len(schemas) <= 1:
+        for done, (schema, tables) in enumerate(schemas.items(), 1):
+            try:
+                touched += _grant_tables_in_one_schema(conn, grantor_of, tables, payload, privileges)
+            except (exc.SQLAlchemyError, DoneWithErrors):
+                failed.append(schema)
+            progress(done, len(schemas))
+    else:
+        with ThreadPoolExecutor(max_workers=parallelism) as executor:
+            futures = {
+                executor.submit(
+                    _grant_tables_in_one_schema_apart, conn, grantor_of, tables, payload, privileges
+                ): schema for schema, tables in schemas.items()
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                try:
+                    touched += future.result()
+                except (exc.SQLAlchemyError, DoneWithErrors):
+                    failed.append(futures[future])
+                progress(done, len(schemas))
+
+    if failed:
+        raise DoneWithErrors(", ".join(sorted(failed)))
+
+    return touched
+
+
+def grant_all_tables_in_schema(conn: GreenPlumSession, payload: GrantTablesInSchemaDTO) -> int:
+    tables = read_all_table_acls(conn, payload.db_schema)
+    plan = plan_grants(
+        conn,
+        'table',
+        (((table.schema, table.name), table.owner, table.acl) for table in tables),
+        payload.role_specification,
+        privileges_to_mask(_calc_grant_options(payload.privileges)),
+        payload.with_grant_option,
+        exact=False,
+    )
+    touched = plan.execute(conn)
 
     with conn.begin():
         _revoke_tables_in_schema_permissions_default(conn, payload)
         _grant_tables_in_schema_permissions_default(conn, payload)
 
+    return touched
 
-def grant_on_table(conn: GreenPlumSession, payload: GrantTableDTO) -> None:
-    with conn.begin():
-        _revoke_table_permissions(conn, payload)
-
-    grantors = []
-    if settings.DEEP_REVOKE:
-        grantors = list(_grantors_of_table_acl(conn, payload))
-
-    done_with_errors = False
-    for grantor in grantors:
-        try:
-            with conn.begin():
-                _revoke_table_permissions(conn, payload, grantor)
-        except exc.DatabaseError:
-            # У пользователь, который выдал права, может не быть доступа к таблице
-            done_with_errors = True
 
-    with conn.begin():
-        _grant_table_permissions(conn, payload)
-
-    if done_with_errors:
-        raise DoneWithErrors(payload.name)
+def grant_on_table(conn: GreenPlumSession, payload: GrantTableDTO) -> int:
+    table = get_table_acl(conn, payload.db_schema, payload.name)
+    plan = plan_grants(
+        conn,
+        'table',
+        [((table.schema, table.name), table.owner, table.acl)],
+        payload.role_specification,
+        privileges_to_mask(_calc_grant_options(payload.privileges)),
+        payload.with_grant_option,
+        exact=True,
+    )
+    return plan.execute(conn)
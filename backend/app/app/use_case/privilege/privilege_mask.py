@@ -0,0 +1,102 @@
+import sys
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Tuple
+
+from . import PrivilegeDTO
+
+# Порядок битов совпадает с ACL_ALL_RIGHTS_STR из исходников PostgreSQL
+_privilege_symbols: List[Tuple[str, str]] = [
+    ('a', 'INSERT'),
+    ('r', 'SELECT'),
+    ('w', 'UPDATE'),
+    ('d', 'DELETE'),
+    ('D', 'TRUNCATE'),
+    ('x', 'REFERENCES'),
+    ('t', 'TRIGGER'),
+    ('X', 'EXECUTE'),
+    ('U', 'USAGE'),
+    ('C', 'CREATE'),
+    ('T', 'TEMPORARY'),
+    ('c', 'CONNECT'),
+]
+
+symbol_bits: Dict[str, int] = {
+    symbol: 1 << bit for bit, (symbol, _) in enumerate(_privilege_symbols)
+}
+
+privilege_bits: Dict[str, int] = {
+    name: 1 << bit for bit, (_, name) in enumerate(_privilege_symbols)
+}
+
+
+class AclItem(NamedTuple):
+    """Внутреннее представление aclitem: privs содержит все права, goptions — права с WITH GRANT OPTION."""
+    grantee: str
+    grantor: str
+    privs: int
+    goptions: int
+
+
+def make_acl_item(grantee: str, grantor: str, privs: int, goptions: int = 0) -> AclItem:
+    # Имена ролей повторяются в каждом aclitem, храним одну копию строки
+    return AclItem(sys.intern(grantee), sys.intern(grantor), privs | goptions, goptions)
+
+
+def privileges_to_mask(privileges: Iterable[str]) -> int:
+    mask = 0
+    for privilege in privileges:
+        mask |= privilege_bits[privilege]
+    return mask
+
+
+def symbols_to_mask(symbols: str) -> int:
+    mask = 0
+    for symbol in symbols:
+        mask |= symbol_bits[symbol]
+    return mask
+
+
+@lru_cache(maxsize=None)
+def mask_to_privileges(mask: int) -> Tuple[str, ...]:
+    return tuple(name for name, bit in privilege_bits.items() if mask & bit)
+
+
+def has_privilege(item: AclItem, privilege: str, *, with_grant_option: bool = False) -> bool:
+    mask = item.goptions if with_grant_option else item.privs
+    return bool(mask & privilege_bits[privilege])
+
+
+def diff_masks(current: int, target: int) -> Tuple[int, int]:
+    """Возвращает права, которые нужно выдать и отозвать, чтобы получить target из current."""
+    return target & ~current, current & ~target
+
+
+def acl_item_to_dto(item: AclItem) -> PrivilegeDTO:
+    return PrivilegeDTO(
+        grantee=item.grantee,
+        grantor=item.grantor,
+        privs=list(mask_to_privileges(item.privs & ~item.goptions)),
+        privswgo=list(mask_to_privileges(item.goptions)),
+    )
+
+
+def merge_acl_items(items: Iterable[AclItem]) -> Iterator[PrivilegeDTO]:
+    # Объединяем права по роли, которой они выданы, в grantor возвращаем количество правил
+    merged: Dict[str, List[int]] = {}
+
+    for item in items:
+        acc = merged.get(item.grantee)
+        if acc is None:
+            merged[item.grantee] = [1, item.privs, item.goptions]
+        else:
+            acc[0] += 1
+            acc[1] |= item.privs
+            acc[2] |= item.goptions
+
+    for grantee, (count, privs, goptions) in merged.items():
+        yield PrivilegeDTO(
+            grantee=grantee,
+            grantor=count,
+            privs=list(mask_to_privileges(privs & ~goptions)),
+            privswgo=list(mask_to_privileges(goptions)),
+        )
@@ -0,0 +1,207 @@
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import exc
+
+from app.core.config import settings
+from app.db.orm_types import GreenPlumSession
+from app.use_case.exceptions import DoneWithErrors
+from . import mask_to_privileges, parce_acl_item, symbols_to_mask
+
+# Имя объекта: (база,), (схема,) или (схема, таблица)
+ObjectName = Tuple[str, ...]
+
+_targets = {
+    'database': 'DATABASE %1$I',
+    'schema': 'SCHEMA %1$I',
+    'table': 'TABLE %1$I.%2$I',
+}
+
+# https://www.postgresql.org/docs/current/ddl-priv.html
+_all_privileges = {
+    'database': symbols_to_mask("CTc"),
+    'schema': symbols_to_mask("UC"),
+    'table': symbols_to_mask("arwdDxt"),
+}
+
+_session_role_sql = """
+    SELECT r.rolname, r.rolsuper
+    FROM pg_catalog.pg_roles r
+    WHERE r.rolname = session_user
+"""
+
+# Одна команда для группы объектов: имена передаются массивами и экранируются через %I
+_execute_plan_sql = """
+    DO $$
+    DECLARE
+        target RECORD;
+    BEGIN
+        EXECUTE FORMAT('SET ROLE %s', :grantor);
+        FOR target IN
+            SELECT * FROM unnest(
+                CAST(:first AS TEXT[]), CAST(:second AS TEXT[]), CAST(:role AS TEXT[])
+            ) AS t(first, second, role)
+        LOOP
+            EXECUTE FORMAT(:command, target.first, target.second, target.role);
+        END LOOP;
+        RESET ROLE;
+    END $$
+"""
+
+# Объект и роль, права которой на него меняются
+Target = Tuple[str, ObjectName, str]
+CommandKey = Tuple[Optional[str], int, str]
+
+
+class GrantPlan():
+    """Минимальный набор GRANT/REVOKE, который приводит права ролей к запрошенным."""
+    grantor_of: Callable[[str], str]
+    touched: Set[Target]
+    _commands: Dict[CommandKey, List[Target]]
+
+    def __init__(self, grantor_of: Callable[[str], str]) -> None:
+        self.grantor_of = grantor_of
+        self.touched = set()
+        # (grantor, порядок выполнения, команда) -> объекты и роли
+        self._commands = {}
+
+    def _add(self, grantor: Optional[str], order: int, command: str, target: Target, mask: int) -> None:
+        privileges = ", ".join(mask_to_privileges(mask))
+        key = (grantor, order, command.format(privileges=privileges, target=_targets[target[0]]))
+        self._commands.setdefault(key, []).append(target)
+        self.touched.add(target)
+
+    def revoke(self, target: Target, mask: int) -> None:
+        self._add(None, 0, 'REVOKE {privileges} ON {target} FROM %3$I CASCADE', target, mask)
+
+    def revoke_grant_option(self, target: Target, mask: int) -> None:
+        self._add(None, 1, 'REVOKE GRANT OPTION FOR {privileges} ON {target} FROM %3$I CASCADE', target, mask)
+
+    def grant(self, target: Target, mask: int, with_grant_option: bool) -> None:
+        command = 'GRANT {privileges} ON {target} TO %3$I'
+        if with_grant_option:
+            command += ' WITH GRANT OPTION'
+        self._add(None, 2, command, target, mask)
+
+    def revoke_as(self, grantor: str, target: Target) -> None:
+        command = 'REVOKE {privileges} ON {target} FROM %3$I CASCADE'
+        self._add(grantor, 0, command, target, _all_privileges[target[0]])
+
+    def add(
+        self,
+        kind: str,
+        objects: Iterable[Tuple[ObjectName, str, List[str]]],
+        role_specification: str,
+        privileges: int,
+        with_grant_option: bool,
+        *,
+        exact: bool,
+    ) -> None:
+        '''
+        exact=True: у роли остаются ровно запрошенные права, в том числе GRANT OPTION,
+        а с DEEP_REVOKE отзываются права, выданные другими ролями.
+        exact=False: запрошенные права выдаются, остальные отзываются,
+        уже выданные GRANT OPTION не снимаются.
+        '''
+
+        for name, owner, acl in objects:
+            target = (kind, name, role_specification)
+            grantor = self.grantor_of(owner)
+            privs = goptions = 0
+            foreign: Set[str] = set()
+
+            for item in map(parce_acl_item, acl):
+                if item.grantee != role_specification:
+                    continue
+                if item.grantor == grantor:
+                    privs |= item.privs
+                    goptions |= item.goptions
+                elif item.privs:
+                    foreign.add(item.grantor)
+
+            to_revoke = privs & ~privileges
+            to_grant = privileges & ~(goptions if with_grant_option else privs)
+            to_revoke_grant_option = goptions & privileges if exact and not with_grant_option else 0
+
+            if to_revoke:
+                self.revoke(target, to_revoke)
+            if to_revoke_grant_option:
+                self.revoke_grant_option(target, to_revoke_grant_option)
+            if to_grant:
+                self.grant(target, to_grant, with_grant_option)
+
+            if exact and settings.DEEP_REVOKE:
+                for other in sorted(foreign):
+                    self.revoke_as(other, target)
+
+    def extend(self, other: 'GrantPlan') -> None:
+        for key, targets in other._commands.items():
+            self._commands.setdefault(key, []).extend(targets)
+        self.touched.update(other.touched)
+
+    def _execute(self, conn: GreenPlumSession, grantor: Optional[str], command: str, targets: List[Target]) -> None:
+        conn.execute(
+            _execute_plan_sql,
+            params={
+                "grantor": f'"{grantor}"' if grantor else 'NONE',
+                "first": [name[0] for _, name, _ in targets],
+                "second": [name[1] if len(name) > 1 else None for _, name, _ in targets],
+                "role": [role for _, _, role in targets],
+                "command": command,
+            },
+        )
+
+    def _sorted_commands(self, *, own: bool) -> List[Tuple[CommandKey, List[Target]]]:
+        commands = [(key, targets) for key, targets in self._commands.items() if (key[0] is None) == own]
+        return sorted(commands, key=lambda item: (item[0][0] or '', item[0][1]))
+
+    def execute_own(self, conn: GreenPlumSession) -> None:
+        # Все команды от своего имени выполняются в одной транзакции
+        commands = self._sorted_commands(own=True)
+        if not commands:
+            return
+
+        with conn.begin():
+            for (_, _, command), targets in commands:
+                self._execute(conn, None, command, targets)
+
+    def execute_foreign(self, conn: GreenPlumSession) -> Set[Target]:
+        failed: Set[Target] = set()
+        for (grantor, _, command), targets in self._sorted_commands(own=False):
+            try:
+                with conn.begin():
+                    self._execute(conn, grantor, command, targets)
+            except exc.DatabaseError:
+                # У пользователь, который выдал права, может не быть доступа к объекту
+                failed.update(targets)
+        return failed
+
+    def execute(self, conn: GreenPlumSession) -> int:
+        self.execute_own(conn)
+        failed = self.execute_foreign(conn)
+
+        if failed:
+            raise DoneWithErrors(", ".join(".".join(name) for _, name, _ in sorted(failed)))
+
+        return len(self.touched)
+
+
+def grantor_resolver(conn: GreenPlumSession) -> Callable[[str], str]:
+    # Суперпользователь и владелец выдают права от имени владельца объекта
+    with conn.begin():
+        rolname, rolsuper = conn.execute(_session_role_sql).first()
+
+    return lambda owner: owner if rolsuper or owner == rolname else rolname
+
+
+def plan_grants(
+    conn: GreenPlumSession,
+    kind: str,
+    objects: Iterable[Tuple[ObjectName, str, List[str]]],
+    role_specification: str,
+    privileges: int,
+    with_grant_option: bool,
+    *,
+    exact: bool,
+) -> GrantPlan:
+    plan = GrantPlan(grantor_resolver(conn))
+    plan.add(kind, objects, role_specification, privileges, with_grant_option, exact=exact)
+    return plan
@@ -1,8 +1,9 @@
-import re
-from collections import namedtuple
-from typing import Dict, List, Iterator
+from functools import lru_cache
+from typing import List, Iterator, Optional, Tuple
 
 from . import PrivilegeDTO
+from .privilege_mask import AclItem, acl_item_to_dto, make_acl_item, merge_acl_items, symbol_bits
+from app.core.config import settings
 from app.use_case.exceptions import FailedToParseACLRule, FailedToParseACLSymbols, FailedToParseTextPrivileges
 
 _valid_privileges = {
@@ -21,17 +22,6 @@ _valid_privileges = {
     'ALL': '',
 }
 
-_valid_privileges_inv = {
-    v: k for k, v in _valid_privileges.items()
-}
-
-
-def _decode_acl(acl_symbols: List[str]) -> List[str]:
-    try:
-        return [_valid_privileges_inv[symbol] for symbol in acl_symbols]
-    except KeyError:
-        raise FailedToParseACLSymbols(acl_symbols)
-
 
 def _encode_acl(privileges: List[str]) -> List[str]:
     try:
@@ -40,40 +30,65 @@ def _encode_acl(privileges: List[str]) -> List[str]:
         raise FailedToParseTextPrivileges(privileges)
 
 
-def _parce_acl_rule_light(acl: str) -> PrivilegeDTO:
-    re_res = re.findall('[^=/"]+', acl)
-    re_res_len = len(re_res)
-    no_acl_line = "=/" in acl
+def _read_role(acl: str, pos: int, stop: Optional[str]) -> Tuple[str, int]:
+    # Имя роли в кавычках может содержать любые символы, кавычка экранируется удвоением
+    if pos < len(acl) and acl[pos] == '"':
+        chars = []
+        pos += 1
+        while pos < len(acl):
+            char = acl[pos]
+            if char == '"':
+                if acl[pos + 1:pos + 2] != '"':
+                    return ''.join(chars), pos + 1
+                pos += 1
+            chars.append(char)
+            pos += 1
+        raise FailedToParseACLRule(acl)
+
+    end = len(acl) if stop is None else acl.find(stop, pos)
+    if end < 0:
+        raise FailedToParseACLRule(acl)
+    return acl[pos:end], end
 
-    if re_res_len == 3:
-        grantee, acl_line, grantor = re_res
-    elif re_res_len == 2:
-        if no_acl_line:
-            acl_line, grantee, grantor = '', *re_res,
+
+def _parse_acl_item(acl: str) -> AclItem:
+    # Разбор aclitem за один проход: grantee=privs/grantor
+    grantee, pos = _read_role(acl, 0, '=')
+    if acl[pos:pos + 1] != '=':
+        raise FailedToParseACLRule(acl)
+
+    privs = 0
+    goptions = 0
+    pos += 1
+    size = len(acl)
+    while pos < size and acl[pos] != '/':
+        bit = symbol_bits.get(acl[pos])
+        if bit is None:
+            raise FailedToParseACLSymbols(acl)
+
+        if acl[pos + 1:pos + 2] == '*':
+            goptions |= bit
+            pos += 2
         else:
-            grantee, acl_line, grantor = '', *re_res
-    elif re_res_len == 1 and no_acl_line:
-        grantee, acl_line, grantor = '', '', *re_res
-    else:
+            privs |= bit
+            pos += 1
+
+    if pos >= size:
         raise FailedToParseACLRule(acl)
 
-    return PrivilegeDTO(
-        grantee,
-        grantor,
-        privswgo=re.findall('[^*](?=[*])', acl_line),
-        privs=re.findall('[^*](?=[^*]|$)', acl_line),
-    )
+    grantor, pos = _read_role(acl, pos + 1, None)
+    if pos != size:
+        raise FailedToParseACLRule(acl)
 
+    return make_acl_item(grantee, grantor, privs, goptions)
 
-def parce_one_acl_rule(acl: str) -> PrivilegeDTO:
-    priv = _parce_acl_rule_light(acl)
 
-    return PrivilegeDTO(
-        priv.grantee,
-        priv.grantor,
-        privswgo=_decode_acl(priv.privswgo),
-        privs=_decode_acl(priv.privs),
-    )
+# На реальных кластерах одни и те же aclitem повторяются сотни тысяч раз
+parce_acl_item = lru_cache(maxsize=settings.ACL_PARSER_CACHE_SIZE)(_parse_acl_item)
+
+
+def parce_one_acl_rule(acl: str) -> PrivilegeDTO:
+    return acl_item_to_dto(parce_acl_item(acl))
 
 
 def compile_one_acl_rule(privilege: PrivilegeDTO) -> str:
@@ -85,36 +100,7 @@ def compile_one_acl_rule(privilege: PrivilegeDTO) -> str:
 
 
 def _parce_batch_acls_final(acls: List[str]) -> Iterator[PrivilegeDTO]:
-    PrivilegeFinal = namedtuple('PrivilegeFinal', 'count_acls privswgo privs')
-    role_acls: Dict[str, PrivilegeFinal] = {}
-
-    # Объединяем ACL листы по пользователю, к которому применяются права
-    for acl in acls:
-        current = parce_one_acl_rule(acl)
-        prev = role_acls.get(current.grantee)
-        if prev is None:
-            pf = PrivilegeFinal(
-                1,
-                current.privswgo,
-                current.privs,
-            )
-        else:
-            new_privswgo_set = set(current.privswgo + prev.privswgo)
-            new_privs_set = set(current.privs + prev.privs) - new_privswgo_set
-            pf = PrivilegeFinal(
-                prev.count_acls + 1,
-                list(new_privswgo_set),
-                list(new_privs_set),
-            )
-        role_acls.update({current.grantee: pf})
-
-    for key, val in role_acls.items():
-        yield PrivilegeDTO(
-            grantee=key,
-            grantor=val.count_acls,
-            privs=val.privs,
-            privswgo=val.privswgo,
-        )
+    return merge_acl_items(parce_acl_item(acl) for acl in acls)
 
 
 def _parce_batch_acls(acls: List[str]) -> Iterator[PrivilegeDTO]:
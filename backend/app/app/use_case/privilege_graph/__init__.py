@@ -1,4 +1,6 @@
 # flake8: noqa
 from .privilege_graph_dto import *
+from .privilege_graph_closure import *
 from .privilege_graph_privilege import *
+from .privilege_graph_access import *
 from .privilege_graph_default import *
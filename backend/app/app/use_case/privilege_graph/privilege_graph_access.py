@@ -0,0 +1,270 @@
+import sys
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from app.db.catalog_cache import catalog_cache
+from app.db.orm_types import GreenPlumSession
+from app.use_case.acl import DatabaseAclDTO, SchemaAclDTO, TableAclDTO
+from app.use_case.acl.acl_database import _pg_db_stmt
+from app.use_case.acl.acl_schema import _pg_schema_stmt
+from app.use_case.acl.acl_table import _table_stmt
+from app.use_case.exceptions import NoSuchObject
+from app.use_case.privilege import mask_to_privileges, parce_acl_item, symbols_to_mask
+from app.use_case.role import get_all_roles
+from app.read_model import *
+from . import RoleAccessDTO, RoleAccessPageDTO, get_role_closure
+
+# https://www.postgresql.org/docs/current/ddl-priv.html
+_max_privileges = {
+    'database': symbols_to_mask("CTc"),
+    'schema': symbols_to_mask("UC"),
+    'table': symbols_to_mask("arwdDxt"),
+}
+
+# Версии частей индекса: количество строк и сумма xmin. GRANT, REVOKE, смена владельца
+# и DDL создают новую версию строки каталога с новым xmin, поэтому меняется и сумма
+# (max(xmin) для этого не годится: после переполнения счетчика транзакций он не растет).
+# Таблицы версионируются по схемам: после GRANT на таблицу перечитывается только ее схема
+_database_version_sql = """
+    SELECT count(*) || ':' || coalesce(sum(d.xmin::text::bigint), 0)
+    FROM pg_catalog.pg_database d
+"""
+
+_schema_version_sql = """
+    SELECT count(*) || ':' || coalesce(sum(n.xmin::text::bigint), 0)
+    FROM pg_catalog.pg_namespace n
+"""
+
+_table_versions_sql = """
+    SELECT
+        c.relnamespace,
+        count(*) || ':' || sum(c.xmin::text::bigint)
+    FROM pg_catalog.pg_class c
+    WHERE c.relkind IN ('r', 'v', 'm', 'p', 'f')
+    GROUP BY c.relnamespace
+"""
+
+
+class _Partition():
+    """Часть индекса, которая перечитывается целиком: базы, схемы или таблицы одной схемы."""
+    version: str
+    objects: List[Tuple[int, str]]
+    grants: Dict[int, array]
+    size: int
+
+    def __init__(self, version: str) -> None:
+        self.version = version
+        self.objects = []
+        # oid роли (0 — PUBLIC) -> тройки (номер объекта, права, права с GRANT OPTION)
+        self.grants = {}
+        self.size = 0
+
+    def add(self, oid: int, name: str, acl: Iterable[str], role_oids: Dict[str, int]) -> None:
+        number = len(self.objects)
+        self.objects.append((oid, name))
+
+        for rule in acl:
+            item = parce_acl_item(rule)
+            grantee = 0 if item.grantee == '' else role_oids.get(item.grantee)
+            if grantee is None:
+                # Роли нет в списке ролей: он мог устареть. Часть перечитается при следующей проверке
+                self.version = ''
+                continue
+            self.grants.setdefault(grantee, array('q')).extend((number, item.privs, item.goptions))
+
+    def sort(self) -> None:
+        # Номера объектов идут по алфавиту: страница ответа берется без сортировки всего списка
+        order = sorted(range(len(self.objects)), key=lambda n: self.objects[n][1])
+        position = array('q', bytes(8 * len(order)))
+        for new, old in enumerate(order):
+            position[old] = new
+
+        self.objects = [self.objects[n] for n in order]
+        for grants in self.grants.values():
+            for pos in range(0, len(grants), 3):
+                grants[pos] = position[grants[pos]]
+
+        # После сортировки часть не меняется: полный размер для кэша считается один раз
+        self.size = (
+            sys.getsizeof(self.objects)
+            + sum(sys.getsizeof(item) + sys.getsizeof(item[0]) + sys.getsizeof(item[1]) for item in self.objects)
+            + sys.getsizeof(self.grants)
+            + sum(sys.getsizeof(grantee) + sys.getsizeof(grants) for grantee, grants in self.grants.items())
+        )
+
+    def __sizeof__(self) -> int:
+        return object.__sizeof__(self) + self.size
+
+    def collect(self, grantees: Iterable[int]) -> Dict[int, List[int]]:
+        masks: Dict[int, List[int]] = {}
+        for grantee in grantees:
+            grants = self.grants.get(grantee)
+            if grants is None:
+                continue
+            for pos in range(0, len(grants), 3):
+                acc = masks.setdefault(grants[pos], [0, 0])
+                acc[0] |= grants[pos + 1]
+                acc[1] |= grants[pos + 2]
+        return masks
+
+
+class RoleAccessIndex():
+    """Обратный индекс: роль -> объекты текущей базы и кластера, на которые у нее есть права."""
+    databases: _Partition
+    schemas: _Partition
+    tables: Dict[int, _Partition]
+
+    def __init__(self, databases: _Partition, schemas: _Partition, tables: Dict[int, _Partition]) -> None:
+        self.databases = databases
+        self.schemas = schemas
+        self.tables = tables
+
+    def __sizeof__(self) -> int:
+        return (
+            object.__sizeof__(self)
+            + sys.getsizeof(self.databases)
+            + sys.getsizeof(self.schemas)
+            + sys.getsizeof(self.tables)
+            + sum(sys.getsizeof(oid) + sys.getsizeof(part) for oid, part in self.tables.items())
+        )
+
+    def access(
+        self, grantees: Set[int], superuser: bool, skip: int = 0, limit: Optional[int] = None
+    ) -> Tuple[int, List[RoleAccessDTO]]:
+        # Порядок: базы, схемы, таблицы по схемам, внутри части — по имени.
+        # Для всего списка считаются только маски, DTO создаются для одной страницы
+        schema_names = dict(self.schemas.objects)
+        tables = sorted(self.tables, key=lambda oid: (schema_names.get(oid) or '', oid))
+        parts = [
+            ('database', None, self.databases),
+            ('schema', None, self.schemas),
+        ] + [
+            ('table', schema_names.get(oid), self.tables[oid]) for oid in tables
+        ]
+
+        end = None if limit is None else skip + limit
+        total = 0
+        result = []
+        for kind, schema, part in parts:
+            if superuser:
+                masks = None
+                numbers: Sequence[int] = range(len(part.objects))
+            else:
+                masks = part.collect(grantees)
+                numbers = sorted(n for n, (privs, _) in masks.items() if privs)
+
+            start = max(skip - total, 0)
+            stop = len(numbers) if end is None else max(min(end - total, len(numbers)), 0)
+            for number in numbers[start:stop]:
+                privs, goptions = masks[number] if masks is not None else (_max_privileges[kind], 0)
+                result.append(RoleAccessDTO(
+                    kind=kind,
+                    schema=schema,
+                    name=part.objects[number][1],
+                    privs=list(mask_to_privileges(privs & ~goptions)),
+                    privswgo=list(mask_to_privileges(goptions)),
+                ))
+            total += len(numbers)
+
+        return total, result
+
+
+def _load_databases(conn: GreenPlumSession, version: str, role_oids: Dict[str, int]) -> _Partition:
+    part = _Partition(version)
+    with conn.begin():
+        for row in conn.execute(_pg_db_stmt):
+            part.add(row.oid, row.name, DatabaseAclDTO(**row).acl, role_oids)
+    part.sort()
+    return part
+
+
+def _load_schemas(conn: GreenPlumSession, version: str, role_oids: Dict[str, int]) -> _Partition:
+    part = _Partition(version)
+    with conn.begin():
+        for row in conn.execute(_pg_schema_stmt):
+            part.add(row.oid, row.name, SchemaAclDTO(**row).acl, role_oids)
+    part.sort()
+    return part
+
+
+def _load_tables(
+    conn: GreenPlumSession, versions: Dict[int, str], role_oids: Dict[str, int]
+) -> Dict[int, _Partition]:
+    parts = {oid: _Partition(version) for oid, version in versions.items()}
+    stmt = (
+        _table_stmt()
+        .add_columns(pg_class.c.relnamespace)
+        .where(pg_class.c.relnamespace.in_(list(versions)))
+    )
+
+    with conn.begin():
+        for row in conn.execute(stmt):
+            acl = TableAclDTO(row.oid, row.name, row.owner, row.acl, row.schema).acl
+            parts[row.relnamespace].add(row.oid, row.name, acl, role_oids)
+
+    for part in parts.values():
+        part.sort()
+    return parts
+
+
+def _build_role_access_index(conn: GreenPlumSession, previous: Optional[RoleAccessIndex]) -> RoleAccessIndex:
+    # Версии читаются до данных: изменение во время загрузки увидит следующая проверка
+    with conn.begin():
+        database_version = conn.execute(_database_version_sql).scalar()
+        schema_version = conn.execute(_schema_version_sql).scalar()
+        table_versions = {oid: version for oid, version in conn.execute(_table_versions_sql)}
+
+    # В индексе хранятся oid ролей, поэтому переименование роли его не портит
+    role_oids = {role.rolname: role.oid for role in get_all_roles(conn)}
+
+    if previous is not None and previous.databases.version == database_version:
+        databases = previous.databases
+    else:
+        databases = _load_databases(conn, database_version, role_oids)
+
+    if previous is not None and previous.schemas.version == schema_version:
+        schemas = previous.schemas
+    else:
+        schemas = _load_schemas(conn, schema_version, role_oids)
+
+    # Неизменившиеся части переиспользуются, прежний индекс при этом не меняется:
+    # его могут читать параллельные запросы
+    tables: Dict[int, _Partition] = {}
+    outdated: Dict[int, str] = {}
+    for oid, version in table_versions.items():
+        part = previous.tables.get(oid) if previous is not None else None
+        if part is not None and part.version == version:
+            tables[oid] = part
+        else:
+            outdated[oid] = version
+
+    if outdated:
+        tables.update(_load_tables(conn, outdated, role_oids))
+
+    return RoleAccessIndex(databases, schemas, tables)
+
+
+def get_role_access_index(conn: GreenPlumSession) -> RoleAccessIndex:
+    # После CATALOG_CACHE_TTL или изменения через приложение индекс не строится заново:
+    # версии частей сверяются одним запросом и перечитываются только изменившиеся
+    return catalog_cache.refresh(
+        conn,
+        (__name__, 'role_access_index'),
+        lambda previous: _build_role_access_index(conn, previous),
+    )
+
+
+def get_role_access(
+    conn: GreenPlumSession, rolname: str, skip: int = 0, limit: int = 100
+) -> RoleAccessPageDTO:
+    roles = {role.rolname: role for role in get_all_roles(conn)}
+    role = roles.get(rolname)
+    if role is None:
+        raise NoSuchObject(rolname)
+
+    # Права роли складываются из прямых, унаследованных от групп и выданных PUBLIC
+    grantees = {role.oid, 0}
+    grantees.update(get_role_closure(conn).groups_of(role.oid))
+
+    total, items = get_role_access_index(conn).access(grantees, role.rolsuper, skip, limit)
+    return RoleAccessPageDTO(total=total, items=items)
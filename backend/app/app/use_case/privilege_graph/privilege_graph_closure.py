@@ -0,0 +1,148 @@
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from app.db.catalog_cache import catalog_cache
+from app.db.orm_types import GreenPlumSession
+from app.use_case.role import get_graph_of_members
+
+
+def _bits(mask: int) -> Iterator[int]:
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _strongly_connected(adjacency: List[List[int]]) -> List[List[int]]:
+    # Итеративный алгоритм Тарьяна: компоненты возвращаются в обратном
+    # топологическом порядке, сначала те, из которых нет исходящих ребер
+    index = [-1] * len(adjacency)
+    lowlink = [0] * len(adjacency)
+    on_stack = [False] * len(adjacency)
+    stack: List[int] = []
+    components: List[List[int]] = []
+    counter = 0
+
+    for root in range(len(adjacency)):
+        if index[root] != -1:
+            continue
+
+        work = [(root, 0)]
+        while work:
+            v, pos = work.pop()
+            if pos == 0:
+                index[v] = lowlink[v] = counter
+                counter += 1
+                stack.append(v)
+                on_stack[v] = True
+
+            edges = adjacency[v]
+            while pos < len(edges):
+                n = edges[pos]
+                pos += 1
+                if index[n] == -1:
+                    work.append((v, pos))
+                    work.append((n, 0))
+                    break
+                if on_stack[n]:
+                    lowlink[v] = min(lowlink[v], index[n])
+            else:
+                if lowlink[v] == index[v]:
+                    component = []
+                    while True:
+                        n = stack.pop()
+                        on_stack[n] = False
+                        component.append(n)
+                        if n == v:
+                            break
+                    components.append(component)
+
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[v])
+
+    return components
+
+
+class RoleClosure():
+    """Транзитивное замыкание графа членства: для группы все роли, которые получают ее права."""
+    _oids: List[int]
+    _index: Dict[int, int]
+    _reachable: List[int]
+    _parents: List[List[int]]
+
+    def __init__(self, edges: Iterable[Tuple[int, int]]) -> None:
+        self._oids = []
+        self._index = {}
+        self._parents = []
+        adjacency: List[List[int]] = []
+
+        for from_oid, to_oid in edges:
+            for oid in (from_oid, to_oid):
+                if oid not in self._index:
+                    self._index[oid] = len(self._oids)
+                    self._oids.append(oid)
+                    adjacency.append([])
+                    self._parents.append([])
+            adjacency[self._index[from_oid]].append(self._index[to_oid])
+            self._parents[self._index[to_oid]].append(self._index[from_oid])
+
+        # Множества ролей храним битовыми масками по индексу роли
+        self._reachable = [0] * len(self._oids)
+        component_of = [0] * len(self._oids)
+        component_reach: List[int] = []
+
+        for number, component in enumerate(_strongly_connected(adjacency)):
+            members = 0
+            for v in component:
+                component_of[v] = number
+                members |= 1 << v
+
+            reach = 0
+            for v in component:
+                for n in adjacency[v]:
+                    other = component_of[n]
+                    if other != number:
+                        # Компонента n уже посчитана: Тарьян отдает их от стоков к истокам
+                        reach |= component_reach[other] | (1 << n)
+
+            # В цикле каждая роль получает права всех остальных ролей цикла
+            if len(component) > 1:
+                reach |= members
+
+            component_reach.append(reach)
+            for v in component:
+                self._reachable[v] = reach & ~(1 << v)
+
+    def members_of(self, oid: int) -> List[int]:
+        v = self._index.get(oid)
+        if v is None:
+            return []
+        return [self._oids[n] for n in _bits(self._reachable[v])]
+
+    def groups_of(self, oid: int) -> List[int]:
+        # Обратный обход: все группы, права которых наследует роль
+        start = self._index.get(oid)
+        if start is None:
+            return []
+
+        seen = {start}
+        stack = [start]
+        while stack:
+            for n in self._parents[stack.pop()]:
+                if n not in seen:
+                    seen.add(n)
+                    stack.append(n)
+
+        seen.discard(start)
+        return [self._oids[n] for n in seen]
+
+    def all_reachable_nodes(self) -> Dict[int, List[int]]:
+        return {oid: self.members_of(oid) for oid in self._oids}
+
+
+def get_role_closure(conn: GreenPlumSession) -> RoleClosure:
+    def loader() -> RoleClosure:
+        members = get_graph_of_members(conn)
+        return RoleClosure((edge.from_oid, edge.to_oid) for edge in members.edges)
+
+    return catalog_cache.fetch(conn, (__name__, 'role_closure'), loader)
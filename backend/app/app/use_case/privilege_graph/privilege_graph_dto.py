@@ -29,6 +29,29 @@ class GraphPermissionsDTO(DTO):
     table: Optional[str]
 
 
+@define
+class GraphObjectPermissionsDTO(DTO):
+    database: str
+    schema: Optional[str]
+    table: Optional[str]
+    permissions: List[PrivilegeDTO]
+
+
+@define
+class RoleAccessDTO(DTO):
+    kind: str
+    schema: Optional[str]
+    name: str
+    privs: List[str]
+    privswgo: List[str]
+
+
+@define
+class RoleAccessPageDTO(DTO):
+    total: int
+    items: List[RoleAccessDTO]
+
+
 @define
 class RevokeAllDefaultsDTO(DTO):
     database: str
@@ -1,10 +1,11 @@
-from typing import Dict, Iterator, List, Optional, Set
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from app.db.orm_types import GreenPlumSession
-from app.use_case.role import RoleDTO, get_graph_of_members, get_all_roles
-from app.use_case.acl import get_database_acl, get_schema_acl, get_table_acl
-from app.use_case.privilege import PrivilegeDTO, compile_one_acl_rule, parce_acl_rules, parce_one_acl_rule
-from . import GraphPermissionsDTO
+from app.use_case.role import RoleDTO, get_all_roles
+from app.use_case.acl import ObjectKey, get_acl_items_of_objects, get_database_acl_items, get_schema_acl_items, get_table_acl_items
+from app.use_case.privilege import AclItem, PrivilegeDTO, make_acl_item, merge_acl_items, symbols_to_mask
+from app.use_case.exceptions import NoSuchObject
+from . import GraphObjectPermissionsDTO, GraphPermissionsDTO, RoleClosure, get_role_closure
 
 
 class RoleSearcher():
@@ -26,112 +27,48 @@ class RoleSearcher():
         return self._role2oid.get(rolname)
 
 
-class Graph:
-    _graph: Dict[int, List[int]]
+# https://www.postgresql.org/docs/current/ddl-priv.html
+_max_privileges = {
+    (True, False, False): symbols_to_mask("CTc"),
+    (True, True, False): symbols_to_mask("UC"),
+    (True, True, True): symbols_to_mask("arwdDxt"),
+}
 
-    def __init__(self) -> None:
-        self._graph = dict()
 
-    def add_vertex(self, v: int) -> None:
-        if not v in self._graph:
-            self._graph[v] = []
-
-    def add_edge(self, u: int, v: int) -> None:
-        self.add_vertex(u)
-        self.add_vertex(v)
-        self._graph[u].append(v)
-
-    def topological_sort_util(self, v: int, visited: Set[int], stack: List[int]) -> None:
-        visited.add(v)
-
-        for n in self._graph[v]:
-            if not n in visited:
-                self.topological_sort_util(n, visited, stack)
-
-        stack.append(v)
-
-    def childs_list(self) -> Dict[int, List[int]]:
-        return self._graph
-
-    def topological_sort(self) -> List[int]:
-        vertices = self._graph.keys()
-        visited = set()
-        stack = list()
-
-        for v in vertices:
-            if not v in visited:
-                self.topological_sort_util(v, visited, stack)
-
-        return stack
-
-    def all_reachable_nodes(self) -> Dict[int, List[int]]:
-        vertices = self.topological_sort()
-        deps = dict()
-
-        for v in vertices:
-            deps[v] = set()
-            for n in self._graph[v]:
-                deps[v].add(n)
-                deps[v].update(deps[n])
-            deps[v] = list(deps[v])
-
-        return deps
-
-
-def _get_all_acls(conn: GreenPlumSession, payload: GraphPermissionsDTO) -> List[str]:
-    acl = {
-        (True, False, False): lambda: get_database_acl(conn, payload.database),
-        (True, True, False): lambda: get_schema_acl(conn, payload.db_schema),
-        (True, True, True): lambda: get_table_acl(conn, payload.db_schema, payload.table),
-    }.get((
+def _object_type(payload: GraphPermissionsDTO) -> Tuple[bool, bool, bool]:
+    return (
         bool(payload.database),
         bool(payload.db_schema),
         bool(payload.table)
-    ))
+    )
 
-    if acl is None:
-        return []
 
-    return acl().acl
+def _object_key(payload: GraphPermissionsDTO) -> Optional[ObjectKey]:
+    return {
+        (True, False, False): (payload.database, None, None),
+        (True, True, False): (None, payload.db_schema, None),
+        (True, True, True): (None, payload.db_schema, payload.table),
+    }.get(_object_type(payload))
 
 
-def _max_acls_for_role(rolname: str, payload: GraphPermissionsDTO) -> str:
-    # https://www.postgresql.org/docs/current/ddl-priv.html
+def _get_all_acls(conn: GreenPlumSession, payload: GraphPermissionsDTO) -> List[AclItem]:
     acl = {
-        (True, False, False): "CTc",
-        (True, True, False): "UC",
-        (True, True, True): "arwdDxt",
-    }.get((
-        bool(payload.database),
-        bool(payload.db_schema),
-        bool(payload.table)
-    ))
-
-    return f"{rolname}={acl}/{rolname}"
-
-
-def change_privilege_roles(privilege: PrivilegeDTO, grantor: str, grantee: str) -> str:
-    new_priv = PrivilegeDTO(
-        grantee=grantee,
-        grantor=grantor,
-        privs=privilege.privs,
-        privswgo=privilege.privswgo,
-    )
-
-    return compile_one_acl_rule(new_priv)
+        (True, False, False): lambda: get_database_acl_items(conn, payload.database),
+        (True, True, False): lambda: get_schema_acl_items(conn, payload.db_schema),
+        (True, True, True): lambda: get_table_acl_items(conn, payload.db_schema, payload.table),
+    }.get(_object_type(payload))
 
+    if acl is None:
+        return []
 
-def _get_reachable_roles(conn: GreenPlumSession) -> Dict[int, List[int]]:
-    memebers = get_graph_of_members(conn)
-    graph = Graph()
+    return [item for items in acl().values() for item in items]
 
-    for role in memebers.edges:
-        graph.add_edge(role.from_oid, role.to_oid)
 
-    return graph.all_reachable_nodes()
+def change_privilege_roles(privilege: AclItem, grantor: str, grantee: str) -> AclItem:
+    return make_acl_item(grantee, grantor, privilege.privs, privilege.goptions)
 
 
-def _all_rules_with_public_acl(roles: List[RoleDTO], privilege: PrivilegeDTO) -> Iterator[str]:
+def _all_rules_with_public_acl(roles: List[RoleDTO], privilege: AclItem) -> Iterator[AclItem]:
     for role in roles:
         yield change_privilege_roles(
             privilege=privilege,
@@ -140,30 +77,31 @@ def _all_rules_with_public_acl(roles: List[RoleDTO], privilege: PrivilegeDTO) ->
         )
 
 
-def _get_rules_from_all_admins(roles: List[RoleDTO], payload: GraphPermissionsDTO) -> Iterator[str]:
+def _get_rules_from_all_admins(roles: List[RoleDTO], max_privileges: int) -> Iterator[AclItem]:
     for role in roles:
         if role.rolsuper:
-            yield _max_acls_for_role(role.rolname, payload)
+            yield make_acl_item(role.rolname, role.rolname, max_privileges)
 
 
-def get_all_graph_permissions(conn: GreenPlumSession, payload: GraphPermissionsDTO) -> Iterator[PrivilegeDTO]:
-    acls = _get_all_acls(conn, payload)
-    roles = get_all_roles(conn)
-    reachable = _get_reachable_roles(conn)
-
-    permissions = list(_get_rules_from_all_admins(roles, payload))
-    role_finder = RoleSearcher(roles)
+def _effective_permissions(
+    acls: List[AclItem],
+    max_privileges: int,
+    roles: List[RoleDTO],
+    role_finder: RoleSearcher,
+    reachable: RoleClosure,
+) -> Iterator[PrivilegeDTO]:
+    permissions = list(_get_rules_from_all_admins(roles, max_privileges))
 
-    for acl in acls:
-        permissions.append(acl)
-        privilege = parce_one_acl_rule(acl)
-        oid = role_finder.rolname2oid(privilege.grantee)
+    for privilege in acls:
+        permissions.append(privilege)
 
-        if oid is None:  # Это PUBLIC
+        if privilege.grantee == '':  # Это PUBLIC
             public_acls = _all_rules_with_public_acl(roles, privilege)
             permissions.extend(public_acls)
+            continue
 
-        for child in reachable.get(oid, []):
+        oid = role_finder.rolname2oid(privilege.grantee)
+        for child in reachable.members_of(oid):
             child_acl = change_privilege_roles(
                 privilege=privilege,
                 grantor=privilege.grantee,
@@ -171,4 +109,58 @@ def get_all_graph_permissions(conn: GreenPlumSession, payload: GraphPermissionsD
             )
             permissions.append(child_acl)
 
-    return parce_acl_rules(permissions)
+    return merge_acl_items(permissions)
+
+
+def get_all_graph_permissions(conn: GreenPlumSession, payload: GraphPermissionsDTO) -> Iterator[PrivilegeDTO]:
+    max_privileges = _max_privileges.get(_object_type(payload))
+    if max_privileges is None:
+        return iter([])
+
+    acls = _get_all_acls(conn, payload)
+    roles = get_all_roles(conn)
+    reachable = get_role_closure(conn)
+
+    return _effective_permissions(acls, max_privileges, roles, RoleSearcher(roles), reachable)
+
+
+def get_batch_graph_permissions(
+    conn: GreenPlumSession, payloads: List[GraphPermissionsDTO]
+) -> List[GraphObjectPermissionsDTO]:
+    keys = [_object_key(payload) for payload in payloads]
+    acls = get_acl_items_of_objects(
+        conn,
+        databases=[key[0] for key in keys if key is not None and key[1] is None],
+        schemas=[key[1] for key in keys if key is not None and key[1] and key[2] is None],
+        tables=[(key[1], key[2]) for key in keys if key is not None and key[2]],
+    )
+
+    # Роли и замыкание графа членства загружаются один раз на весь запрос
+    roles = get_all_roles(conn)
+    reachable = get_role_closure(conn)
+    role_finder = RoleSearcher(roles)
+
+    result = []
+    for payload, key in zip(payloads, keys):
+        permissions: List[PrivilegeDTO] = []
+        if key is not None:
+            items = acls.get(key)
+            if items is None:
+                raise NoSuchObject(".".join(name for name in key if name))
+
+            permissions = list(_effective_permissions(
+                items,
+                _max_privileges[_object_type(payload)],
+                roles,
+                role_finder,
+                reachable,
+            ))
+
+        result.append(GraphObjectPermissionsDTO(
+            database=payload.database,
+            schema=payload.db_schema,
+            table=payload.table,
+            permissions=permissions,
+        ))
+
+    return result
@@ -0,0 +1,8 @@
+from typing import Callable
+
+# Прогресс длительной операции: (выполнено, всего)
+Progress = Callable[[int, int], None]
+
+
+def no_progress(done: int, total: int) -> None:
+    pass
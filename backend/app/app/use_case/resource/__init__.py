@@ -1,3 +1,4 @@
 # flake8: noqa
 from .resource_dto import *
 from .resource_resource import *
+from .resource_usage import *
@@ -1,4 +1,5 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 from attrs import define, field
 
 
@@ -49,3 +50,33 @@ class ResourceGroupAvailableLimitsDTO(DTO):
     memory_limit_max: int
     concurrency_min: int
     concurrency_max: int
+
+
+@define
+class ResourceGroupMemberResultDTO(DTO):
+    rolname: str
+    error: Optional[str]
+
+
+@define
+class ResourceGroupSampleDTO(DTO):
+    name: str
+    num_running: float
+    num_queueing: float
+    cpu: float
+    cpu_max: float
+    memory_used: float
+    memory_available: float
+
+
+@define
+class ResourceGroupUsagePointDTO(DTO):
+    time: datetime
+    step: int
+    groups: List[ResourceGroupSampleDTO]
+
+
+@define
+class ResourceGroupUsageDTO(DTO):
+    interval: int
+    points: List[ResourceGroupUsagePointDTO]
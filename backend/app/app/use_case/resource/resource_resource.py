@@ -1,10 +1,12 @@
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 from sqlalchemy import select, func, join, exc
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.db.orm_types import GreenPlumConnection, GreenPlumSession
 from . import ResourceGroupDTO, ResourceGroupCreateDTO, ResourceGroupUpdateDTO, ResourceGroupAvailableLimitsDTO
-from app.use_case.exceptions import DoneWithErrors
+from . import ResourceGroupMemberResultDTO
+from app.use_case.exceptions import DoneWithErrors, database_error_message
 from app.read_model import *
 
 _pg_array_agg = func.pg_catalog.array_agg
@@ -132,29 +134,57 @@ def _create_resource_group(conn: GreenPlumSession, rsgroup: ResourceGroupCreateD
     conn.execute(sql_command)
 
 
-def _alter_resource_group_members(
-    conn: GreenPlumSession, rolnames: List[str], rsgname: Optional[str] = None,
+# Роли группы меняются одной командой: имена передаются массивом и экранируются через %I
+_alter_resource_group_members_sql = """
+    DO $$
+    DECLARE
+        name_of_role TEXT;
+    BEGIN
+        FOREACH name_of_role IN ARRAY CAST(:rolnames AS TEXT[])
+        LOOP
+            EXECUTE FORMAT('ALTER ROLE %I RESOURCE GROUP %s', name_of_role, :rsgname);
+        END LOOP;
+    END $$
+"""
+
+
+def _execute_alter_resource_group_members(
+    conn: GreenPlumSession, rolnames: List[str], rsgname: Optional[str],
 ) -> None:
-    sql_command = """
-        DO $$ BEGIN
-            EXECUTE FORMAT('ALTER ROLE "%s" RESOURCE GROUP %s', :rolname, :rsgname);
-        END $$
-    """
+    conn.execute(
+        _alter_resource_group_members_sql,
+        params={
+            "rolnames": rolnames,
+            "rsgname": f'"{rsgname}"' if rsgname else 'NONE',
+        },
+    )
 
-    done_with_errors = False
-    for rolname in rolnames:
+
+def _alter_resource_group_members_with_errors(
+    conn: GreenPlumSession, rolnames: List[str], rsgname: Optional[str] = None,
+) -> Dict[str, str]:
+    errors: Dict[str, str] = {}
+    size = max(settings.RESOURCE_GROUP_BATCH_SIZE, 1)
+
+    for start in range(0, len(rolnames), size):
+        chunk = rolnames[start:start + size]
         try:
-            conn.execute(
-                sql_command,
-                params={
-                    "rolname": rolname,
-                    "rsgname": f'"{rsgname}"' if rsgname else 'NONE'
-                }
-            )
+            _execute_alter_resource_group_members(conn, chunk, rsgname)
         except exc.DatabaseError:
-            done_with_errors = True
+            # Пачка откатилась целиком: выполняем роли по одной, чтобы найти ошибочные
+            for rolname in chunk:
+                try:
+                    _execute_alter_resource_group_members(conn, [rolname], rsgname)
+                except exc.DatabaseError as error:
+                    errors[rolname] = database_error_message(error)
 
-    if done_with_errors:
+    return errors
+
+
+def _alter_resource_group_members(
+    conn: GreenPlumSession, rolnames: List[str], rsgname: Optional[str] = None,
+) -> None:
+    if _alter_resource_group_members_with_errors(conn, rolnames, rsgname):
         raise DoneWithErrors(rsgname)
 
 
@@ -312,6 +342,22 @@ def update_resource_group(conn: GreenPlumConnection, rsname: str, rsgroup: Resou
         _alter_resource_group_members(session, appended, rsname)
 
 
+def assign_resource_group_members(
+    conn: GreenPlumConnection, rsname: str, rolnames: List[str],
+) -> List[ResourceGroupMemberResultDTO]:
+    conn.execution_options(isolation_level="AUTOCOMMIT")
+    with Session(conn) as session:
+        members = set(_get_all_members_of_resource_group(session, rsname))
+        # Порядок ролей сохраняется, повторы и уже входящие в группу роли не отправляются
+        to_append = [rolname for rolname in dict.fromkeys(rolnames) if rolname not in members]
+        errors = _alter_resource_group_members_with_errors(session, to_append, rsname)
+
+    return [
+        ResourceGroupMemberResultDTO(rolname=rolname, error=errors.get(rolname))
+        for rolname in rolnames
+    ]
+
+
 def get_resourse_groups_limits(conn: GreenPlumSession) -> ResourceGroupAvailableLimitsDTO:
     with conn.begin():
         row = conn.execute(_gp_resource_group_available_limits)
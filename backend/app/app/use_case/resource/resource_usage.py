@@ -0,0 +1,176 @@
+from collections import deque
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Deque, Dict, List, Optional
+
+from attrs import asdict
+
+from app.db.orm_types import GreenPlumSession
+from . import ResourceGroupSampleDTO, ResourceGroupUsageDTO, ResourceGroupUsagePointDTO
+
+# Сколько соседних замеров усредняется в одну точку длинной истории
+_DOWNSAMPLE_FACTOR = 10
+
+# Нагрузка CPU по сегментным хостам усредняется, отдельно возвращается самый загруженный хост.
+# Память в мегабайтах суммируется по всем хостам кластера
+_gp_resource_group_status_sql = """
+    SELECT
+        s.rsgname AS name,
+        s.num_running,
+        s.num_queueing,
+        coalesce(h.cpu, 0) AS cpu,
+        coalesce(h.cpu_max, 0) AS cpu_max,
+        coalesce(h.memory_used, 0) AS memory_used,
+        coalesce(h.memory_available, 0) AS memory_available
+    FROM gp_toolkit.gp_resgroup_status s
+    LEFT JOIN (
+        SELECT
+            groupid,
+            avg(cpu) AS cpu,
+            max(cpu) AS cpu_max,
+            sum(memory_used) AS memory_used,
+            sum(memory_available) AS memory_available
+        FROM gp_toolkit.gp_resgroup_status_per_host
+        GROUP BY groupid
+    ) h ON h.groupid = s.groupid
+    ORDER BY s.rsgname
+"""
+
+
+def sample_resource_groups(conn: GreenPlumSession) -> List[ResourceGroupSampleDTO]:
+    with conn.begin():
+        rows = conn.execute(_gp_resource_group_status_sql)
+        return [
+            ResourceGroupSampleDTO(
+                name=row.name,
+                num_running=float(row.num_running),
+                num_queueing=float(row.num_queueing),
+                cpu=float(row.cpu),
+                cpu_max=float(row.cpu_max),
+                memory_used=float(row.memory_used),
+                memory_available=float(row.memory_available),
+            ) for row in rows
+        ]
+
+
+def _average(points: List[ResourceGroupUsagePointDTO]) -> ResourceGroupUsagePointDTO:
+    # Группа могла появиться или исчезнуть внутри интервала: усредняем по замерам, где она есть
+    samples: Dict[str, List[ResourceGroupSampleDTO]] = {}
+    for point in points:
+        for sample in point.groups:
+            samples.setdefault(sample.name, []).append(sample)
+
+    def mean(items: List[ResourceGroupSampleDTO], field: str) -> float:
+        return sum(getattr(item, field) for item in items) / len(items)
+
+    return ResourceGroupUsagePointDTO(
+        time=points[0].time,
+        step=sum(point.step for point in points),
+        groups=[
+            ResourceGroupSampleDTO(
+                name=name,
+                num_running=mean(items, 'num_running'),
+                num_queueing=mean(items, 'num_queueing'),
+                cpu=mean(items, 'cpu'),
+                cpu_max=max(item.cpu_max for item in items),
+                memory_used=mean(items, 'memory_used'),
+                memory_available=mean(items, 'memory_available'),
+            ) for name, items in samples.items()
+        ],
+    )
+
+
+def _dump_point(point: ResourceGroupUsagePointDTO) -> Dict:
+    return {
+        "time": point.time.isoformat(),
+        "step": point.step,
+        "groups": [asdict(sample) for sample in point.groups],
+    }
+
+
+def _load_point(data: Dict) -> ResourceGroupUsagePointDTO:
+    return ResourceGroupUsagePointDTO(
+        time=datetime.fromisoformat(data["time"]),
+        step=data["step"],
+        groups=[ResourceGroupSampleDTO(**sample) for sample in data["groups"]],
+    )
+
+
+class ResourceGroupUsageHistory():
+    """Кольцевые буферы замеров: последние замеры как есть и более длинная история усредненными точками."""
+    interval: int
+    _recent: Deque[ResourceGroupUsagePointDTO]
+    _downsampled: Deque[ResourceGroupUsagePointDTO]
+    _pending: List[ResourceGroupUsagePointDTO]
+    _lock: Lock
+
+    def __init__(self, interval: int, size: int) -> None:
+        self.interval = interval
+        self._recent = deque(maxlen=size)
+        self._downsampled = deque(maxlen=size)
+        self._pending = []
+        self._lock = Lock()
+
+    def dump(self) -> Dict:
+        # Состояние в виде JSON: история передается другим воркерам через файл
+        with self._lock:
+            return {
+                "interval": self.interval,
+                "recent": [_dump_point(point) for point in self._recent],
+                "downsampled": [_dump_point(point) for point in self._downsampled],
+                "pending": [_dump_point(point) for point in self._pending],
+            }
+
+    @classmethod
+    def load(cls, data: Dict, size: int) -> "ResourceGroupUsageHistory":
+        history = cls(data["interval"], size)
+        history._recent.extend(_load_point(point) for point in data["recent"])
+        history._downsampled.extend(_load_point(point) for point in data["downsampled"])
+        history._pending = [_load_point(point) for point in data["pending"]]
+        return history
+
+    def add(self, samples: List[ResourceGroupSampleDTO], time: Optional[datetime] = None) -> None:
+        point = ResourceGroupUsagePointDTO(
+            time=time or datetime.now(timezone.utc),
+            step=self.interval,
+            groups=samples,
+        )
+
+        with self._lock:
+            self._recent.append(point)
+            self._pending.append(point)
+            if len(self._pending) >= _DOWNSAMPLE_FACTOR:
+                self._downsampled.append(_average(self._pending))
+                self._pending = []
+
+    def is_empty(self) -> bool:
+        return not self._recent
+
+    def usage(self, since: Optional[datetime] = None, name: Optional[str] = None) -> ResourceGroupUsageDTO:
+        # Время замеров в UTC, время без часового пояса из запроса тоже считается UTC
+        if since is not None and since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+
+        with self._lock:
+            recent = list(self._recent)
+            downsampled = list(self._downsampled)
+
+        # Усредненные точки нужны только для времени, которого уже нет среди последних замеров
+        if recent:
+            downsampled = [point for point in downsampled if point.time < recent[0].time]
+
+        points = [
+            point for point in downsampled + recent
+            if since is None or point.time >= since
+        ]
+
+        if name is not None:
+            points = [
+                ResourceGroupUsagePointDTO(
+                    time=point.time,
+                    step=point.step,
+                    groups=[sample for sample in point.groups if sample.name == name],
+                ) for point in points
+            ]
+
+        return ResourceGroupUsageDTO(interval=self.interval, points=points)
@@ -62,3 +62,26 @@ class RoleGroupNodeDTO(DTO):
 class RoleGroupDTO(DTO):
     nodes: List[RoleGroupNodeDTO]
     edges: List[RoleGroupEdgeDTO]
+
+
+@define
+class DatabaseOutcomeDTO(DTO):
+    database: str
+    error: Optional[str]
+
+
+@define
+class DatabaseDependenciesDTO(DTO):
+    database: Optional[str]
+    connectable: bool
+    owned: int
+    privileges: int
+    other: int
+
+
+@define
+class RoleDependenciesDTO(DTO):
+    rolname: str
+    strategy: str
+    reassign_in: List[str]
+    databases: List[DatabaseDependenciesDTO]
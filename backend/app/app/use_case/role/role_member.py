@@ -2,6 +2,7 @@ from typing import List
 from sqlalchemy import select, func
 
 from app.db.orm_types import GreenPlumSession
+from app.db.catalog_cache import catalog_snapshot
 from . import MemberDTO, RoleGroupDTO, RoleGroupEdgeDTO, RoleGroupNodeDTO
 from app.core.config import settings
 from app.read_model import *
@@ -101,6 +102,7 @@ def get_role_members(conn: GreenPlumSession, dbuser: str) -> List[MemberDTO]:
         return [MemberDTO(**row) for row in rows]
 
 
+@catalog_snapshot
 def get_graph_of_members(conn: GreenPlumSession) -> RoleGroupDTO:
     with conn.begin():
         nodes = conn.execute(_pg_role_stmt)
@@ -1,10 +1,14 @@
-from functools import partial
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List
-from sqlalchemy import select
+from sqlalchemy import exc, select
 
+from app.db.greenplum import sibling_session
 from app.db.orm_types import GreenPlumSession
+from app.db.catalog_cache import catalog_snapshot
+from app.use_case.progress import Progress, no_progress
+from . import DatabaseDependenciesDTO, DatabaseOutcomeDTO, RoleDependenciesDTO
 from . import RoleDTO, RoleCreateDTO, RoleUpdateDTO
-from app.use_case.exceptions import NoSuchObject, DoneWithErrors
+from app.use_case.exceptions import NoSuchObject, DoneWithErrors, database_error_message
 from app.read_model import *
 from app.core.config import settings
 
@@ -138,61 +142,29 @@ def _alter_role(conn: GreenPlumSession, rolname: str, dbuser: RoleUpdateDTO) ->
     )
 
 
-def _reassign_all_owned_by_role_v1(conn: GreenPlumSession, dbuser: str) -> None:
+# Зависимости роли во всех базах кластера: pg_shdepend общий для кластера,
+# dbid = 0 означает общие объекты (базы, табличные пространства)
+_role_dependencies_sql = """
+    SELECT
+        d.datname,
+        coalesce(d.datallowconn, TRUE) AS connectable,
+        count(*) FILTER (WHERE s.deptype = 'o') AS owned,
+        count(*) FILTER (WHERE s.deptype = 'a') AS privileges,
+        count(*) FILTER (WHERE s.deptype NOT IN ('o', 'a')) AS other
+    FROM pg_catalog.pg_shdepend s
+    LEFT JOIN pg_catalog.pg_database d ON d.oid = s.dbid
+    WHERE s.refclassid = 'pg_catalog.pg_authid'::regclass
+        AND s.refobjid = :oid
+    GROUP BY 1, 2
+    ORDER BY 1 NULLS FIRST
+"""
+
+
+def _reassign_owned_by_role(conn: GreenPlumSession, dbuser: str) -> None:
     sql_command = """
-        DO $$
-        DECLARE
-            db VARCHAR;
-            delete_query VARCHAR;
-            connection VARCHAR;
-            user_owner VARCHAR;
-        BEGIN
-            user_owner := (SELECT session_user);
-            FOR db IN
-                SELECT datname
-                FROM pg_database
-                WHERE datallowconn = TRUE
-            LOOP
-                delete_query := FORMAT(
-                    'REASSIGN OWNED BY "%s" TO "%s"; DROP OWNED BY "%s"',
-                    :dbuser, user_owner, :dbuser
-                );
-                connection := FORMAT('dbname=''%s''', db);
-                PERFORM dblink_exec(connection, delete_query);
-            END LOOP;
-        END $$
-    """
-
-    conn.execute(
-        sql_command,
-        params={
-            "dbuser": dbuser,
-        },
-    )
-
-
-def _reassign_all_owned_by_role_v2(conn: GreenPlumSession, dbuser: str) -> None:
-    sql_command = """
-        DO $$
-        DECLARE
-            db VARCHAR;
-            delete_query VARCHAR;
-            connection VARCHAR;
-            user_owner VARCHAR;
-        BEGIN
-            user_owner := (SELECT session_user);
-            FOR db IN
-                SELECT datname
-                FROM pg_database
-                WHERE datallowconn = TRUE
-            LOOP
-                delete_query := FORMAT(
-                    'REASSIGN OWNED BY "%s" TO "%s"; DROP OWNED BY "%s"',
-                    :dbuser, user_owner, :dbuser
-                );
-                connection := FORMAT('dbname=''%s'' user=''%s''', db, user_owner);
-                PERFORM dblink_exec(connection, delete_query);
-            END LOOP;
+        DO $$ BEGIN
+            EXECUTE FORMAT('REASSIGN OWNED BY %I TO %I', :dbuser, session_user);
+            EXECUTE FORMAT('DROP OWNED BY %I', :dbuser);
         END $$
     """
 
@@ -237,77 +209,112 @@ def ensure_role(conn: GreenPlumSession, dbuser: RoleCreateDTO) -> None:
         _create_role(conn, dbuser)
 
 
-def _drop_role_first_var(conn: GreenPlumSession, dbuser: str) -> bool:
-    # Первый вариант удаления - просто стараемся удалить
-    deleted = False
+def _reassign_owned_in_database(conn: GreenPlumSession, database: str, dbuser: str) -> DatabaseOutcomeDTO:
+    # REASSIGN и DROP OWNED действуют только в текущей базе, поэтому к каждой базе свое соединение
     try:
-        with conn.begin():
-            _delete_role(conn, dbuser)
-            deleted = True
-    finally:
-        return deleted
+        db_conn = sibling_session(conn, database)
+        try:
+            with db_conn.begin():
+                _reassign_owned_by_role(db_conn, dbuser)
+        finally:
+            db_conn.close()
+    except exc.SQLAlchemyError as error:
+        # Кроме ошибок СУБД, например пул к базе занят: остальные базы обрабатываются дальше
+        message = database_error_message(error) if isinstance(error, exc.DBAPIError) else str(error)
+        return DatabaseOutcomeDTO(database=database, error=message)
+
+    return DatabaseOutcomeDTO(database=database, error=None)
+
+
+def reassign_owned_by_role(
+    conn: GreenPlumSession, dbuser: str, databases: List[str], progress: Progress = no_progress
+) -> List[DatabaseOutcomeDTO]:
+    outcomes = []
+    progress(0, len(databases))
+    with ThreadPoolExecutor(max_workers=max(1, settings.DATABASE_PARALLELISM)) as executor:
+        futures = [
+            executor.submit(_reassign_owned_in_database, conn, database, dbuser)
+            for database in databases
+        ]
+        for done, future in enumerate(as_completed(futures), 1):
+            outcomes.append(future.result())
+            progress(done, len(databases))
+
+    return sorted(outcomes, key=lambda outcome: outcome.database)
+
+
+def get_role_dependencies(conn: GreenPlumSession, dbuser: str) -> RoleDependenciesDTO:
+    role = get_role(conn, dbuser)
+    with conn.begin():
+        current_database = conn.execute("SELECT current_database()").scalar()
+        databases = [
+            DatabaseDependenciesDTO(
+                database=row.datname,
+                connectable=row.connectable,
+                owned=row.owned,
+                privileges=row.privileges,
+                other=row.other,
+            ) for row in conn.execute(_role_dependencies_sql, params={"oid": role.oid})
+        ]
+
+    # Общие объекты переназначаются из любой базы, используем текущую
+    reassign_in = {
+        current_database if dependencies.database is None else dependencies.database
+        for dependencies in databases
+    }
+
+    if not databases:
+        strategy = 'drop'
+    elif all(dependencies.connectable for dependencies in databases):
+        strategy = 'reassign'
+    else:
+        strategy = 'blocked'
+
+    return RoleDependenciesDTO(
+        rolname=role.rolname,
+        strategy=strategy,
+        reassign_in=sorted(reassign_in),
+        databases=databases,
+    )
 
 
-def _drop_role_second_var_v1(conn: GreenPlumSession, dbuser: str) -> bool:
-    # Второй вариант - переназначаем права владельца v1
-    deleted = False
-    try:
-        with conn.begin():
-            _reassign_all_owned_by_role_v1(conn, dbuser)
-            _delete_role(conn, dbuser)
-            deleted = True
-    finally:
-        return deleted
+def drop_role(conn: GreenPlumSession, dbuser: str, progress: Progress = no_progress) -> List[DatabaseOutcomeDTO]:
+    # Сначала один раз проверяем зависимости, затем выбираем способ удаления:
+    # без зависимостей достаточно DROP ROLE, иначе владение передается только в базах с объектами роли
+    dependencies = get_role_dependencies(conn, dbuser)
+    if dependencies.strategy == 'blocked':
+        blocked = [item.database for item in dependencies.databases if not item.connectable]
+        raise DoneWithErrors(f"{dbuser} in {', '.join(map(str, blocked))}")
 
+    outcomes = reassign_owned_by_role(conn, dbuser, dependencies.reassign_in, progress)
+    failed = [outcome.database for outcome in outcomes if outcome.error is not None]
+    if failed:
+        raise DoneWithErrors(f"{dbuser} in {', '.join(failed)}")
 
-def _drop_role_second_var_v2(conn: GreenPlumSession, dbuser: str) -> bool:
-    # Второй вариант - переназначаем права владельца v2
-    deleted = False
     try:
         with conn.begin():
-            _reassign_all_owned_by_role_v2(conn, dbuser)
             _delete_role(conn, dbuser)
-            deleted = True
-    finally:
-        return deleted
+    except exc.DatabaseError:
+        # Зависимости могли появиться после проверки
+        raise DoneWithErrors(dbuser)
 
+    return outcomes
 
-def _install_dblink_if_allow(conn: GreenPlumSession, _dbuser: str) -> bool:
-    if not settings.INSTALL_DBLINK:
-        return False
 
-    try:
-        sql_command = """
-            CREATE EXTENSION IF NOT EXISTS dblink
-        """
-
-        with conn.begin():
-            conn.execute(sql_command)
-    finally:
-        return False
-
-
-def drop_role(conn: GreenPlumSession, dbuser: str) -> None:
-    drop_vars = (
-        partial(x, conn, dbuser)
-        for x in (
-            _drop_role_first_var,
-            _install_dblink_if_allow,
-            _drop_role_second_var_v1,
-            _drop_role_second_var_v2,
-        )
-    )
-
-    for drop in drop_vars:
-        if drop():
-            return
+@catalog_snapshot
+def get_all_roles(conn: GreenPlumSession) -> List[RoleDTO]:
+    with conn.begin():
+        rows = conn.execute(_pg_role_stmt)
+        return [RoleDTO(**row) for row in rows]
 
-    raise DoneWithErrors(dbuser)
 
+def get_roles_by_names(conn: GreenPlumSession, rolnames: List[str]) -> List[RoleDTO]:
+    if not rolnames:
+        return []
 
-def get_all_roles(conn: GreenPlumSession) -> List[RoleDTO]:
+    stmt = _pg_role_stmt.where(pg_roles.c.rolname.in_(rolnames))
     with conn.begin():
-        rows = conn.execute(_pg_role_stmt)
+        rows = conn.execute(stmt)
         return [RoleDTO(**row) for row in rows]
 
 
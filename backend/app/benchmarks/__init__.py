@@ -0,0 +1,12 @@
+import os
+
+
+def setup_env() -> None:
+    # Бенчмарки запускаются без .env: настройки без значений по умолчанию заполняются заглушками
+    os.environ.setdefault("BACKEND_CORS_ORIGINS", '["http://localhost"]')
+    os.environ.setdefault("POSTGRES_SERVER", "localhost")
+    os.environ.setdefault("POSTGRES_USER", "postgres")
+    os.environ.setdefault("POSTGRES_PASSWORD", "postgres")
+    os.environ.setdefault("POSTGRES_DB", "app")
+    os.environ.setdefault("FIRST_SUPERUSER", "admin@gppm.com")
+    os.environ.setdefault("FIRST_SUPERUSER_PASSWORD", "admin")
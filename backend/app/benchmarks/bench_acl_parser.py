@@ -0,0 +1,160 @@
+"""
+Разбор aclitem на синтетическом корпусе: прежний разбор регулярными выражениями,
+разбор за один проход и он же с кэшем. Отдельно — получение PrivilegeDTO (parce_one_acl_rule).
+
+    cd backend/app && python -m benchmarks.bench_acl_parser --items 1000000 --distinct 5000
+"""
+import argparse
+import random
+import re
+import string
+from time import perf_counter
+from typing import Callable, List, Optional
+
+from benchmarks import setup_env
+
+setup_env()
+
+from app.use_case.exceptions import FailedToParseACLRule, FailedToParseACLSymbols  # noqa: E402
+from app.use_case.privilege import PrivilegeDTO  # noqa: E402
+from app.use_case.privilege.privilege_mask import acl_item_to_dto  # noqa: E402
+from app.use_case.privilege.privilege_privilege import (  # noqa: E402
+    _parse_acl_item,
+    _valid_privileges,
+    parce_acl_item,
+    parce_one_acl_rule,
+)
+
+# Прежний разбор без изменений, для сравнения. Имена ролей в кавычках он разбирает неверно
+_valid_privileges_inv = {
+    v: k for k, v in _valid_privileges.items()
+}
+
+
+def _decode_acl(acl_symbols: List[str]) -> List[str]:
+    try:
+        return [_valid_privileges_inv[symbol] for symbol in acl_symbols]
+    except KeyError:
+        raise FailedToParseACLSymbols(acl_symbols)
+
+
+def _parce_acl_rule_light(acl: str) -> PrivilegeDTO:
+    re_res = re.findall('[^=/"]+', acl)
+    re_res_len = len(re_res)
+    no_acl_line = "=/" in acl
+
+    if re_res_len == 3:
+        grantee, acl_line, grantor = re_res
+    elif re_res_len == 2:
+        if no_acl_line:
+            acl_line, grantee, grantor = '', *re_res,
+        else:
+            grantee, acl_line, grantor = '', *re_res
+    elif re_res_len == 1 and no_acl_line:
+        grantee, acl_line, grantor = '', '', *re_res
+    else:
+        raise FailedToParseACLRule(acl)
+
+    return PrivilegeDTO(
+        grantee,
+        grantor,
+        privswgo=re.findall('[^*](?=[*])', acl_line),
+        privs=re.findall('[^*](?=[^*]|$)', acl_line),
+    )
+
+
+def _baseline_parce_one_acl_rule(acl: str) -> PrivilegeDTO:
+    priv = _parce_acl_rule_light(acl)
+
+    return PrivilegeDTO(
+        priv.grantee,
+        priv.grantor,
+        privswgo=_decode_acl(priv.privswgo),
+        privs=_decode_acl(priv.privs),
+    )
+
+
+def _tolerant(parse: Callable[[str], PrivilegeDTO]) -> Callable[[str], Optional[PrivilegeDTO]]:
+    # Ошибка разбора не прерывает замер: прежний разбор падает на части ролей в кавычках
+    def wrapper(acl: str) -> Optional[PrivilegeDTO]:
+        try:
+            return parse(acl)
+        except (FailedToParseACLRule, FailedToParseACLSymbols):
+            return None
+
+    return wrapper
+
+
+def _role(rnd: random.Random) -> str:
+    name = "".join(rnd.choices(string.ascii_lowercase, k=rnd.randint(3, 12)))
+    # Часть ролей требует кавычек, как на реальных кластерах
+    if rnd.random() < 0.2:
+        return '"' + name.replace("e", '=e').replace("a", 'a""') + ' x"'
+    return name
+
+
+def _privileges(rnd: random.Random) -> str:
+    symbols = rnd.sample("arwdDxt", rnd.randint(1, 7))
+    return "".join(symbol + ("*" if rnd.random() < 0.1 else "") for symbol in symbols)
+
+
+def make_corpus(items: int, distinct: int, seed: int = 0) -> List[str]:
+    rnd = random.Random(seed)
+    grantors = [_role(rnd) for _ in range(20)]
+    unique = [
+        f"{'' if rnd.random() < 0.05 else _role(rnd)}={_privileges(rnd)}/{rnd.choice(grantors)}"
+        for _ in range(distinct)
+    ]
+    return [rnd.choice(unique) for _ in range(items)]
+
+
+def measure(name: str, parse: Callable, corpus: List[str], repeat: int) -> None:
+    timings = []
+    for _ in range(repeat):
+        parce_acl_item.cache_clear()
+        started = perf_counter()
+        for acl in corpus:
+            parse(acl)
+        timings.append(perf_counter() - started)
+
+    timings.sort()
+    print(f"{name:<28} best {timings[0]:.3f} s, median {timings[len(timings) // 2]:.3f} s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--distinct", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.items, args.distinct)
+    # Кэш не должен менять результат разбора
+    assert all(parce_acl_item(acl) == _parse_acl_item(acl) for acl in set(corpus))
+
+    # Без кавычек прежний разбор дает те же права (порядок в списках может отличаться)
+    for acl in set(corpus):
+        if '"' in acl:
+            continue
+        old = _baseline_parce_one_acl_rule(acl)
+        new = parce_one_acl_rule(acl)
+        assert (
+            (old.grantee, old.grantor, sorted(old.privs), sorted(old.privswgo))
+            == (new.grantee, new.grantor, sorted(new.privs), sorted(new.privswgo))
+        ), acl
+
+    quoted = sum('"' in acl for acl in corpus)
+
+    print(f"{args.items} aclitems, {args.distinct} distinct, {quoted} with quoted roles")
+    measure("baseline", _tolerant(_parce_acl_rule_light), corpus, args.repeat)
+    measure("single pass", _parse_acl_item, corpus, args.repeat)
+    measure("single pass + memo", parce_acl_item, corpus, args.repeat)
+
+    print("PrivilegeDTO (parce_one_acl_rule)")
+    measure("baseline", _tolerant(_baseline_parce_one_acl_rule), corpus, args.repeat)
+    measure("single pass", lambda acl: acl_item_to_dto(_parse_acl_item(acl)), corpus, args.repeat)
+    measure("single pass + memo", parce_one_acl_rule, corpus, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Чтение ACL таблиц в режимах ACL_READ_MODE=text и explode на синтетическом каталоге.
+Создает роли bench_acl_role_N и схему bench_acl с таблицами, после замеров удаляет их.
+
+    cd backend/app && python -m benchmarks.bench_acl_read_mode postgresql://postgres@localhost/bench --tables 20000
+"""
+import argparse
+import random
+from statistics import median
+from time import perf_counter
+from typing import Callable, List, Optional
+
+from benchmarks import setup_env
+
+setup_env()
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.db.orm_types import GreenPlumSession  # noqa: E402
+from app.use_case.acl import get_table_acl_items  # noqa: E402
+from app.use_case.privilege import parce_acl_item  # noqa: E402
+
+SCHEMA = "bench_acl"
+ROLE = "bench_acl_role_{}"
+
+
+def create_catalog(conn: GreenPlumSession, tables: int, roles: int, grants: int) -> None:
+    rnd = random.Random(0)
+    with conn.begin():
+        for n in range(roles):
+            conn.execute(f'CREATE ROLE "{ROLE.format(n)}" NOLOGIN')
+        conn.execute(f'CREATE SCHEMA "{SCHEMA}"')
+
+    for start in range(0, tables, 1000):
+        statements = []
+        for n in range(start, min(start + 1000, tables)):
+            statements.append(f'CREATE TABLE "{SCHEMA}".t{n} (id int)')
+            for role in rnd.sample(range(roles), min(grants, roles)):
+                privileges = ", ".join(rnd.sample(["SELECT", "INSERT", "UPDATE", "DELETE"], rnd.randint(1, 4)))
+                option = " WITH GRANT OPTION" if rnd.random() < 0.1 else ""
+                statements.append(f'GRANT {privileges} ON "{SCHEMA}".t{n} TO "{ROLE.format(role)}"{option}')
+        with conn.begin():
+            conn.execute(";\n".join(statements))
+
+
+def drop_catalog(conn: GreenPlumSession, roles: int) -> None:
+    with conn.begin():
+        conn.execute(f'DROP SCHEMA IF EXISTS "{SCHEMA}" CASCADE')
+        for n in range(roles):
+            conn.execute(f'DROP ROLE IF EXISTS "{ROLE.format(n)}"')
+
+
+def measure(name: str, read: Callable[[], int], repeat: int) -> None:
+    timings: List[float] = []
+    for _ in range(repeat):
+        parce_acl_item.cache_clear()
+        started = perf_counter()
+        items = read()
+        timings.append(perf_counter() - started)
+
+    print(f"{name:<28} median {median(timings) * 1000:8.1f} ms, best {min(timings) * 1000:8.1f} ms, {items} items")
+
+
+def read_items(conn: GreenPlumSession, mode: str, grantee: Optional[str]) -> Callable[[], int]:
+    def read() -> int:
+        settings.ACL_READ_MODE = mode
+        items = get_table_acl_items(conn, SCHEMA, grantee=grantee)
+        return sum(map(len, items.values()))
+
+    return read
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("url", help="URL базы PostgreSQL или Greenplum, у пользователя должно быть право CREATEROLE")
+    parser.add_argument("--tables", type=int, default=20000)
+    parser.add_argument("--roles", type=int, default=50)
+    parser.add_argument("--grants", type=int, default=4, help="ролей с правами на каждую таблицу")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # Без context_key в сессии кэш каталогов не используется, каждый замер читает базу
+    settings.CATALOG_CACHE_ENABLED = False
+    conn = sessionmaker(autocommit=True, bind=create_engine(args.url))()
+
+    drop_catalog(conn, args.roles)
+    create_catalog(conn, args.tables, args.roles, args.grants)
+    try:
+        grantee = ROLE.format(0)
+        print(f"{args.tables} tables, {args.roles} roles, {args.grants} grants per table")
+        measure("all grantees, text", read_items(conn, "text", None), args.repeat)
+        measure("all grantees, explode", read_items(conn, "explode", None), args.repeat)
+        measure("one grantee, text", read_items(conn, "text", grantee), args.repeat)
+        measure("one grantee, explode", read_items(conn, "explode", grantee), args.repeat)
+    finally:
+        drop_catalog(conn, args.roles)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Вход с локальной аутентификацией и AUTH_REFRESH_PASSWORD: с запоминанием проверки пароля,
+без него и с перезаписью хэша при каждом входе, как было раньше.
+Создает пользователя bench-login@gppm.com в базе приложения, после замеров удаляет его.
+
+    cd backend/app && python -m benchmarks.bench_login postgresql://postgres@localhost/app --logins 20
+"""
+import argparse
+from statistics import median
+from time import perf_counter, process_time
+from typing import Callable, List
+
+from benchmarks import setup_env
+
+setup_env()
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import Session, sessionmaker  # noqa: E402
+
+import app.crud as crud  # noqa: E402
+from app.core import security  # noqa: E402
+from app.core.auth import DatabaseAuth  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.schemas.user import UserCreate  # noqa: E402
+
+EMAIL = "bench-login@gppm.com"
+PASSWORD = "bench-login-password"
+
+
+def login(db: Session) -> None:
+    DatabaseAuth().auth(EMAIL, PASSWORD, db=db)
+
+
+def login_with_rehash(db: Session) -> None:
+    user = crud.user.authenticate(db, email=EMAIL, password=PASSWORD)
+    crud.user.update(db, db_obj=user, obj_in={"email": EMAIL, "password": PASSWORD})
+
+
+def measure(name: str, attempt: Callable[[Session], None], db: Session, logins: int) -> None:
+    attempt(db)  # Прогрев: соединение с базой и запоминание первой проверки
+
+    wall: List[float] = []
+    cpu: List[float] = []
+    for _ in range(logins):
+        started, started_cpu = perf_counter(), process_time()
+        attempt(db)
+        wall.append(perf_counter() - started)
+        cpu.append(process_time() - started_cpu)
+
+    print(f"{name:<20} median {median(wall) * 1000:.1f} ms, cpu {median(cpu) * 1000:.1f} ms per login")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("url", help="URL базы приложения с примененными миграциями")
+    parser.add_argument("--logins", type=int, default=20)
+    args = parser.parse_args()
+
+    settings.AUTH_REFRESH_PASSWORD = True
+    db = sessionmaker(autocommit=False, autoflush=False, bind=create_engine(args.url))()
+
+    user = crud.user.get_by_email(db, email=EMAIL)
+    if user is not None:
+        crud.user.remove(db, db_obj=user)
+    user = crud.user.create(db, obj_in=UserCreate(email=EMAIL, password=PASSWORD))
+    try:
+        print(f"{args.logins} logins, bcrypt rounds {security.pwd_context.handler().default_rounds}")
+        measure("memo", login, db, args.logins)
+        # PASSWORD_VERIFY_CACHE_TTL=0: обновление пароля снова проверяет bcrypt
+        security._verified_passwords.ttl = 0
+        security._verified_passwords.clear()
+        measure("no memo", login, db, args.logins)
+        measure("rehash every login", login_with_rehash, db, args.logins)
+    finally:
+        crud.user.remove(db, db_obj=user)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
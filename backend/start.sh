@@ -31,5 +31,11 @@ else
     echo "There is no script $PRE_START_PATH"
 fi
 
+# Metrics of previous runs must not be summed with the new ones
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ] ; then
+    rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
 # Start Gunicorn
 exec gunicorn -k "$WORKER_CLASS" -c "$GUNICORN_CONF" "$APP_MODULE"
@@ -38,6 +38,7 @@ import {
   IUpdateEntityOwner,
   IPermission,
   IGraphPermissionParams,
+  IJob,
 } from "./interfaces/greenplum";
 
 function auth(token: string, params: any = {}) {
@@ -134,8 +135,8 @@ const apiGreenPlum = {
   async createRole(token: string, contextId: number, data: IRoleProfileCreate) {
     return axios.post(`${apiUrl}/api/v1/roles`, data, auth(token, { ctx: contextId }));
   },
-  async deleteRole(token: string, contextId: number, rolname: string) {
-    return axios.delete(`${apiUrl}/api/v1/roles/${rolname}/one`, auth(token, { ctx: contextId }));
+  async submitDropRoleJob(token: string, contextId: number, rolname: string) {
+    return axios.post<IJob>(`${apiUrl}/api/v1/jobs/drop-role/${rolname}`, {}, auth(token, { ctx: contextId }));
   },
   async getRolesGraph(token: string, contextId: number) {
     return axios.get<IRolesGraph>(`${apiUrl}/api/v1/roles/graph`, auth(token, { ctx: contextId }));
@@ -165,8 +166,8 @@ const apiGreenPlum = {
   async updatePermissionTablesInSchema(token: string, contextId: number, data: IGrantTablesInSchema) {
     return axios.put(`${apiUrl}/api/v1/privileges/grant-on/table/in-schema`, data, auth(token, { ctx: contextId, db: data.database }));
   },
-  async updatePermissionTablesInDatabase(token: string, contextId: number, data: IGrantTablesInDatabase) {
-    return axios.put(`${apiUrl}/api/v1/privileges/grant-on/table/in-database`, data, auth(token, { ctx: contextId, db: data.database }));
+  async submitGrantTablesInDatabaseJob(token: string, contextId: number, data: IGrantTablesInDatabase) {
+    return axios.post<IJob>(`${apiUrl}/api/v1/jobs/grant-on/table/in-database`, data, auth(token, { ctx: contextId, db: data.database }));
   },
   async updatePermissionTable(token: string, contextId: number, data: IGrantTable) {
     return axios.put(`${apiUrl}/api/v1/privileges/grant-on/table`, data, auth(token, { ctx: contextId, db: data.database }));
@@ -196,6 +197,10 @@ const apiGreenPlum = {
   async getResourceGroupAvailableLimits(token: string, contextId: number) {
     return axios.get<IResourceGroupAvailableLimits>(`${apiUrl}/api/v1/resource-groups/available-limits`, auth(token, { ctx: contextId }));
   },
+  // jobs
+  async getJob(token: string, contextId: number, jobId: number) {
+    return axios.get<IJob>(`${apiUrl}/api/v1/jobs/${jobId}/one`, auth(token, { ctx: contextId }));
+  },
   // owners
   async updateOwner(token: string, contextId: number, data: IUpdateEntityOwner) {
     return axios.put(`${apiUrl}/api/v1/owners`, data, auth(token, { ctx: contextId, db: data.database }));
@@ -225,4 +225,18 @@ export interface IUpdateEntityOwner {
     database: string;
     schema?: string;
     table?: string;
-}
\ No newline at end of file
+}
+export interface IJob {
+    id: number;
+    kind: string;
+    database?: string;
+    user_id: number;
+    context_id: number;
+    status: string;
+    progress_done: number;
+    progress_total: number;
+    result?: string;
+    created_at: string;
+    started_at?: string;
+    finished_at?: string;
+}
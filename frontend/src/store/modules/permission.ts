@@ -1,6 +1,7 @@
 import { api } from "@/api";
 import { VuexModule, Module, Action } from "vuex-module-decorators";
 import { mainStore } from "@/utils/store-accessor";
+import { waitForJob } from "@/utils/jobs";
 import {
   IGrantDatabase,
   IPermission,
@@ -61,7 +62,8 @@ export default class PermissionModule extends VuexModule {
     try {
       await Promise.all([
         api.updatePermissionSchemasInDatabase(mainStore.token, mainStore.contextId, payload.schema),
-        api.updatePermissionTablesInDatabase(mainStore.token, mainStore.contextId, payload.table),
+        api.submitGrantTablesInDatabaseJob(mainStore.token, mainStore.contextId, payload.table)
+          .then((response) => waitForJob(mainStore.token, mainStore.contextId, response.data)),
       ]);
       mainStore.removeNotification(loadingNotification);
       mainStore.addNotification({
@@ -128,7 +130,8 @@ export default class PermissionModule extends VuexModule {
     mainStore.addNotification(loadingNotification);
 
     try {
-      await api.updatePermissionTablesInDatabase(mainStore.token, mainStore.contextId, payload);
+      const response = await api.submitGrantTablesInDatabaseJob(mainStore.token, mainStore.contextId, payload);
+      await waitForJob(mainStore.token, mainStore.contextId, response.data);
       mainStore.removeNotification(loadingNotification);
       mainStore.addNotification({
         content: "Included permissions successfully updated",
@@ -2,6 +2,7 @@ import { api } from "@/api";
 import { VuexModule, Module, Mutation, Action } from "vuex-module-decorators";
 import { IRoleProfile, IRoleProfileCreate, IRolesGraph, IRoleMember, IRoleProfileUpdate, IRolesGraphEdge, IRolesGraphNode, IRoleRelationship } from "@/interfaces/greenplum";
 import { mainStore } from "@/utils/store-accessor";
+import { waitForJob } from "@/utils/jobs";
 import _ from "lodash";
 
 @Module({ name: "role" })
@@ -59,7 +60,8 @@ export default class RolesModule extends VuexModule {
     mainStore.addNotification(loadingNotification);
 
     try {
-      await api.deleteRole(mainStore.token, mainStore.contextId, payload);
+      const response = await api.submitDropRoleJob(mainStore.token, mainStore.contextId, payload);
+      await waitForJob(mainStore.token, mainStore.contextId, response.data);
       mainStore.removeNotification(loadingNotification);
       mainStore.addNotification({
         content: "Role successfully deleted",
@@ -83,11 +85,12 @@ export default class RolesModule extends VuexModule {
     try {
       const callTasks = async (tasks: string[]) => {
         for (const task of tasks) {
-          await api.deleteRole(
+          const response = await api.submitDropRoleJob(
             mainStore.token,
             mainStore.contextId,
             task
           );
+          await waitForJob(mainStore.token, mainStore.contextId, response.data);
         }
       };
 
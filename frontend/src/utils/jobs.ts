@@ -0,0 +1,19 @@
+import { api } from "@/api";
+import { IJob } from "@/interfaces/greenplum";
+
+const POLL_INTERVAL_MS = 1000;
+const FINISHED_STATUSES = ["done", "failed", "cancelled"];
+
+// Долгие операции выполняются фоновой задачей: ждем ее завершения, опрашивая статус
+export async function waitForJob(token: string, contextId: number, job: IJob): Promise<IJob> {
+  while (!FINISHED_STATUSES.includes(job.status)) {
+    await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS));
+    const response = await api.getJob(token, contextId, job.id);
+    job = response.data;
+  }
+
+  if (job.status !== "done") {
+    throw new Error(job.result || `Job ${job.id} is ${job.status}`);
+  }
+  return job;
+}